@@ -0,0 +1,172 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from almacenamiento.registros import DatosPremios, RegistroPremio
+from comun.metricas import Medidor, Metrica
+from modelos.api_bd.modelos_bd import LaureateResponse, Prize, PrizeBatchUpdate, PrizeKey, PrizeUpdate
+
+
+class AlmacenPremios(ABC):
+    """
+    Interfaz de almacenamiento de premios usada por los handlers de api_bd.
+
+    Las lecturas son sincrónicas porque se resuelven con índices en memoria o consultas indexadas;
+    las mutaciones son asíncronas porque incluyen la persistencia. Las mutaciones lanzan
+    HTTPException 404 cuando no encuentran el premio o alguno de los laureados.
+
+    Las variantes por lote aplican todos los elementos en orden, como si fueran mutaciones sucesivas,
+    pero de forma atómica y con una sola persistencia: si un elemento falla no se aplica ninguno.
+
+    Los premios se devuelven como `RegistroPremio`, la representación interna compacta; las
+    entradas de las mutaciones llegan como modelos de Pydantic, ya validados en el borde HTTP.
+
+    `version()` devuelve un número que cambia con cada mutación y que se usa para invalidar las
+    respuestas cacheadas; en almacenamientos compartidos entre procesos debe ser global. Cada
+    mutación (o lote) incrementa la versión en uno y queda en el historial de cambios que devuelve
+    `cambios_desde`, para el feed de `/changes`.
+
+    Cada lectura ve una versión completa de los datos y nunca una mutación aplicada a medias, sin
+    bloquearse por las escrituras en curso.
+    """
+
+    async def iniciar(self):
+        pass
+
+    async def cerrar(self):
+        pass
+
+    @abstractmethod
+    def version(self) -> int:
+        ...
+
+    def cantidad(self) -> int:
+        return len(self.todos().prizes)
+
+    def metricas(self) -> List[Metrica]:
+        """
+        Métricas propias del almacenamiento, para exponerlas en `/metrics` del servicio.
+        """
+        return [Medidor("dataset_premios", "Cantidad de premios en el dataset.", funcion=self.cantidad),
+                Medidor("dataset_version", "Versión actual del dataset.", funcion=self.version)]
+
+    def instantanea(self):
+        """
+        Devuelve un objeto con `pagina` para recorrer los premios en varios pasos (por ejemplo, al
+        transmitir NDJSON). Los almacenamientos que pueden fijar una versión devuelven una vista en la
+        que todas las páginas corresponden a ella; por defecto es el propio almacenamiento, y cada
+        página refleja la versión vigente al pedirla.
+        """
+        return self
+
+    @abstractmethod
+    def todos(self) -> DatosPremios:
+        ...
+
+    @abstractmethod
+    def pagina(self, desde: int, limite: int) -> Tuple[List[RegistroPremio], Optional[int]]:
+        """
+        Devuelve hasta `limite` premios posteriores a la posición `desde` (0 para empezar), en orden de
+        alta, junto con la posición a usar para pedir la página siguiente (None si no hay más).
+        """
+        ...
+
+    @abstractmethod
+    def por_anio(self, year: int) -> List[RegistroPremio]:
+        ...
+
+    @abstractmethod
+    def por_anio_y_categoria(self, year: int, category: str) -> List[RegistroPremio]:
+        ...
+
+    @abstractmethod
+    def por_rango(self, desde: Optional[int], hasta: Optional[int], category: Optional[str] = None,
+                  con_laureados: Optional[bool] = None) -> List[RegistroPremio]:
+        """
+        Devuelve los premios con año entre `desde` y `hasta` (inclusive; None deja el extremo abierto),
+        ordenados por año y luego por orden de alta. Si se indica, filtra por categoría y por si el
+        premio tiene o no laureados.
+        """
+        ...
+
+    @abstractmethod
+    def buscar(self, consulta: str, limite: int) -> List[RegistroPremio]:
+        """
+        Búsqueda de texto sobre los nombres y motivaciones de los laureados y la motivación general.
+        Cada término de la consulta debe aparecer en el premio, completo o como prefijo de una palabra;
+        los resultados se ordenan por relevancia.
+        """
+        ...
+
+    @abstractmethod
+    def laureado(self, laureate_id: int) -> Optional[LaureateResponse]:
+        ...
+
+    @abstractmethod
+    def estadisticas(self) -> dict:
+        """
+        Devuelve los agregados del dataset (ver `EstadisticasPremios.a_dict`), que se mantienen de forma
+        incremental en cada mutación en lugar de recorrer todos los premios en cada consulta.
+        """
+        ...
+
+    @abstractmethod
+    def cambios_desde(self, version: int, limite: int) -> Optional[List[dict]]:
+        """
+        Devuelve hasta `limite` cambios posteriores a `version`, del más viejo al más nuevo. Cada cambio
+        es la entrada de journal de la mutación (ver `AplicadorJournal`) con la `version` que produjo.
+
+        Retorna:
+            Optional[List[dict]]: Los cambios, o None si alguno de los pedidos ya salió del historial
+            (o si `version` es posterior a la actual).
+        """
+        ...
+
+    @abstractmethod
+    async def esperar_cambios(self, version: int, timeout: float) -> bool:
+        """
+        Espera hasta que la versión supere `version` o pasen `timeout` segundos, y retorna si la superó.
+        """
+        ...
+
+    @abstractmethod
+    async def actualizar(self, year: int, category: str, prize_update: PrizeUpdate) -> RegistroPremio:
+        ...
+
+    @abstractmethod
+    async def eliminar(self, year: int, category: str):
+        ...
+
+    @abstractmethod
+    async def crear(self, prize: Prize) -> RegistroPremio:
+        ...
+
+    @abstractmethod
+    async def actualizar_lote(self, cambios: List[PrizeBatchUpdate]) -> List[RegistroPremio]:
+        ...
+
+    @abstractmethod
+    async def eliminar_lote(self, claves: List[PrizeKey]):
+        ...
+
+    @abstractmethod
+    async def crear_lote(self, prizes: List[Prize]) -> List[RegistroPremio]:
+        ...
+
+
+def premio_no_encontrado() -> HTTPException:
+    return HTTPException(status_code=404,
+                         detail="No se encontró el premio para el año y la categoría especificados.")
+
+
+def laureado_no_encontrado(laureate_id: Optional[int]) -> HTTPException:
+    return HTTPException(status_code=404, detail=f"El laureado de ID: {laureate_id} no fue encontrado.")
+
+
+def error_en_lote(indice: int, error: HTTPException) -> HTTPException:
+    """
+    Indica en el detalle de un error qué elemento del lote lo produjo.
+    """
+    return HTTPException(status_code=error.status_code,
+                         detail=f"Elemento {indice} del lote: {error.detail}")
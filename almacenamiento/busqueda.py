@@ -0,0 +1,168 @@
+import asyncio
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from heapq import nlargest
+from typing import Dict, List, Optional, Set, Tuple
+
+from almacenamiento.registros import RegistroPremio
+
+# Peso de cada campo en el ranking: una coincidencia en el nombre pesa más que en una motivación
+PESO_NOMBRE = 3.0
+PESO_MOTIVACION = 1.0
+# Factor aplicado cuando un término solo coincide como prefijo y no completo
+FACTOR_PREFIJO = 0.5
+# Premios indexados por vuelta del event loop al construir el índice en segundo plano
+TAMANIO_LOTE_INDEXADO = 500
+
+_PATRON_TOKEN = re.compile(r"\w+")
+
+
+def tokenizar(texto: str) -> List[str]:
+    """
+    Separa un texto en términos en minúsculas y sin tildes, para que "Curie" y "curié" coincidan.
+    """
+    sin_tildes = "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+    return _PATRON_TOKEN.findall(sin_tildes.lower())
+
+
+def terminos_premio(premio: RegistroPremio) -> Dict[str, float]:
+    """
+    Devuelve los términos de un premio con su peso acumulado según el campo en el que aparecen.
+    """
+    pesos: Dict[str, float] = Counter()
+    for laureado in premio.laureates:
+        for texto, peso in ((laureado.firstname, PESO_NOMBRE), (laureado.surname, PESO_NOMBRE),
+                            (laureado.motivation, PESO_MOTIVACION)):
+            for termino in tokenizar(texto or ""):
+                pesos[termino] += peso
+    for termino in tokenizar(premio.overallMotivation or ""):
+        pesos[termino] += PESO_MOTIVACION
+    return pesos
+
+
+class IndiceTexto:
+    """
+    Índice invertido en memoria sobre los nombres y motivaciones de los premios.
+
+    Cada término apunta a los premios que lo contienen con su peso; el vocabulario se mantiene
+    ordenado para resolver las búsquedas por prefijo con bisect. Cada premio guarda sus propios
+    términos, de modo que quitarlo o reemplazarlo por su versión modificada no requiere el texto anterior.
+
+    Con `diferir`, los premios iniciales no se indexan al construirlo sino con
+    `indexar_en_segundo_plano`, para no demorar el arranque; una búsqueda antes de que termine indexa
+    primero lo que falte. Las altas, bajas y modificaciones se aplican normalmente mientras tanto.
+    """
+
+    def __init__(self, premios: List[RegistroPremio], diferir: bool = False):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.vocabulario: List[str] = []
+        self._terminos_por_premio: Dict[int, Dict[str, float]] = {}
+        self._premios: Dict[int, RegistroPremio] = {}
+        self._pendientes: List[RegistroPremio] = list(premios) if diferir else []
+        self._siguiente_pendiente = 0
+        # Premios pendientes que ya se quitaron o reemplazaron y no deben indexarse desde la carga inicial
+        self._descartados: Set[int] = set()
+        if not diferir:
+            for premio in premios:
+                self.agregar(premio)
+
+    @property
+    def pendientes(self) -> int:
+        return len(self._pendientes) - self._siguiente_pendiente
+
+    def indexar_pendientes(self, cantidad: Optional[int] = None):
+        """
+        Indexa hasta `cantidad` premios de la carga inicial diferida (todos los que falten si es None).
+        """
+        fin = len(self._pendientes) if cantidad is None else min(len(self._pendientes),
+                                                                 self._siguiente_pendiente + cantidad)
+        for premio in self._pendientes[self._siguiente_pendiente:fin]:
+            clave = id(premio)
+            if clave not in self._terminos_por_premio and clave not in self._descartados:
+                self.agregar(premio)
+        self._siguiente_pendiente = fin
+        if fin == len(self._pendientes):
+            self._pendientes, self._siguiente_pendiente, self._descartados = [], 0, set()
+
+    async def indexar_en_segundo_plano(self, tamanio_lote: int = TAMANIO_LOTE_INDEXADO):
+        """
+        Indexa la carga inicial diferida de a lotes, cediendo el event loop entre uno y otro.
+        """
+        while self.pendientes:
+            self.indexar_pendientes(tamanio_lote)
+            await asyncio.sleep(0)
+
+    def agregar(self, premio: RegistroPremio):
+        clave = id(premio)
+        terminos = terminos_premio(premio)
+        self._premios[clave] = premio
+        self._terminos_por_premio[clave] = terminos
+        for termino, peso in terminos.items():
+            if termino not in self.postings:
+                insort(self.vocabulario, termino)
+            self.postings[termino][clave] = peso
+
+    def quitar(self, premio: RegistroPremio):
+        clave = id(premio)
+        if self._pendientes:
+            self._descartados.add(clave)
+        self._premios.pop(clave, None)
+        for termino in self._terminos_por_premio.pop(clave, {}):
+            documentos = self.postings[termino]
+            del documentos[clave]
+            if not documentos:
+                del self.postings[termino]
+                del self.vocabulario[bisect_left(self.vocabulario, termino)]
+
+    def reemplazar(self, viejo: RegistroPremio, nuevo: RegistroPremio):
+        self.quitar(viejo)
+        self.agregar(nuevo)
+
+    def buscar(self, consulta: str, limite: int, orden: Dict[int, int]) -> List[RegistroPremio]:
+        """
+        Devuelve los premios que contienen todos los términos de la consulta, completos o como prefijo,
+        ordenados por relevancia (peso del campo por IDF) y, a igual puntaje, por `orden`.
+
+        Parámetros:
+            consulta (str): Texto a buscar.
+            limite (int): Cantidad máxima de resultados.
+            orden (Dict[int, int]): Posición de cada premio (por `id`) para desempatar.
+
+        Retorna:
+            List[RegistroPremio]: Los premios encontrados, del más relevante al menos relevante.
+        """
+        self.indexar_pendientes()
+        puntajes: Dict[int, float] = {}
+        for i, token in enumerate(dict.fromkeys(tokenizar(consulta))):
+            puntajes_token: Dict[int, float] = defaultdict(float)
+            for termino in self._con_prefijo(token):
+                documentos = self.postings[termino]
+                idf = math.log(1 + len(self._premios) / len(documentos))
+                factor = 1.0 if termino == token else FACTOR_PREFIJO
+                # Un token puede coincidir con varios términos del premio; cuenta el mejor, para que
+                # muchas coincidencias parciales no superen a una completa
+                for clave, peso in documentos.items():
+                    puntajes_token[clave] = max(puntajes_token[clave], peso * idf * factor)
+
+            # Todos los términos de la consulta deben aparecer en el premio
+            if i == 0:
+                puntajes = dict(puntajes_token)
+            else:
+                puntajes = {clave: puntaje + puntajes_token[clave]
+                            for clave, puntaje in puntajes.items() if clave in puntajes_token}
+            if not puntajes:
+                return []
+
+        mejores: List[Tuple[float, int, int]] = nlargest(
+            limite, ((puntaje, -orden.get(clave, 0), clave) for clave, puntaje in puntajes.items()))
+        return [self._premios[clave] for _, _, clave in mejores]
+
+    def _con_prefijo(self, prefijo: str) -> List[str]:
+        inicio = bisect_left(self.vocabulario, prefijo)
+        fin = inicio
+        while fin < len(self.vocabulario) and self.vocabulario[fin].startswith(prefijo):
+            fin += 1
+        return self.vocabulario[inicio:fin]
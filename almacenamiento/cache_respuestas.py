@@ -0,0 +1,142 @@
+import asyncio
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Callable, Dict, Hashable, List, NamedTuple
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+
+from almacenamiento.registros import RegistroPremio
+from comun.compresion import IDENTIDAD, MINIMO_BYTES, comprimir, etag_codificado, negociar
+from comun.metricas import Contador, Histograma
+
+adaptador_premios = TypeAdapter(List[RegistroPremio])
+
+
+class EntradaCache(NamedTuple):
+    cuerpo: bytes
+    etag: str
+    # Variantes comprimidas del cuerpo por codificación, calculadas la primera vez que se piden
+    variantes: Dict[str, asyncio.Future]
+
+    async def variante(self, codificacion: str) -> bytes:
+        """
+        Devuelve el cuerpo en la codificación pedida. La compresión se hace una sola vez por entrada,
+        en un hilo aparte; las peticiones que llegan mientras tanto esperan el mismo resultado.
+        """
+        if codificacion == IDENTIDAD:
+            return self.cuerpo
+        variante = self.variantes.get(codificacion)
+        if variante is None:
+            variante = asyncio.ensure_future(asyncio.to_thread(comprimir, self.cuerpo, codificacion))
+            self.variantes[codificacion] = variante
+        return await asyncio.shield(variante)
+
+
+class CacheRespuestas:
+    """
+    Caché de respuestas JSON ya codificadas, asociada a la versión del dataset.
+
+    Cada entrada guarda los bytes finales de la respuesta y su ETag. Cuando se consulta con una
+    versión distinta a la de las entradas guardadas, la caché se vacía, de modo que ninguna
+    mutación puede dejar respuestas desactualizadas. Las variantes comprimidas viven en la misma
+    entrada, por lo que cada una se calcula como mucho una vez por versión del dataset.
+
+    Como las claves incluyen parámetros arbitrarios (rangos, búsquedas), la caché tiene además un
+    límite de entradas y de bytes: al superarlo se desalojan las usadas hace más tiempo (LRU). Los
+    bytes cuentan solo el cuerpo sin comprimir; las variantes comprimidas son más chicas. Las
+    respuestas mayores a `max_bytes` se devuelven sin guardarse.
+    """
+
+    def __init__(self, max_entradas: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.version = 0
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas: "OrderedDict[Hashable, EntradaCache]" = OrderedDict()
+        self.consultas = Contador("cache_respuestas_consultas_total",
+                                  "Consultas a la caché de respuestas por ruta base y resultado.",
+                                  ("ruta", "resultado"))
+        self.duracion_generacion = Histograma("cache_respuestas_generacion_segundos",
+                                              "Duración de la consulta y serialización de una respuesta no cacheada.",
+                                              ("ruta",))
+        self.desalojos = Contador("cache_respuestas_desalojos_total",
+                                  "Entradas desalojadas de la caché de respuestas por los límites de tamaño.")
+
+    def obtener(self, clave: Hashable, version: int, generar: Callable[[], bytes]) -> EntradaCache:
+        """
+        Devuelve la entrada de la clave para la versión indicada, generándola si no existe.
+
+        Parámetros:
+            clave (Hashable): Identificador de la ruta y sus parámetros.
+            version (int): Versión actual del dataset.
+            generar (Callable): Función que produce los bytes JSON de la respuesta.
+
+        Retorna:
+            EntradaCache: Cuerpo codificado y ETag de la respuesta.
+        """
+        if version != self.version:
+            self._entradas.clear()
+            self.bytes = 0
+            self.version = version
+
+        ruta = clave[0] if isinstance(clave, tuple) else clave
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            self.consultas.incrementar(ruta, "fallo")
+            with self.duracion_generacion.medir(ruta):
+                cuerpo = generar()
+            entrada = EntradaCache(cuerpo, calcular_etag(cuerpo), {})
+            if len(cuerpo) <= self.max_bytes:
+                self._entradas[clave] = entrada
+                self.bytes += len(cuerpo)
+                self._desalojar()
+        else:
+            self._entradas.move_to_end(clave)
+            self.consultas.incrementar(ruta, "acierto")
+        return entrada
+
+    def _desalojar(self):
+        while len(self._entradas) > self.max_entradas or self.bytes > self.max_bytes:
+            _, entrada = self._entradas.popitem(last=False)
+            self.bytes -= len(entrada.cuerpo)
+            self.desalojos.incrementar()
+
+
+def calcular_etag(cuerpo: bytes) -> str:
+    return '"' + blake2b(cuerpo, digest_size=16).hexdigest() + '"'
+
+
+def etag_coincide(if_none_match: str, etag: str) -> bool:
+    """
+    Indica si alguno de los ETags del encabezado If-None-Match coincide con el ETag dado.
+    """
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*":
+            return True
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+
+async def respuesta_cacheada(request: Request, entrada: EntradaCache) -> Response:
+    """
+    Construye la respuesta HTTP para una entrada de la caché, respondiendo 304 si el cliente ya la tiene.
+
+    El cuerpo se comprime con la codificación negociada según `Accept-Encoding` cuando supera
+    `MINIMO_BYTES`; cada codificación tiene su propio ETag.
+    """
+    codificacion = IDENTIDAD
+    if len(entrada.cuerpo) >= MINIMO_BYTES:
+        codificacion = negociar(request.headers.get("accept-encoding", ""))
+    encabezados = {"ETag": etag_codificado(entrada.etag, codificacion), "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_coincide(if_none_match, encabezados["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=encabezados)
+    if codificacion != IDENTIDAD:
+        encabezados["Content-Encoding"] = codificacion
+    return Response(content=await entrada.variante(codificacion), media_type="application/json",
+                    headers=encabezados)
@@ -0,0 +1,94 @@
+import asyncio
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+
+class AvisoVersion:
+    """
+    Despierta a las peticiones que esperan una versión del dataset posterior a la que conocen.
+
+    Cada aviso completa el evento vigente y lo reemplaza por uno nuevo, de modo que quienes esperan
+    vuelven a comparar la versión y, si todavía no les alcanza, esperan el siguiente aviso.
+    """
+
+    def __init__(self):
+        self._evento = asyncio.Event()
+
+    def avisar(self):
+        evento, self._evento = self._evento, asyncio.Event()
+        evento.set()
+
+    async def esperar(self, version_actual: Callable[[], int], desde: int, timeout: float,
+                      sondeo: Optional[float] = None) -> bool:
+        """
+        Espera hasta que `version_actual()` supere `desde` o pasen `timeout` segundos.
+
+        Con `sondeo`, además vuelve a consultar la versión cada `sondeo` segundos, para notar los
+        cambios que no avisan en este proceso (por ejemplo, los de otros workers).
+
+        Retorna:
+            bool: Si la versión superó a `desde`.
+        """
+        loop = asyncio.get_running_loop()
+        fin = loop.time() + timeout
+        while version_actual() <= desde:
+            restante = fin - loop.time()
+            if restante <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._evento.wait(), min(restante, sondeo) if sondeo else restante)
+            except asyncio.TimeoutError:
+                pass
+        return True
+
+
+class HistorialCambios:
+    """
+    Últimos cambios del dataset, en orden de versión, para el feed de `/changes`.
+
+    Cada cambio es la entrada del journal de una mutación (`op` y sus datos, ver `AplicadorJournal`)
+    con la versión del dataset que produjo, de modo que una réplica puede aplicarlo tal cual. Se
+    conservan los últimos `maximo` cambios.
+    """
+
+    def __init__(self, maximo: int):
+        self._cambios: Deque[dict] = deque(maxlen=maximo)
+
+    def agregar(self, cambio: dict):
+        self._cambios.append(cambio)
+
+    def vaciar(self):
+        self._cambios.clear()
+
+    def desde(self, version: int, version_actual: int, limite: int) -> Optional[List[dict]]:
+        """
+        Devuelve hasta `limite` cambios con versión mayor que `version`, del más viejo al más nuevo.
+
+        Retorna:
+            Optional[List[dict]]: Los cambios, o None si alguno de los pedidos ya no está en el
+            historial (o si `version` es posterior a la actual), en cuyo caso hay que releer los datos.
+        """
+        if version > version_actual:
+            return None
+        posteriores = []
+        for cambio in reversed(self._cambios):
+            if cambio["version"] <= version:
+                break
+            posteriores.append(cambio)
+        # Los cambios son consecutivos: si el más viejo encontrado no sigue a `version`, faltan cambios
+        primera = posteriores[-1]["version"] if posteriores else version_actual + 1
+        if primera != version + 1 and version != version_actual:
+            return None
+        posteriores.reverse()
+        return posteriores[:limite]
+
+
+def premios_de_cambio(cambio: dict) -> List[Tuple[int, str]]:
+    """
+    Devuelve los pares (año, categoría) de los premios que toca un cambio, incluidos los de un lote.
+    """
+    if cambio["op"] == "batch":
+        return [par for operacion in cambio["ops"] for par in premios_de_cambio(operacion)]
+    if cambio["op"] == "create":
+        return [(cambio["prize"]["year"], cambio["prize"]["category"])]
+    return [(cambio["year"], cambio["category"])]
@@ -0,0 +1,143 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from almacenamiento.journal import Journal, serializar_snapshot
+from almacenamiento.snapshot_binario import ruta_binaria, serializar_binario
+from almacenamiento.registros import DatosPremios
+from comun.metricas import LIMITES_BYTES, Histograma
+
+
+class EscritorJournal:
+    """
+    Tarea en segundo plano que persiste las mutaciones agrupándolas (group commit).
+
+    Los handlers encolan sus entradas sin hacer I/O; la tarea espera una ventana corta para juntar
+    las mutaciones que lleguen en ráfaga y las escribe en un hilo aparte con una sola sincronización
+    a disco. También dispara la compactación del snapshot cuando el journal supera el umbral.
+
+    Registra la duración y los bytes de cada escritura del journal y de cada compactación.
+
+    Para que quien publica las mutaciones sepa qué parte de ellas ya es durable, al tomar cada lote
+    (y cada snapshot) se guarda el valor de `obtener_estado()`, que se pasa a `al_persistir` cuando la
+    escritura termina bien. Si una escritura del journal falla, las entradas siguientes no pueden
+    agregarse sin dejar un hueco en la secuencia: el escritor falla el lote y todo lo encolado, guarda
+    el error en `error`, llama a `al_fallar` y no escribe nada más.
+    """
+
+    def __init__(self, journal: Journal, ruta_snapshot: str, obtener_datos: Callable[[], DatosPremios],
+                 ventana: float, compactar_cada: int, esperar_durabilidad: bool = True,
+                 obtener_metadatos: Callable[[], Dict] = dict, binario: bool = False,
+                 obtener_estado: Callable[[], Any] = lambda: None,
+                 al_persistir: Callable[[Any], None] = lambda estado: None,
+                 al_fallar: Callable[[Exception], None] = lambda error: None):
+        self.journal = journal
+        self.ruta_snapshot = ruta_snapshot
+        self.obtener_datos = obtener_datos
+        self.obtener_metadatos = obtener_metadatos
+        self.ventana = ventana
+        self.compactar_cada = compactar_cada
+        self.esperar_durabilidad = esperar_durabilidad
+        self.binario = binario
+        self.obtener_estado = obtener_estado
+        self.al_persistir = al_persistir
+        self.al_fallar = al_fallar
+        self.error: Optional[Exception] = None
+        self._cola: List[Tuple[str, Optional[asyncio.Future]]] = []
+        self._hay_datos = asyncio.Event()
+        self._detenido = False
+        self._tarea: Optional[asyncio.Task] = None
+        self.duracion = Histograma("persistencia_duracion_segundos",
+                                   "Duración de cada escritura a disco de las mutaciones.", ("operacion",))
+        self.bytes_escritos = Histograma("persistencia_bytes",
+                                         "Bytes escritos a disco en cada escritura de las mutaciones.",
+                                         ("operacion",), LIMITES_BYTES)
+
+    def iniciar(self):
+        self._tarea = asyncio.create_task(self._ciclo())
+
+    async def detener(self):
+        """
+        Detiene la tarea después de persistir todas las entradas encoladas.
+        """
+        self._detenido = True
+        self._hay_datos.set()
+        if self._tarea is not None:
+            await self._tarea
+        await self._vaciar()
+
+    def encolar(self, op: str, **campos) -> Optional[asyncio.Future]:
+        """
+        Encola una mutación para la próxima escritura del lote.
+
+        Retorna:
+            Optional[asyncio.Future]: Futuro que se resuelve cuando la entrada está en disco, o None si
+            el escritor está configurado para confirmar sin esperar la durabilidad.
+        """
+        confirmacion = asyncio.get_running_loop().create_future() if self.esperar_durabilidad else None
+        self._cola.append((self.journal.preparar(op, **campos), confirmacion))
+        self._hay_datos.set()
+        return confirmacion
+
+    async def _ciclo(self):
+        while not self._detenido:
+            await self._hay_datos.wait()
+            if self.ventana > 0 and not self._detenido:
+                await asyncio.sleep(self.ventana)
+            await self._vaciar()
+
+    async def _vaciar(self):
+        self._hay_datos.clear()
+        lote, self._cola = self._cola, []
+        if not lote or self.error is not None:
+            return
+
+        # El lote incluye todas las mutaciones publicadas hasta ahora, así que el estado actual es el
+        # que queda en disco si la escritura termina bien
+        estado = self.obtener_estado()
+        try:
+            with self.duracion.medir("journal"):
+                escritos = await asyncio.to_thread(self.journal.escribir, [linea for linea, _ in lote])
+            self.bytes_escritos.observar(escritos, "journal")
+        except Exception as e:
+            # Lo encolado durante la escritura tampoco puede persistirse después de este lote
+            lote, self._cola = lote + self._cola, []
+            print(f"Error al escribir {len(lote)} entradas en el journal; no se aceptan más escrituras: {str(e)}")
+            self.error = e
+            for _, confirmacion in lote:
+                if confirmacion is not None and not confirmacion.done():
+                    confirmacion.set_exception(e)
+            self.al_fallar(e)
+            return
+
+        for _, confirmacion in lote:
+            if confirmacion is not None and not confirmacion.done():
+                confirmacion.set_result(None)
+        self.al_persistir(estado)
+
+        if self.journal.registros_pendientes >= self.compactar_cada:
+            await self._compactar()
+
+    async def _compactar(self):
+        # Los datos y la secuencia se toman juntos en el event loop; como la instantánea no se modifica
+        # después de publicada, la serialización puede hacerse en el hilo aparte sin bloquear las
+        # peticiones. Las entradas todavía encoladas tienen secuencia menor o igual y se ignoran al reproducir.
+        datos_nobel, seq, metadatos = self.obtener_datos(), self.journal.seq, self.obtener_metadatos()
+        estado = self.obtener_estado()
+        try:
+            with self.duracion.medir("snapshot"):
+                await asyncio.to_thread(self._escribir_snapshot, datos_nobel, seq, metadatos)
+        except Exception as e:
+            print(f"Error al compactar el journal en {self.ruta_snapshot}: {str(e)}")
+            return
+        # El snapshot incluye también las mutaciones todavía encoladas
+        self.al_persistir(estado)
+
+    def _escribir_snapshot(self, datos_nobel: DatosPremios, seq: int, metadatos: Dict):
+        contenido = serializar_snapshot(datos_nobel, seq, **metadatos)
+        contenido_binario = serializar_binario(datos_nobel, journal_seq=seq, **metadatos) if self.binario else None
+        self.journal.reemplazar_snapshot(contenido, self.ruta_snapshot, contenido_binario)
+        escritos = os.path.getsize(self.ruta_snapshot)
+        if contenido_binario is not None:
+            escritos += os.path.getsize(ruta_binaria(self.ruta_snapshot))
+        self.bytes_escritos.observar(escritos, "snapshot")
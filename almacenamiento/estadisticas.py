@@ -0,0 +1,95 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from almacenamiento.indices import normalizar_categoria
+from almacenamiento.registros import RegistroPremio
+
+GRUPOS = ("totales", "por_categoria", "por_decada", "por_cantidad_laureados", "por_share")
+# Clave de los laureados sin `share` en el grupo `por_share`
+SIN_SHARE = "sin_dato"
+
+
+class EstadisticasPremios:
+    """
+    Agregados del dataset mantenidos de forma incremental.
+
+    Cuenta los premios por categoría normalizada, por década y por cantidad de laureados, y los
+    laureados por `share` (1 si el premio no se compartió, 2 si se dividió a la mitad, etc.). Cada
+    mutación resta el aporte de los premios que quita o reemplaza y suma el de los que agrega, por lo
+    que consultar los agregados no depende del tamaño del dataset.
+
+    Los contadores pueden ser negativos, de modo que el mismo objeto sirve para acumular la diferencia
+    que produce una transacción y aplicarla después sobre otra copia (ver `filas` y `desde_filas`).
+    """
+
+    def __init__(self, premios: Iterable[RegistroPremio] = ()):
+        self.contadores: Dict[str, Counter] = {grupo: Counter() for grupo in GRUPOS}
+        for premio in premios:
+            self.agregar(premio)
+
+    @classmethod
+    def desde_filas(cls, filas: Iterable[Tuple[str, str, int]]) -> "EstadisticasPremios":
+        estadisticas = cls()
+        for grupo, clave, valor in filas:
+            estadisticas.contadores[grupo][clave] += valor
+        return estadisticas
+
+    def agregar(self, premio: RegistroPremio):
+        self._sumar(premio, 1)
+
+    def quitar(self, premio: RegistroPremio):
+        self._sumar(premio, -1)
+
+    def reemplazar(self, viejo: RegistroPremio, nuevo: RegistroPremio):
+        self.quitar(viejo)
+        self.agregar(nuevo)
+
+    def _sumar(self, premio: RegistroPremio, signo: int):
+        contadores = self.contadores
+        contadores["totales"]["premios"] += signo
+        contadores["totales"]["laureados"] += signo * len(premio.laureates)
+        contadores["por_categoria"][normalizar_categoria(premio.category)] += signo
+        contadores["por_decada"][str(premio.year // 10 * 10)] += signo
+        contadores["por_cantidad_laureados"][str(len(premio.laureates))] += signo
+        for laureado in premio.laureates:
+            contadores["por_share"][laureado.share or SIN_SHARE] += signo
+
+    def filas(self) -> List[Tuple[str, str, int]]:
+        """
+        Devuelve los contadores distintos de cero como filas (grupo, clave, valor).
+        """
+        return [(grupo, clave, valor) for grupo, contador in self.contadores.items()
+                for clave, valor in contador.items() if valor]
+
+    def a_dict(self) -> dict:
+        """
+        Devuelve los agregados listos para serializar, con las proporciones de premios y laureados compartidos.
+
+        Un premio es compartido si tiene más de un laureado; un laureado, si su `share` es distinto de 1.
+        """
+        premios = self.contadores["totales"]["premios"]
+        laureados = self.contadores["totales"]["laureados"]
+        por_cantidad = _sin_ceros(self.contadores["por_cantidad_laureados"], clave_numerica=True)
+        por_share = _sin_ceros(self.contadores["por_share"])
+
+        con_laureados = sum(valor for clave, valor in por_cantidad.items() if clave != "0")
+        compartidos = sum(valor for clave, valor in por_cantidad.items() if int(clave) > 1)
+        con_share = sum(valor for clave, valor in por_share.items() if clave != SIN_SHARE)
+        laureados_compartidos = sum(valor for clave, valor in por_share.items() if clave not in ("1", SIN_SHARE))
+        return {
+            "premios": premios,
+            "laureados": laureados,
+            "laureados_por_premio": round(laureados / premios, 4) if premios else 0.0,
+            "premios_por_categoria": _sin_ceros(self.contadores["por_categoria"]),
+            "premios_por_decada": _sin_ceros(self.contadores["por_decada"], clave_numerica=True),
+            "premios_por_cantidad_laureados": por_cantidad,
+            "laureados_por_share": por_share,
+            "proporcion_premios_compartidos": round(compartidos / con_laureados, 4) if con_laureados else 0.0,
+            "proporcion_laureados_compartidos": round(laureados_compartidos / con_share, 4) if con_share else 0.0,
+        }
+
+
+def _sin_ceros(contador: Counter, clave_numerica: bool = False) -> Dict[str, int]:
+    claves = sorted((clave for clave, valor in contador.items() if valor),
+                    key=lambda clave: (int(clave), clave) if clave_numerica else (0, clave))
+    return {clave: contador[clave] for clave in claves}
@@ -0,0 +1,174 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from almacenamiento.registros import RegistroLaureado, RegistroPremio
+
+
+def normalizar_categoria(category: str) -> str:
+    """
+    Normaliza el nombre de una categoría para compararla de forma consistente en lecturas y escrituras.
+    """
+    return category.strip().lower()
+
+
+class IndicePremios:
+    """
+    Índices secundarios en memoria sobre la lista de premios.
+
+    Mantiene los diccionarios año -> premios, (año, categoría normalizada) -> premios e
+    id de laureado -> [(premio, laureado)], que se construyen una sola vez al cargar los datos y se
+    actualizan de forma incremental en cada alta, modificación o baja, evitando recorrer todo el
+    dataset en cada consulta. También lleva el contador monotónico de IDs de laureados.
+
+    Un mismo laureado puede aparecer en varios premios (por ejemplo, Marie Curie), por lo que el
+    índice de laureados guarda todas sus apariciones.
+
+    Cada premio recibe además una posición estable y creciente según su orden de alta, que se usa
+    como cursor de paginación: la lista de premios siempre está ordenada por esa posición.
+
+    Para las consultas por rango se mantienen la lista ordenada de años con premios y, por cada
+    categoría, la lista ordenada de sus años (postings). Un rango se resuelve con bisect sobre esas
+    listas, con un costo proporcional a la cantidad de años y premios del resultado.
+    """
+
+    def __init__(self, premios: List[RegistroPremio], ultimo_id_laureado: int = 0):
+        self.por_anio: Dict[int, List[RegistroPremio]] = defaultdict(list)
+        self.por_anio_categoria: Dict[Tuple[int, str], List[RegistroPremio]] = defaultdict(list)
+        self.por_laureado: Dict[int, List[Tuple[RegistroPremio, RegistroLaureado]]] = defaultdict(list)
+        self.ultimo_id_laureado = ultimo_id_laureado
+        self.posiciones: Dict[int, int] = {}
+        self.anios: List[int] = []
+        self.anios_por_categoria: Dict[str, List[int]] = defaultdict(list)
+        self._ultima_posicion = 0
+        for premio in premios:
+            self.agregar(premio)
+
+    def agregar(self, premio: RegistroPremio):
+        self._ultima_posicion += 1
+        self.posiciones[id(premio)] = self._ultima_posicion
+        categoria = normalizar_categoria(premio.category)
+        if premio.year not in self.por_anio:
+            insort(self.anios, premio.year)
+        if (premio.year, categoria) not in self.por_anio_categoria:
+            insort(self.anios_por_categoria[categoria], premio.year)
+        self.por_anio[premio.year].append(premio)
+        self.por_anio_categoria[(premio.year, categoria)].append(premio)
+        for laureado in premio.laureates:
+            if laureado.id is not None:
+                self.por_laureado[laureado.id].append((premio, laureado))
+                self.ultimo_id_laureado = max(self.ultimo_id_laureado, laureado.id)
+
+    def quitar(self, premio: RegistroPremio):
+        categoria = normalizar_categoria(premio.category)
+        _quitar_por_identidad(self.por_anio, premio.year, premio)
+        _quitar_por_identidad(self.por_anio_categoria, (premio.year, categoria), premio)
+        if premio.year not in self.por_anio:
+            _quitar_ordenado(self.anios, premio.year)
+        if (premio.year, categoria) not in self.por_anio_categoria:
+            _quitar_ordenado(self.anios_por_categoria[categoria], premio.year)
+            if not self.anios_por_categoria[categoria]:
+                del self.anios_por_categoria[categoria]
+        self.posiciones.pop(id(premio), None)
+        for laureado in premio.laureates:
+            apariciones = self.por_laureado.get(laureado.id)
+            if not apariciones:
+                continue
+            apariciones[:] = [(p, l) for p, l in apariciones if p is not premio]
+            if not apariciones:
+                del self.por_laureado[laureado.id]
+
+    def reemplazar(self, viejo: RegistroPremio, nuevo: RegistroPremio):
+        """
+        Sustituye un premio por su versión modificada, conservando su posición y su orden en cada índice.
+
+        La versión nueva tiene el mismo año, categoría y laureados (en el mismo orden) que la anterior.
+        """
+        categoria = normalizar_categoria(viejo.category)
+        self.posiciones[id(nuevo)] = self.posiciones.pop(id(viejo))
+        _reemplazar_por_identidad(self.por_anio[viejo.year], viejo, nuevo)
+        _reemplazar_por_identidad(self.por_anio_categoria[(viejo.year, categoria)], viejo, nuevo)
+        for anterior, actual in zip(viejo.laureates, nuevo.laureates):
+            apariciones = self.por_laureado.get(anterior.id)
+            if apariciones:
+                apariciones[:] = [(nuevo, actual) if p is viejo and l is anterior else (p, l) for p, l in apariciones]
+
+    def posicion(self, premio: RegistroPremio) -> int:
+        return self.posiciones[id(premio)]
+
+    def asignar_id_laureado(self) -> int:
+        """
+        Devuelve el siguiente ID de laureado. Los IDs nunca se reutilizan, aunque se borre el premio.
+        """
+        self.ultimo_id_laureado += 1
+        return self.ultimo_id_laureado
+
+    def buscar_laureado(self, laureate_id: int) -> List[Tuple[RegistroPremio, RegistroLaureado]]:
+        return list(self.por_laureado.get(laureate_id, ()))
+
+    def laureado_en_premio(self, premio: RegistroPremio, laureate_id: int) -> Optional[RegistroLaureado]:
+        return next((l for p, l in self.por_laureado.get(laureate_id, ()) if p is premio), None)
+
+    def buscar_por_anio(self, year: int) -> List[RegistroPremio]:
+        return list(self.por_anio.get(year, ()))
+
+    def buscar_por_anio_y_categoria(self, year: int, category: str) -> List[RegistroPremio]:
+        return list(self.por_anio_categoria.get((year, normalizar_categoria(category)), ()))
+
+    def buscar_por_rango(self, desde: Optional[int], hasta: Optional[int],
+                         category: Optional[str] = None) -> Iterator[RegistroPremio]:
+        """
+        Recorre los premios con año entre `desde` y `hasta` (inclusive; None deja el extremo abierto),
+        opcionalmente de una sola categoría, ordenados por año y luego por orden de alta.
+        """
+        if category is None:
+            anios, listas = self.anios, self.por_anio
+            claves = _rango_ordenado(anios, desde, hasta)
+        else:
+            categoria = normalizar_categoria(category)
+            anios, listas = self.anios_por_categoria.get(categoria, []), self.por_anio_categoria
+            claves = ((anio, categoria) for anio in _rango_ordenado(anios, desde, hasta))
+        for clave in claves:
+            yield from listas[clave]
+
+    def primero(self, year: int, category: str) -> Optional[RegistroPremio]:
+        premios = self.por_anio_categoria.get((year, normalizar_categoria(category)))
+        return premios[0] if premios else None
+
+
+def _rango_ordenado(valores: List[int], desde: Optional[int], hasta: Optional[int]) -> List[int]:
+    inicio = 0 if desde is None else bisect_left(valores, desde)
+    fin = len(valores) if hasta is None else bisect_right(valores, hasta)
+    return valores[inicio:fin]
+
+
+def _quitar_ordenado(valores: List[int], valor: int):
+    i = bisect_left(valores, valor)
+    if i < len(valores) and valores[i] == valor:
+        del valores[i]
+
+
+def _quitar_por_identidad(indice: dict, clave, premio: RegistroPremio):
+    premios = indice.get(clave)
+    if not premios:
+        return
+    quitar_premio(premios, premio)
+    if not premios:
+        del indice[clave]
+
+
+def _reemplazar_por_identidad(premios: List[RegistroPremio], viejo: RegistroPremio, nuevo: RegistroPremio):
+    for i, p in enumerate(premios):
+        if p is viejo:
+            premios[i] = nuevo
+            return
+
+
+def quitar_premio(premios: List[RegistroPremio], premio: RegistroPremio):
+    """
+    Elimina un premio de la lista comparando por identidad y no por igualdad de campos.
+    """
+    for i, p in enumerate(premios):
+        if p is premio:
+            del premios[i]
+            return
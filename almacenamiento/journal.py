@@ -0,0 +1,226 @@
+import json
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from almacenamiento.indices import normalizar_categoria
+from almacenamiento.registros import DatosPremios, RegistroPremio, adaptador_datos, premio_desde_dict
+from almacenamiento.snapshot_binario import escribir_snapshot_binario, serializar_binario
+
+
+class Journal:
+    """
+    Registro de escritura anticipada (write-ahead log) de las mutaciones sobre los premios.
+
+    Cada mutación se agrega como una línea JSON compacta con un número de secuencia creciente, por
+    lo que el costo de persistir un cambio no depende del tamaño del dataset. Al iniciar se
+    reproducen sobre el snapshot las entradas posteriores a su secuencia, y cada cierta cantidad de
+    registros se compacta escribiendo un snapshot nuevo con reemplazo atómico.
+    """
+
+    def __init__(self, ruta: str, sincronizar: bool = True):
+        self.ruta = ruta
+        self.sincronizar = sincronizar
+        self.seq = 0
+        self.registros_pendientes = 0
+        self.ultimo_id_reproducido = 0
+        self._archivo = None
+
+    def reproducir(self, datos_nobel: DatosPremios, seq_snapshot: int) -> int:
+        """
+        Aplica sobre los datos del snapshot las entradas del journal posteriores a su secuencia.
+
+        Si la última línea quedó incompleta por una caída durante la escritura (aunque sea JSON
+        válido, si le falta el salto de línea nunca se confirmó), se descarta y se trunca el archivo
+        para que las siguientes entradas no queden pegadas a ella.
+
+        Parámetros:
+            datos_nobel (DatosPremios): Datos cargados desde el snapshot.
+            seq_snapshot (int): Secuencia de la última entrada incluida en el snapshot.
+
+        Retorna:
+            int: Cantidad de entradas aplicadas.
+        """
+        self.seq = seq_snapshot
+        aplicadas = 0
+
+        if os.path.isfile(self.ruta):
+            with open(self.ruta, "rb") as f:
+                contenido = f.read()
+
+            aplicador = AplicadorJournal(datos_nobel)
+            offset = 0
+            for linea in contenido.splitlines(keepends=True):
+                try:
+                    registro = json.loads(linea) if linea.endswith(b"\n") else None
+                except ValueError:
+                    if offset + len(linea) < len(contenido):
+                        raise ValueError(f"Entrada corrupta en {self.ruta} (byte {offset}).")
+                    registro = None
+                if registro is None:
+                    print(f"Descartando entrada incompleta al final de {self.ruta}.")
+                    with open(self.ruta, "r+b") as f:
+                        f.truncate(offset)
+                    break
+
+                offset += len(linea)
+                if registro["seq"] <= seq_snapshot:
+                    continue
+                aplicador.aplicar(registro)
+                self.seq = registro["seq"]
+                self.ultimo_id_reproducido = max(self.ultimo_id_reproducido, *_ids_creados(registro), 0)
+                aplicadas += 1
+            aplicador.terminar()
+
+        self.registros_pendientes = aplicadas
+        return aplicadas
+
+    def preparar(self, op: str, **campos) -> str:
+        """
+        Asigna el siguiente número de secuencia a una mutación y la codifica como línea del journal.
+
+        Parámetros:
+            op (str): Tipo de operación (`create`, `put`, `delete` o `batch`).
+            **campos: Datos de la operación.
+
+        Retorna:
+            str: Línea JSON lista para escribirse con `escribir`.
+        """
+        self.seq += 1
+        registro = {"seq": self.seq, "op": op, **campos}
+        return json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def escribir(self, lineas: List[str]) -> int:
+        """
+        Agrega un lote de líneas al final del journal con una única sincronización a disco.
+
+        Retorna:
+            int: Cantidad de bytes escritos.
+        """
+        if self._archivo is None:
+            self._archivo = open(self.ruta, "ab")
+        contenido = "".join(lineas).encode("utf-8")
+        self._archivo.write(contenido)
+        self._archivo.flush()
+        if self.sincronizar:
+            os.fsync(self._archivo.fileno())
+        self.registros_pendientes += len(lineas)
+        return len(contenido)
+
+    def compactar(self, datos_nobel: DatosPremios, ruta_snapshot: str, binario: bool = False, **metadatos):
+        """
+        Escribe un snapshot nuevo con todos los datos y vacía el journal.
+
+        El snapshot registra la secuencia hasta la que incluye cambios, de modo que si el proceso
+        se cae antes de vaciar el journal, esas entradas se ignoran al reproducirlo. Los metadatos
+        adicionales (por ejemplo el último ID de laureado asignado) se guardan en el encabezado.
+        Si `binario` es verdadero, también se escribe la copia binaria usada para arrancar rápido.
+        """
+        contenido_binario = serializar_binario(datos_nobel, journal_seq=self.seq, **metadatos) if binario else None
+        self.reemplazar_snapshot(serializar_snapshot(datos_nobel, self.seq, **metadatos), ruta_snapshot,
+                                 contenido_binario)
+
+    def reemplazar_snapshot(self, contenido: str, ruta_snapshot: str, contenido_binario: Optional[bytes] = None):
+        """
+        Escribe un snapshot ya serializado y vacía el journal. Puede ejecutarse fuera del event loop.
+
+        La copia binaria se escribe después del JSON, porque registra su huella: si el proceso se cae
+        entre ambas escrituras, el binario anterior no coincide con el JSON nuevo y se ignora.
+        """
+        escribir_snapshot(contenido, ruta_snapshot)
+        if contenido_binario is not None:
+            escribir_snapshot_binario(contenido_binario, ruta_snapshot)
+        self.cerrar()
+        with open(self.ruta, "w", encoding="utf-8"):
+            pass
+        self.registros_pendientes = 0
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+
+def serializar_snapshot(datos_nobel: DatosPremios, seq: int, **metadatos) -> str:
+    """
+    Serializa los datos como snapshot, agregando la secuencia del journal que incluye y los metadatos dados.
+    """
+    encabezado = json.dumps({"journal_seq": seq, **metadatos}, separators=(",", ":"))
+    contenido = adaptador_datos.dump_json(datos_nobel, exclude_none=True).decode()
+    return encabezado[:-1] + "," + contenido[1:]
+
+
+def escribir_snapshot(contenido: str, ruta_snapshot: str):
+    """
+    Escribe el snapshot en un archivo temporal y lo renombra sobre el definitivo, para que una caída
+    a mitad de la escritura nunca deje un archivo de datos corrupto.
+    """
+    ruta_temporal = ruta_snapshot + ".tmp"
+    with open(ruta_temporal, "w", encoding="utf-8") as f:
+        f.write(contenido)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta_temporal, ruta_snapshot)
+
+
+def _ids_creados(registro: dict) -> List[int]:
+    """
+    Devuelve los IDs de laureado asignados por una entrada de alta (o por las altas de un lote).
+    """
+    if registro["op"] == "batch":
+        return [i for operacion in registro["ops"] for i in _ids_creados(operacion)]
+    if registro["op"] == "create":
+        return [l.get("id") or 0 for l in registro["prize"].get("laureates", [])]
+    return []
+
+
+class AplicadorJournal:
+    """
+    Aplica entradas del journal sobre los datos en memoria.
+
+    Las posiciones de cada (año, categoría normalizada) en la lista de premios se indexan una sola vez,
+    de modo que cada entrada se aplica sin recorrer todo el dataset. Las bajas dejan su lugar vacío y
+    la lista se compacta una sola vez en `terminar`, conservando el orden de los premios.
+
+    Un lote (`batch`) se guarda como una única entrada con sus operaciones en orden, de modo que una
+    caída durante la escritura lo descarta completo en lugar de dejarlo aplicado a medias.
+    """
+
+    def __init__(self, datos_nobel: DatosPremios):
+        self.premios: List[Optional[RegistroPremio]] = datos_nobel.prizes
+        self.posiciones: Dict[Tuple[int, str], List[int]] = defaultdict(list)
+        for posicion, premio in enumerate(self.premios):
+            self.posiciones[(premio.year, normalizar_categoria(premio.category))].append(posicion)
+        self.bajas = 0
+
+    def aplicar(self, registro: dict):
+        op = registro["op"]
+        if op == "batch":
+            for operacion in registro["ops"]:
+                self.aplicar(operacion)
+        elif op == "create":
+            premio = premio_desde_dict(registro["prize"])
+            self.posiciones[(premio.year, normalizar_categoria(premio.category))].append(len(self.premios))
+            self.premios.append(premio)
+        elif op == "put":
+            posiciones = self.posiciones.get((registro["year"], normalizar_categoria(registro["category"])))
+            if posiciones:
+                self.premios[posiciones[0]] = premio_desde_dict(registro["prize"])
+        elif op == "delete":
+            clave = (registro["year"], normalizar_categoria(registro["category"]))
+            posiciones = self.posiciones.get(clave)
+            if posiciones:
+                self.premios[posiciones.pop(0)] = None
+                self.bajas += 1
+                if not posiciones:
+                    del self.posiciones[clave]
+        else:
+            raise ValueError(f"Operación desconocida en el journal: {op}")
+
+    def terminar(self):
+        """
+        Quita de la lista los lugares que dejaron las bajas.
+        """
+        if self.bajas:
+            self.premios[:] = [premio for premio in self.premios if premio is not None]
+            self.bajas = 0
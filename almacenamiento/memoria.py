@@ -0,0 +1,384 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from almacenamiento.base import AlmacenPremios, error_en_lote, laureado_no_encontrado, premio_no_encontrado
+from almacenamiento.busqueda import IndiceTexto
+from almacenamiento.cambios import AvisoVersion, HistorialCambios
+from almacenamiento.escritor import EscritorJournal
+from almacenamiento.estadisticas import EstadisticasPremios
+from almacenamiento.indices import IndicePremios
+from almacenamiento.journal import Journal
+from almacenamiento.registros import DatosPremios, RegistroPremio, premio_a_dict, premio_desde_modelo
+from comun.metricas import Metrica
+from modelos.api_bd.modelos_bd import LaureatePrize, LaureateResponse, Prize, PrizeBatchUpdate, PrizeKey, PrizeUpdate
+
+
+class Instantanea:
+    """
+    Versión inmutable de la lista de premios, con la posición de cada uno en una lista paralela.
+
+    Ni las listas ni los registros que contienen se modifican después de publicarse: cada mutación
+    publica una instantánea nueva, de modo que quien tenga una puede recorrerla en varios pasos sin ver
+    cambios posteriores ni estados intermedios.
+    """
+    __slots__ = ("version", "premios", "posiciones")
+
+    def __init__(self, version: int, premios: List[RegistroPremio], posiciones: List[int]):
+        self.version = version
+        self.premios = premios
+        self.posiciones = posiciones
+
+    def pagina(self, desde: int, limite: int) -> Tuple[List[RegistroPremio], Optional[int]]:
+        inicio = bisect_right(self.posiciones, desde)
+        pagina = self.premios[inicio:inicio + limite]
+        hay_mas = inicio + limite < len(self.premios)
+        return pagina, self.posiciones[inicio + limite - 1] if pagina and hay_mas else None
+
+    def indice_de(self, posicion: int) -> int:
+        return bisect_left(self.posiciones, posicion)
+
+
+class AlmacenMemoria(AlmacenPremios):
+    """
+    Almacenamiento en memoria de un solo proceso, persistido con snapshot JSON + journal.
+
+    Los datos viven como registros compactos con índices secundarios; cada mutación se encola en el
+    escritor del journal. No debe usarse con varios workers, porque cada proceso tendría su copia.
+    Con `snapshot_binario`, cada compactación escribe además la copia binaria del snapshot.
+
+    Las lecturas usan la `Instantanea` vigente sin bloquearse. Las mutaciones no modifican los
+    registros publicados (copy-on-write): validan todo, construyen las versiones nuevas de los premios
+    y las publican junto con una lista nueva en un único paso sincrónico, sin ceder el event loop, por
+    lo que ninguna lectura ve un cambio aplicado a medias. Copiar la lista cuesta O(n) punteros por
+    mutación (o por lote), mucho menos que serializar una respuesta.
+
+    La versión coincide con la secuencia del journal, por lo que sigue creciendo entre reinicios; el
+    historial de cambios guarda en memoria las últimas `historial_cambios` mutaciones.
+
+    Las mutaciones se publican antes de llegar a disco. Si el journal no puede escribirse, se vuelve a
+    publicar la última instantánea durable (con una versión nueva, para invalidar las cachés), se
+    vacía el historial de cambios y el almacenamiento pasa a solo lectura hasta reiniciarse.
+    """
+
+    def __init__(self, datos_nobel: DatosPremios, metadatos: dict, ruta_snapshot: str, ruta_journal: str,
+                 sincronizar: bool, ventana: float, compactar_cada: int, esperar_durabilidad: bool,
+                 snapshot_binario: bool = False, historial_cambios: int = 10000):
+        self.ruta_snapshot = ruta_snapshot
+        self.snapshot_binario = snapshot_binario
+        self.journal = Journal(ruta_journal, sincronizar=sincronizar)
+        aplicadas = self.journal.reproducir(datos_nobel, metadatos.get("journal_seq", 0))
+        print(f"Se reprodujeron {aplicadas} entradas del journal.")
+
+        ultimo_id_laureado = max(metadatos.get("ultimo_id_laureado", 0), self.journal.ultimo_id_reproducido)
+        self.indice = IndicePremios(datos_nobel.prizes, ultimo_id_laureado)
+        # El índice de texto se completa en segundo plano después del arranque
+        self.texto = IndiceTexto(datos_nobel.prizes, diferir=True)
+        self._tarea_texto: Optional[asyncio.Task] = None
+        # Los agregados se calculan en la primera consulta, para no alargar el arranque
+        self._estadisticas: Optional[EstadisticasPremios] = None
+        # Las posiciones se asignan en el orden de la lista, que es el mismo en que el diccionario las guarda
+        self._actual = Instantanea(self.journal.seq, datos_nobel.prizes, list(self.indice.posiciones.values()))
+        self.cambios = HistorialCambios(historial_cambios)
+        self._aviso = AvisoVersion()
+        # Última instantánea cuyas mutaciones están todas en disco
+        self._durable = self._actual
+        self.escritor = EscritorJournal(self.journal, ruta_snapshot, self.todos, ventana,
+                                        compactar_cada, esperar_durabilidad, self.metadatos_snapshot, snapshot_binario,
+                                        self.instantanea, self._marcar_durable, self._revertir)
+
+    async def iniciar(self):
+        self.escritor.iniciar()
+        self._tarea_texto = asyncio.create_task(self.texto.indexar_en_segundo_plano())
+
+    async def cerrar(self):
+        if self._tarea_texto is not None:
+            self._tarea_texto.cancel()
+        await self.escritor.detener()
+        # Tras un error se compacta igual, para que las entradas revertidas que hayan llegado al journal
+        # no se reproduzcan al reiniciar
+        if self.journal.registros_pendientes or self.escritor.error is not None:
+            self.journal.compactar(self.todos(), self.ruta_snapshot, self.snapshot_binario,
+                                   **self.metadatos_snapshot())
+        self.journal.cerrar()
+
+    def metadatos_snapshot(self) -> dict:
+        """
+        Devuelve los metadatos que se guardan en el encabezado del snapshot al compactar.
+        """
+        return {"ultimo_id_laureado": self.indice.ultimo_id_laureado}
+
+    def version(self) -> int:
+        return self._actual.version
+
+    def instantanea(self) -> Instantanea:
+        return self._actual
+
+    def todos(self) -> DatosPremios:
+        return DatosPremios(self._actual.premios)
+
+    def cantidad(self) -> int:
+        return len(self._actual.premios)
+
+    def metricas(self) -> List[Metrica]:
+        return [*super().metricas(), self.escritor.duracion, self.escritor.bytes_escritos]
+
+    def estadisticas(self) -> dict:
+        if self._estadisticas is None:
+            self._estadisticas = EstadisticasPremios(self._actual.premios)
+        return self._estadisticas.a_dict()
+
+    def cambios_desde(self, version: int, limite: int) -> Optional[List[dict]]:
+        return self.cambios.desde(version, self._actual.version, limite)
+
+    async def esperar_cambios(self, version: int, timeout: float) -> bool:
+        return await self._aviso.esperar(self.version, version, timeout)
+
+    def pagina(self, desde: int, limite: int) -> Tuple[List[RegistroPremio], Optional[int]]:
+        return self._actual.pagina(desde, limite)
+
+    def por_anio(self, year: int) -> List[RegistroPremio]:
+        return self.indice.buscar_por_anio(year)
+
+    def por_anio_y_categoria(self, year: int, category: str) -> List[RegistroPremio]:
+        return self.indice.buscar_por_anio_y_categoria(year, category)
+
+    def por_rango(self, desde: Optional[int], hasta: Optional[int], category: Optional[str] = None,
+                  con_laureados: Optional[bool] = None) -> List[RegistroPremio]:
+        premios = self.indice.buscar_por_rango(desde, hasta, category)
+        if con_laureados is None:
+            return list(premios)
+        return [premio for premio in premios if bool(premio.laureates) == con_laureados]
+
+    def buscar(self, consulta: str, limite: int) -> List[RegistroPremio]:
+        return self.texto.buscar(consulta, limite, self.indice.posiciones)
+
+    def laureado(self, laureate_id: int) -> Optional[LaureateResponse]:
+        apariciones = self.indice.buscar_laureado(laureate_id)
+        if not apariciones:
+            return None
+
+        # Un laureado puede tener varios premios; los datos personales se toman de la primera aparición
+        laureado = apariciones[0][1]
+        return LaureateResponse(
+            id=laureate_id, firstname=laureado.firstname, surname=laureado.surname,
+            prizes=[LaureatePrize(year=p.year, category=p.category, motivation=l.motivation, share=l.share)
+                    for p, l in apariciones],
+        )
+
+    async def actualizar(self, year: int, category: str, prize_update: PrizeUpdate) -> RegistroPremio:
+        premio, cambios = self._validar_actualizacion(self.indice.primero(year, category), prize_update)
+        nuevo = _premio_actualizado(premio, prize_update, cambios)
+        self._publicar(reemplazos={id(premio): (premio, nuevo)})
+
+        await self._persistir(**self._registro_put(nuevo))
+        return nuevo
+
+    async def eliminar(self, year: int, category: str):
+        premio = self.indice.primero(year, category)
+
+        if not premio:
+            raise premio_no_encontrado()
+
+        self._publicar(quitados=[premio])
+
+        await self._persistir("delete", year=premio.year, category=premio.category)
+
+    async def crear(self, prize: Prize) -> RegistroPremio:
+        nuevo_premio = self._nuevo_premio(prize)
+        self._publicar(nuevos=[nuevo_premio])
+
+        await self._persistir("create", prize=premio_a_dict(nuevo_premio))
+        return nuevo_premio
+
+    async def actualizar_lote(self, cambios: List[PrizeBatchUpdate]) -> List[RegistroPremio]:
+        # Se resuelven y validan todos los elementos antes de construir las versiones nuevas
+        validados = []
+        for i, cambio in enumerate(cambios):
+            try:
+                validados.append(self._validar_actualizacion(self.indice.primero(cambio.year, cambio.category), cambio))
+            except HTTPException as e:
+                raise error_en_lote(i, e)
+
+        # Un mismo premio puede modificarse varias veces en el lote; cada cambio parte del resultado del anterior
+        reemplazos: Dict[int, Tuple[RegistroPremio, RegistroPremio]] = {}
+        actualizados = []
+        for (premio, cambios_laureados), cambio in zip(validados, cambios):
+            _, actual = reemplazos.get(id(premio), (premio, premio))
+            nuevo = _premio_actualizado(actual, cambio, cambios_laureados)
+            reemplazos[id(premio)] = (premio, nuevo)
+            actualizados.append(id(premio))
+        self._publicar(reemplazos=reemplazos)
+
+        await self._persistir("batch", ops=[self._registro_put(nuevo) for _, nuevo in reemplazos.values()])
+        return [reemplazos[clave][1] for clave in actualizados]
+
+    async def eliminar_lote(self, claves: List[PrizeKey]):
+        # Cada clave elimina el primer premio que coincide y que no fue elegido por una clave anterior,
+        # igual que si las eliminaciones se hicieran de a una
+        elegidos = {}
+        for i, clave in enumerate(claves):
+            premio = next((p for p in self.indice.buscar_por_anio_y_categoria(clave.year, clave.category)
+                           if id(p) not in elegidos), None)
+            if premio is None:
+                raise error_en_lote(i, premio_no_encontrado())
+            elegidos[id(premio)] = premio
+
+        self._publicar(quitados=elegidos.values())
+
+        await self._persistir("batch", ops=[{"op": "delete", "year": p.year, "category": p.category}
+                                            for p in elegidos.values()])
+
+    async def crear_lote(self, prizes: List[Prize]) -> List[RegistroPremio]:
+        nuevos_premios = [self._nuevo_premio(prize) for prize in prizes]
+        self._publicar(nuevos=nuevos_premios)
+
+        await self._persistir("batch", ops=[{"op": "create", "prize": premio_a_dict(p)} for p in nuevos_premios])
+        return nuevos_premios
+
+    def _validar_actualizacion(self, premio: Optional[RegistroPremio],
+                               prize_update: PrizeUpdate) -> Tuple[RegistroPremio, list]:
+        """
+        Verifica que el premio y todos los laureados a modificar existan, sin modificar nada.
+
+        Retorna:
+            Tuple[RegistroPremio, list]: El premio y los pares (índice del laureado, atributos a asignar).
+        """
+        if not premio:
+            raise premio_no_encontrado()
+
+        cambios = []
+        for laureate_update in prize_update.laureates or []:
+            laureate = self.indice.laureado_en_premio(premio, laureate_update.id)
+            if not laureate:
+                raise laureado_no_encontrado(laureate_update.id)
+            indice = next(i for i, l in enumerate(premio.laureates) if l is laureate)
+            cambios.append((indice, laureate_update.model_dump(exclude_unset=True)))
+        return premio, cambios
+
+    @staticmethod
+    def _registro_put(premio: RegistroPremio) -> dict:
+        return {"op": "put", "year": premio.year, "category": premio.category,
+                "prize": premio_a_dict(premio)}
+
+    def _nuevo_premio(self, prize: Prize) -> RegistroPremio:
+        nuevo_premio = premio_desde_modelo(prize)
+
+        # Asignamos IDs secuenciales a los nuevos laureados a partir del contador del índice
+        for laureado in nuevo_premio.laureates:
+            laureado.id = self.indice.asignar_id_laureado()
+        return nuevo_premio
+
+    def _publicar(self, reemplazos: Optional[Dict[int, Tuple[RegistroPremio, RegistroPremio]]] = None,
+                  quitados: Iterable[RegistroPremio] = (), nuevos: Iterable[RegistroPremio] = ()):
+        """
+        Construye y publica la instantánea siguiente y actualiza los índices, todo sin ceder el event loop.
+
+        Si una escritura anterior del journal falló, lanza HTTPException 503 sin modificar nada.
+
+        Parámetros:
+            reemplazos (Dict): Pares (premio publicado, versión nueva) por `id` del premio publicado.
+            quitados (Iterable[RegistroPremio]): Premios publicados que se eliminan.
+            nuevos (Iterable[RegistroPremio]): Premios que se agregan al final.
+        """
+        if self.escritor.error is not None:
+            raise HTTPException(status_code=503, detail=f"El almacenamiento está en modo solo lectura: no se pudo "
+                                                        f"escribir el journal ({str(self.escritor.error)}).")
+        actual = self._actual
+        estadisticas = self._estadisticas
+        premios, posiciones = list(actual.premios), list(actual.posiciones)
+
+        for viejo, nuevo in (reemplazos or {}).values():
+            premios[actual.indice_de(self.indice.posicion(viejo))] = nuevo
+            self.indice.reemplazar(viejo, nuevo)
+            self.texto.reemplazar(viejo, nuevo)
+            if estadisticas is not None:
+                estadisticas.reemplazar(viejo, nuevo)
+
+        indices_quitados = sorted(actual.indice_de(self.indice.posicion(premio)) for premio in quitados)
+        if indices_quitados:
+            premios, posiciones = _sin_indices(premios, indices_quitados), _sin_indices(posiciones, indices_quitados)
+            for i in indices_quitados:
+                self.indice.quitar(actual.premios[i])
+                self.texto.quitar(actual.premios[i])
+                if estadisticas is not None:
+                    estadisticas.quitar(actual.premios[i])
+
+        for nuevo in nuevos:
+            self.indice.agregar(nuevo)
+            self.texto.agregar(nuevo)
+            if estadisticas is not None:
+                estadisticas.agregar(nuevo)
+            premios.append(nuevo)
+            posiciones.append(self.indice.posicion(nuevo))
+
+        self._actual = Instantanea(actual.version + 1, premios, posiciones)
+
+    def _marcar_durable(self, instantanea: Instantanea):
+        if instantanea.version > self._durable.version:
+            self._durable = instantanea
+
+    def _revertir(self, error: Exception):
+        """
+        Vuelve a la última instantánea durable después de un error al escribir el journal.
+
+        Los índices se reconstruyen desde sus premios; las posiciones (y los cursores de paginación)
+        cambian. Se publica con una versión nueva y se vacía el historial de cambios, de modo que las
+        cachés y quienes siguen el feed de `/changes` descarten lo que vieron de las mutaciones perdidas.
+        """
+        premios = self._durable.premios
+        print(f"Revirtiendo a la versión durable {self._durable.version} de {self._actual.version} "
+              f"tras el error del journal: {str(error)}")
+        self.indice = IndicePremios(premios, self.indice.ultimo_id_laureado)
+        if self._tarea_texto is not None:
+            self._tarea_texto.cancel()
+        self.texto = IndiceTexto(premios, diferir=True)
+        self._tarea_texto = asyncio.create_task(self.texto.indexar_en_segundo_plano())
+        self._estadisticas = None
+        self._actual = Instantanea(self._actual.version + 1, premios, list(self.indice.posiciones.values()))
+        self.cambios.vaciar()
+        self._aviso.avisar()
+
+    async def _persistir(self, op: str, **campos):
+        """
+        Persiste una mutación encolándola en el escritor del journal y la publica en el historial de cambios.
+
+        La escritura a disco se hace en segundo plano, agrupada con las demás mutaciones de la misma
+        ventana. Si el escritor espera la durabilidad, se espera a que la entrada esté en disco.
+        """
+        self.cambios.agregar({"version": self._actual.version, "op": op, **campos})
+        self._aviso.avisar()
+        confirmacion = self.escritor.encolar(op, **campos)
+        if confirmacion is not None:
+            try:
+                await confirmacion
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"No se pudo persistir el cambio: {str(e)}")
+
+
+def _premio_actualizado(premio: RegistroPremio, prize_update: PrizeUpdate, cambios: list) -> RegistroPremio:
+    """
+    Devuelve una copia del premio con los cambios aplicados; los laureados sin cambios se comparten.
+    """
+    laureados = list(premio.laureates)
+    for indice, atributos in cambios:
+        laureados[indice] = replace(laureados[indice], **atributos)
+    overall_motivation = prize_update.overallMotivation
+    return RegistroPremio(premio.year, premio.category, laureados,
+                          overall_motivation if overall_motivation is not None else premio.overallMotivation)
+
+
+def _sin_indices(valores: list, indices: List[int]) -> list:
+    """
+    Copia la lista sin los elementos de los índices dados (ordenados), copiando por tramos.
+    """
+    resultado = []
+    inicio = 0
+    for i in indices:
+        resultado.extend(valores[inicio:i])
+        inicio = i + 1
+    resultado.extend(valores[inicio:])
+    return resultado
@@ -0,0 +1,81 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as ErrorBase64
+from typing import AsyncIterator, FrozenSet, List, Optional
+
+from fastapi import HTTPException
+
+from almacenamiento.base import AlmacenPremios
+from almacenamiento.cache_respuestas import adaptador_premios
+from almacenamiento.registros import RegistroPremio, adaptador_premio
+
+CAMPOS_PREMIO = ("year", "category", "laureates", "overallMotivation")
+
+
+def codificar_cursor(posicion: int) -> str:
+    return urlsafe_b64encode(str(posicion).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str]) -> int:
+    """
+    Decodifica un cursor de paginación opaco. Lanza HTTPException 400 si no es válido.
+    """
+    if not cursor:
+        return 0
+    try:
+        return int(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ErrorBase64, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido.")
+
+
+def parsear_campos(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    Convierte el parámetro `fields` (separado por comas) en el conjunto de campos a devolver.
+    """
+    if not fields:
+        return None
+    campos = frozenset(campo.strip() for campo in fields.split(",") if campo.strip())
+    desconocidos = campos.difference(CAMPOS_PREMIO)
+    if desconocidos:
+        raise HTTPException(status_code=400,
+                            detail=f"Campos desconocidos: {', '.join(sorted(desconocidos))}. "
+                                   f"Campos válidos: {', '.join(CAMPOS_PREMIO)}")
+    return campos
+
+
+def serializar_premios(premios: List[RegistroPremio], campos: Optional[FrozenSet[str]]) -> bytes:
+    """
+    Codifica una lista de premios como arreglo JSON, proyectando solo los campos pedidos.
+    """
+    incluir = {"__all__": set(campos)} if campos else None
+    return adaptador_premios.dump_json(premios, include=incluir, exclude_none=True)
+
+
+def serializar_pagina(premios: List[RegistroPremio], siguiente: Optional[int],
+                      campos: Optional[FrozenSet[str]]) -> bytes:
+    """
+    Codifica una página del listado como `{"prizes": [...], "next_cursor": ...}`.
+    """
+    next_cursor = json.dumps(codificar_cursor(siguiente) if siguiente is not None else None)
+    return b'{"prizes":' + serializar_premios(premios, campos) + b',"next_cursor":' + next_cursor.encode() + b"}"
+
+
+async def lineas_ndjson(almacen: AlmacenPremios, desde: int, limite: Optional[int],
+                        campos: Optional[FrozenSet[str]], tamanio_lote: int) -> AsyncIterator[bytes]:
+    """
+    Genera los premios como NDJSON (un objeto JSON por línea), leyendo el almacenamiento por lotes.
+
+    Cada lote se pide por posición, por lo que la memoria usada es proporcional al tamaño del lote y
+    no al del dataset, y el primer byte se envía sin esperar a serializar todo. Los lotes se leen de
+    la instantánea tomada al empezar, para no mezclar versiones si hay mutaciones durante el envío.
+    """
+    incluir = set(campos) if campos else None
+    vista = almacen.instantanea()
+    restantes = limite
+    while desde is not None and restantes != 0:
+        lote = tamanio_lote if restantes is None else min(tamanio_lote, restantes)
+        premios, desde = vista.pagina(desde, lote)
+        if restantes is not None:
+            restantes -= len(premios)
+        yield b"".join(adaptador_premio.dump_json(premio, include=incluir, exclude_none=True) + b"\n"
+                       for premio in premios)
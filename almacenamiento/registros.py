@@ -0,0 +1,83 @@
+import sys
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from pydantic import TypeAdapter
+
+from modelos.api_bd.modelos_bd import Prize
+
+
+@dataclass(slots=True, eq=False)
+class RegistroLaureado:
+    """
+    Representación interna y compacta de un laureado.
+
+    Tiene los mismos campos que `Laureate`, pero sin el diccionario por instancia ni el estado interno
+    de Pydantic. El `share` se interna porque se repite en casi todos los registros.
+    """
+    id: Optional[int] = None
+    firstname: Optional[str] = None
+    surname: Optional[str] = None
+    motivation: Optional[str] = None
+    share: Optional[str] = None
+
+    def __post_init__(self):
+        if self.share is not None:
+            self.share = sys.intern(self.share)
+
+
+@dataclass(slots=True, eq=False)
+class RegistroPremio:
+    """
+    Representación interna y compacta de un premio, con la categoría internada.
+
+    Los modelos de Pydantic (`Prize`, `Laureate`) se usan solo en el borde HTTP; el almacenamiento y
+    los índices trabajan con estos registros, que se comparan por identidad igual que antes.
+    """
+    year: int
+    category: str
+    laureates: List[RegistroLaureado] = field(default_factory=list)
+    overallMotivation: Optional[str] = None
+
+    def __post_init__(self):
+        self.category = sys.intern(self.category)
+
+
+@dataclass(slots=True, eq=False)
+class DatosPremios:
+    prizes: List[RegistroPremio] = field(default_factory=list)
+
+
+# Validan y serializan los registros directamente en pydantic-core, sin crear modelos intermedios
+adaptador_datos = TypeAdapter(DatosPremios)
+adaptador_premio = TypeAdapter(RegistroPremio)
+
+
+def premio_desde_modelo(prize: Prize) -> RegistroPremio:
+    """
+    Convierte un `Prize` ya validado en el borde HTTP en su registro interno.
+    """
+    return RegistroPremio(
+        year=prize.year, category=prize.category, overallMotivation=prize.overallMotivation,
+        laureates=[RegistroLaureado(id=l.id, firstname=l.firstname, surname=l.surname, motivation=l.motivation,
+                                    share=l.share) for l in prize.laureates])
+
+
+def premio_desde_dict(datos: dict) -> RegistroPremio:
+    """
+    Crea un registro desde un diccionario escrito por este mismo servicio (journal), sin validarlo.
+    """
+    return RegistroPremio(
+        year=datos["year"], category=datos["category"], overallMotivation=datos.get("overallMotivation"),
+        laureates=[RegistroLaureado(**laureado) for laureado in datos.get("laureates", ())])
+
+
+def premio_a_dict(premio: RegistroPremio) -> dict:
+    """
+    Devuelve el premio como diccionario sin campos nulos, igual que `Prize.model_dump(exclude_none=True)`.
+    """
+    return adaptador_premio.dump_python(premio, exclude_none=True)
+
+
+def premio_a_modelo(premio: RegistroPremio) -> Prize:
+    return Prize.model_validate(premio, from_attributes=True)
@@ -0,0 +1,93 @@
+import marshal
+import os
+import struct
+from hashlib import blake2b
+from typing import Optional, Tuple
+
+from almacenamiento.registros import DatosPremios, RegistroLaureado, RegistroPremio
+
+# Identifica el formato; incluye la versión de marshal porque el contenido depende de ella
+MAGIA = b"NOBELBIN1" + bytes([marshal.version])
+# Tamaño y fecha de modificación del snapshot JSON del que es copia el binario
+_HUELLA = struct.Struct("<QQ")
+_TAMANIO_CHECKSUM = 32
+
+
+def ruta_binaria(ruta_snapshot: str) -> str:
+    """
+    Devuelve la ruta del snapshot binario que acompaña al snapshot JSON dado.
+    """
+    return os.path.splitext(ruta_snapshot)[0] + ".bin"
+
+
+def serializar_binario(datos_nobel: DatosPremios, **metadatos) -> bytes:
+    """
+    Codifica los premios como tuplas de valores simples con marshal, sin pasar por JSON ni por Pydantic.
+    """
+    premios = tuple(
+        (p.year, p.category, p.overallMotivation,
+         tuple((l.id, l.firstname, l.surname, l.motivation, l.share) for l in p.laureates))
+        for p in datos_nobel.prizes)
+    return marshal.dumps((metadatos, premios))
+
+
+def escribir_snapshot_binario(contenido: bytes, ruta_snapshot: str):
+    """
+    Escribe el snapshot binario junto al JSON, con reemplazo atómico.
+
+    El archivo guarda la huella (tamaño y fecha de modificación) del JSON en el momento de escribirse
+    y un checksum de todo el contenido; si el JSON cambia después, el binario deja de usarse.
+    """
+    estado = os.stat(ruta_snapshot)
+    huella = _HUELLA.pack(estado.st_size, estado.st_mtime_ns)
+    checksum = blake2b(huella + contenido, digest_size=_TAMANIO_CHECKSUM).digest()
+
+    ruta = ruta_binaria(ruta_snapshot)
+    ruta_temporal = ruta + ".tmp"
+    with open(ruta_temporal, "wb") as f:
+        f.write(MAGIA + huella + checksum + contenido)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta_temporal, ruta)
+
+
+def leer_snapshot_binario(ruta_snapshot: str) -> Optional[Tuple[DatosPremios, dict]]:
+    """
+    Carga el snapshot binario que acompaña al JSON si existe y es válido.
+
+    Como el contenido fue escrito por este mismo proceso a partir de datos ya validados y el checksum
+    garantiza que no cambió, los registros se construyen directamente, sin validación.
+
+    Retorna:
+        Optional[Tuple[DatosPremios, dict]]: Los datos y los metadatos del snapshot, o None si el
+        binario no existe, está dañado o no corresponde al JSON actual.
+    """
+    ruta = ruta_binaria(ruta_snapshot)
+    try:
+        with open(ruta, "rb") as f:
+            contenido = f.read()
+        estado = os.stat(ruta_snapshot)
+    except FileNotFoundError:
+        return None
+
+    inicio_checksum = len(MAGIA) + _HUELLA.size
+    inicio_datos = inicio_checksum + _TAMANIO_CHECKSUM
+    huella = contenido[len(MAGIA):inicio_checksum]
+    if not contenido.startswith(MAGIA) or len(contenido) < inicio_datos:
+        print(f"Ignorando {ruta}: formato desconocido.")
+        return None
+    if huella != _HUELLA.pack(estado.st_size, estado.st_mtime_ns):
+        print(f"Ignorando {ruta}: no corresponde a {ruta_snapshot}.")
+        return None
+    checksum = blake2b(contenido[len(MAGIA):inicio_checksum], digest_size=_TAMANIO_CHECKSUM)
+    checksum.update(memoryview(contenido)[inicio_datos:])
+    if checksum.digest() != contenido[inicio_checksum:inicio_datos]:
+        print(f"Ignorando {ruta}: el checksum no coincide.")
+        return None
+
+    metadatos, premios = marshal.loads(memoryview(contenido)[inicio_datos:])
+    datos_nobel = DatosPremios([
+        RegistroPremio(year, category, [RegistroLaureado(*laureado) for laureado in laureados], overall_motivation)
+        for year, category, overall_motivation, laureados in premios
+    ])
+    return datos_nobel, metadatos
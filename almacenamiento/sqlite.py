@@ -0,0 +1,483 @@
+import asyncio
+import json
+import sqlite3
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from almacenamiento.base import AlmacenPremios, error_en_lote, laureado_no_encontrado, premio_no_encontrado
+from almacenamiento.busqueda import PESO_MOTIVACION, PESO_NOMBRE, tokenizar
+from almacenamiento.cambios import AvisoVersion
+from almacenamiento.estadisticas import EstadisticasPremios
+from almacenamiento.indices import normalizar_categoria
+from almacenamiento.registros import (DatosPremios, RegistroLaureado, RegistroPremio, premio_a_dict,
+                                      premio_desde_modelo)
+from comun.metricas import Histograma, Metrica
+from modelos.api_bd.modelos_bd import LaureatePrize, LaureateResponse, Prize, PrizeBatchUpdate, PrizeKey, PrizeUpdate
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS prizes (
+    id INTEGER PRIMARY KEY,
+    year INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    category_norm TEXT NOT NULL,
+    overall_motivation TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_prizes_year_category ON prizes (year, category_norm);
+CREATE INDEX IF NOT EXISTS idx_prizes_category_year ON prizes (category_norm, year);
+
+CREATE TABLE IF NOT EXISTS laureates (
+    fila INTEGER PRIMARY KEY,
+    prize_id INTEGER NOT NULL REFERENCES prizes (id) ON DELETE CASCADE,
+    posicion INTEGER NOT NULL,
+    id INTEGER,
+    firstname TEXT,
+    surname TEXT,
+    motivation TEXT,
+    share TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_laureates_prize ON laureates (prize_id, posicion);
+CREATE INDEX IF NOT EXISTS idx_laureates_id ON laureates (id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS busqueda USING fts5 (
+    nombres,
+    motivaciones,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS estadisticas (
+    grupo TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    valor INTEGER NOT NULL,
+    PRIMARY KEY (grupo, clave)
+);
+
+CREATE TABLE IF NOT EXISTS cambios (
+    version INTEGER PRIMARY KEY,
+    cambio TEXT NOT NULL
+);
+"""
+
+COLUMNAS_LAUREADO = ("id", "firstname", "surname", "motivation", "share")
+
+# Documento de búsqueda de cada premio (rowid = ID del premio); se completa con un filtro sobre `p`
+INDEXAR_TEXTO = """
+INSERT INTO busqueda (rowid, nombres, motivaciones)
+SELECT p.id,
+       (SELECT group_concat(COALESCE(firstname, '') || ' ' || COALESCE(surname, ''), ' ')
+        FROM laureates WHERE prize_id = p.id),
+       COALESCE(p.overall_motivation, '') || ' ' ||
+       COALESCE((SELECT group_concat(motivation, ' ') FROM laureates WHERE prize_id = p.id), '')
+FROM prizes p
+"""
+
+
+class AlmacenSQLite(AlmacenPremios):
+    """
+    Almacenamiento en SQLite (modo WAL), compartido por todos los workers de uvicorn.
+
+    Las lecturas usan una conexión propia y se resuelven con consultas indexadas por año,
+    categoría e ID de laureado. Las que necesitan varias consultas (premios y luego sus laureados) las
+    hacen dentro de una transacción de lectura: en modo WAL todas ven la misma versión de la base sin
+    bloquear ni ser bloqueadas por la escritura en curso.
+
+    Las mutaciones se ejecutan en un hilo aparte, de a una por proceso, dentro de una transacción que
+    además incrementa la versión global guardada en la tabla `meta`, de modo que las cachés de todos
+    los workers se invalidan juntas.
+
+    Si la base está vacía, se importan la primera vez los datos devueltos por `cargar_datos`, junto con
+    el último id de laureado asignado (que puede ser mayor al de los laureados existentes).
+
+    La búsqueda de texto usa una tabla FTS5 con un documento por premio, que se actualiza dentro de la
+    misma transacción que cada mutación y se reconstruye al iniciar si no coincide con los premios.
+    Lo mismo ocurre con la tabla `estadisticas`: cada transacción le suma la diferencia que producen
+    sus mutaciones en los agregados.
+
+    Cada transacción guarda también su cambio, con el formato del journal del almacenamiento en memoria,
+    en la tabla `cambios`, que conserva los últimos `historial_cambios`. Como las mutaciones pueden
+    venir de otros workers, la espera de cambios además consulta la versión cada `sondeo_cambios` segundos.
+    """
+
+    def __init__(self, ruta: str, cargar_datos: Callable[[], Tuple[DatosPremios, int]], timeout: float = 30.0,
+                 historial_cambios: int = 10000, sondeo_cambios: float = 0.5):
+        self.ruta = ruta
+        self.cargar_datos = cargar_datos
+        self.timeout = timeout
+        self._lectura: Optional[sqlite3.Connection] = None
+        self._escritura: Optional[sqlite3.Connection] = None
+        self._lock_escritura = asyncio.Lock()
+        # Diferencia en los agregados que acumulan las mutaciones de la transacción en curso
+        self._diferencia = EstadisticasPremios()
+        # Entradas (con el formato del journal) de las mutaciones de la transacción en curso
+        self._registros: List[dict] = []
+        self.historial_cambios = historial_cambios
+        self.sondeo_cambios = sondeo_cambios
+        self._aviso = AvisoVersion()
+        self.duracion_escritura = Histograma("persistencia_duracion_segundos",
+                                             "Duración de cada transacción de escritura.", ("operacion",))
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.ruta, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.execute("PRAGMA foreign_keys=ON")
+        return conexion
+
+    async def iniciar(self):
+        self._escritura = self._conectar()
+        self._lectura = self._conectar()
+        await asyncio.to_thread(self._inicializar)
+
+    async def cerrar(self):
+        for conexion in (self._lectura, self._escritura):
+            if conexion is not None:
+                conexion.close()
+
+    def _inicializar(self):
+        conexion = self._escritura
+        conexion.executescript(ESQUEMA)
+        # BEGIN IMMEDIATE serializa la importación entre workers que arrancan a la vez
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            if conexion.execute("SELECT 1 FROM meta WHERE clave = 'version'").fetchone() is None:
+                print(f"Importando datos en {self.ruta}...")
+                datos_nobel, ultimo_id_importado = self.cargar_datos()
+                for premio in datos_nobel.prizes:
+                    self._insertar_premio(conexion, premio)
+                ultimo_id = conexion.execute("SELECT COALESCE(MAX(id), 0) FROM laureates").fetchone()[0]
+                ultimo_id = max(ultimo_id, ultimo_id_importado)
+                conexion.executemany("INSERT INTO meta (clave, valor) VALUES (?, ?)",
+                                     [("version", 0), ("ultimo_id_laureado", ultimo_id)])
+            documentos = conexion.execute("SELECT COUNT(*) FROM busqueda").fetchone()[0]
+            cantidad = conexion.execute("SELECT COUNT(*) FROM prizes").fetchone()[0]
+            if documentos != cantidad:
+                conexion.execute("DELETE FROM busqueda")
+                conexion.execute(INDEXAR_TEXTO)
+            contados = conexion.execute(
+                "SELECT valor FROM estadisticas WHERE grupo = 'totales' AND clave = 'premios'").fetchone()
+            if (contados[0] if contados else 0) != cantidad:
+                conexion.execute("DELETE FROM estadisticas")
+                self._sumar_estadisticas(conexion, EstadisticasPremios(self._todos(conexion)))
+            conexion.execute("COMMIT")
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def version(self) -> int:
+        return self._lectura.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0]
+
+    def cantidad(self) -> int:
+        return self._lectura.execute("SELECT COUNT(*) FROM prizes").fetchone()[0]
+
+    def cambios_desde(self, version: int, limite: int) -> Optional[List[dict]]:
+        with self._transaccion_lectura() as conexion:
+            actual = conexion.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0]
+            filas = conexion.execute("SELECT version, cambio FROM cambios WHERE version > ? ORDER BY version LIMIT ?",
+                                     (version, limite)).fetchall()
+        # Las versiones son consecutivas: si la primera fila no sigue a `version`, faltan cambios
+        if version > actual or (version < actual and (not filas or filas[0][0] != version + 1)):
+            return None
+        return [json.loads(cambio) for _, cambio in filas]
+
+    async def esperar_cambios(self, version: int, timeout: float) -> bool:
+        return await self._aviso.esperar(self.version, version, timeout, sondeo=self.sondeo_cambios)
+
+    def metricas(self) -> List[Metrica]:
+        return [*super().metricas(), self.duracion_escritura]
+
+    def todos(self) -> DatosPremios:
+        with self._transaccion_lectura() as conexion:
+            return DatosPremios(self._todos(conexion))
+
+    @staticmethod
+    def _todos(conexion: sqlite3.Connection) -> List[RegistroPremio]:
+        filas = conexion.execute("SELECT id, year, category, overall_motivation FROM prizes ORDER BY id").fetchall()
+        laureados = conexion.execute(
+            "SELECT prize_id, id, firstname, surname, motivation, share FROM laureates ORDER BY prize_id, posicion")
+        return _construir_premios(filas, laureados)
+
+    def pagina(self, desde: int, limite: int) -> Tuple[List[RegistroPremio], Optional[int]]:
+        with self._transaccion_lectura() as conexion:
+            filas = conexion.execute(
+                "SELECT id, year, category, overall_motivation FROM prizes WHERE id > ? ORDER BY id LIMIT ?",
+                (desde, limite + 1)).fetchall()
+            siguiente = filas[limite - 1][0] if len(filas) > limite else None
+            return self._completar(filas[:limite]), siguiente
+
+    def por_anio(self, year: int) -> List[RegistroPremio]:
+        with self._transaccion_lectura() as conexion:
+            filas = conexion.execute(
+                "SELECT id, year, category, overall_motivation FROM prizes WHERE year = ? ORDER BY id",
+                (year,)).fetchall()
+            return self._completar(filas)
+
+    def por_anio_y_categoria(self, year: int, category: str) -> List[RegistroPremio]:
+        with self._transaccion_lectura() as conexion:
+            filas = conexion.execute(
+                "SELECT id, year, category, overall_motivation FROM prizes WHERE year = ? AND category_norm = ? "
+                "ORDER BY id", (year, normalizar_categoria(category))).fetchall()
+            return self._completar(filas)
+
+    def por_rango(self, desde: Optional[int], hasta: Optional[int], category: Optional[str] = None,
+                  con_laureados: Optional[bool] = None) -> List[RegistroPremio]:
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append("year >= ?")
+            parametros.append(desde)
+        if hasta is not None:
+            condiciones.append("year <= ?")
+            parametros.append(hasta)
+        if category is not None:
+            condiciones.append("category_norm = ?")
+            parametros.append(normalizar_categoria(category))
+        if con_laureados is not None:
+            condiciones.append(("" if con_laureados else "NOT ") +
+                               "EXISTS (SELECT 1 FROM laureates WHERE prize_id = prizes.id)")
+        donde = f"WHERE {' AND '.join(condiciones)} " if condiciones else ""
+        with self._transaccion_lectura() as conexion:
+            filas = conexion.execute(
+                f"SELECT id, year, category, overall_motivation FROM prizes {donde}ORDER BY year, id",
+                parametros).fetchall()
+            # Los laureados se piden con el mismo filtro en lugar de por ID, porque el rango puede ser grande
+            laureados = conexion.execute(
+                f"SELECT l.prize_id, l.id, l.firstname, l.surname, l.motivation, l.share "
+                f"FROM laureates l JOIN prizes ON prizes.id = l.prize_id {donde}ORDER BY l.prize_id, l.posicion",
+                parametros)
+            return _construir_premios(filas, laureados)
+
+    def buscar(self, consulta: str, limite: int) -> List[RegistroPremio]:
+        terminos = tokenizar(consulta)
+        if not terminos:
+            return []
+        # Cada término se cita y se busca como prefijo; FTS5 exige que aparezcan todos
+        expresion = " ".join(f'"{termino}"*' for termino in terminos)
+        with self._transaccion_lectura() as conexion:
+            filas = conexion.execute(
+                "SELECT p.id, p.year, p.category, p.overall_motivation "
+                "FROM busqueda JOIN prizes p ON p.id = busqueda.rowid "
+                "WHERE busqueda MATCH ? ORDER BY bm25(busqueda, ?, ?), p.id LIMIT ?",
+                (expresion, PESO_NOMBRE, PESO_MOTIVACION, limite)).fetchall()
+            return self._completar(filas)
+
+    def laureado(self, laureate_id: int) -> Optional[LaureateResponse]:
+        filas = self._lectura.execute(
+            "SELECT l.firstname, l.surname, l.motivation, l.share, p.year, p.category "
+            "FROM laureates l JOIN prizes p ON p.id = l.prize_id WHERE l.id = ? ORDER BY p.id, l.posicion",
+            (laureate_id,)).fetchall()
+        if not filas:
+            return None
+
+        firstname, surname = filas[0][0], filas[0][1]
+        return LaureateResponse(
+            id=laureate_id, firstname=firstname, surname=surname,
+            prizes=[LaureatePrize(year=year, category=category, motivation=motivation, share=share)
+                    for _, _, motivation, share, year, category in filas],
+        )
+
+    def estadisticas(self) -> dict:
+        filas = self._lectura.execute("SELECT grupo, clave, valor FROM estadisticas").fetchall()
+        return EstadisticasPremios.desde_filas(filas).a_dict()
+
+    @contextmanager
+    def _transaccion_lectura(self) -> Iterator[sqlite3.Connection]:
+        """
+        Agrupa varias consultas de lectura en una transacción, para que todas vean la misma versión.
+        """
+        self._lectura.execute("BEGIN")
+        try:
+            yield self._lectura
+        finally:
+            self._lectura.execute("COMMIT")
+
+    def _completar(self, filas: list) -> List[RegistroPremio]:
+        if not filas:
+            return []
+        ids = [fila[0] for fila in filas]
+        laureados = self._lectura.execute(
+            f"SELECT prize_id, id, firstname, surname, motivation, share FROM laureates "
+            f"WHERE prize_id IN ({','.join('?' * len(ids))}) ORDER BY prize_id, posicion", ids)
+        return _construir_premios(filas, laureados)
+
+    async def actualizar(self, year: int, category: str, prize_update: PrizeUpdate) -> RegistroPremio:
+        prize_id = await self._escribir(self._actualizar, year, category, prize_update)
+        with self._transaccion_lectura() as conexion:
+            return self._completar(conexion.execute(
+                "SELECT id, year, category, overall_motivation FROM prizes WHERE id = ?", (prize_id,)).fetchall())[0]
+
+    async def eliminar(self, year: int, category: str):
+        await self._escribir(self._eliminar, year, category)
+
+    async def crear(self, prize: Prize) -> RegistroPremio:
+        return await self._escribir(self._crear, prize)
+
+    async def actualizar_lote(self, cambios: List[PrizeBatchUpdate]) -> List[RegistroPremio]:
+        prize_ids = await self._escribir(self._en_lote, self._actualizar,
+                                         [(c.year, c.category, c) for c in cambios])
+        with self._transaccion_lectura() as conexion:
+            filas = conexion.execute(
+                f"SELECT id, year, category, overall_motivation FROM prizes "
+                f"WHERE id IN ({','.join('?' * len(prize_ids))})", prize_ids).fetchall()
+            premios = dict(zip((fila[0] for fila in filas), self._completar(filas)))
+        return [premios[prize_id] for prize_id in prize_ids]
+
+    async def eliminar_lote(self, claves: List[PrizeKey]):
+        await self._escribir(self._en_lote, self._eliminar, [(c.year, c.category) for c in claves])
+
+    async def crear_lote(self, prizes: List[Prize]) -> List[RegistroPremio]:
+        return await self._escribir(self._en_lote, self._crear, [(prize,) for prize in prizes])
+
+    async def _escribir(self, operacion: Callable, *args):
+        """
+        Ejecuta una mutación en un hilo aparte dentro de una transacción que incrementa la versión global.
+        """
+        async with self._lock_escritura:
+            with self.duracion_escritura.medir("sqlite"):
+                resultado = await asyncio.to_thread(self._en_transaccion, operacion, *args)
+        self._aviso.avisar()
+        return resultado
+
+    def _en_transaccion(self, operacion: Callable, *args):
+        conexion = self._escritura
+        self._diferencia = EstadisticasPremios()
+        self._registros = []
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = operacion(conexion, *args)
+            self._sumar_estadisticas(conexion, self._diferencia)
+            conexion.execute("UPDATE meta SET valor = valor + 1 WHERE clave = 'version'")
+            self._guardar_cambio(conexion, operacion is self._en_lote)
+            conexion.execute("COMMIT")
+            return resultado
+        except BaseException:
+            conexion.execute("ROLLBACK")
+            raise
+
+    def _guardar_cambio(self, conexion: sqlite3.Connection, lote: bool):
+        version = conexion.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()[0]
+        registro = {"op": "batch", "ops": self._registros} if lote else self._registros[0]
+        conexion.execute("INSERT INTO cambios (version, cambio) VALUES (?, ?)",
+                         (version, json.dumps({"version": version, **registro}, ensure_ascii=False)))
+        conexion.execute("DELETE FROM cambios WHERE version <= ?", (version - self.historial_cambios,))
+
+    @staticmethod
+    def _en_lote(conexion: sqlite3.Connection, operacion: Callable, argumentos: List[tuple]) -> list:
+        """
+        Aplica una operación a cada elemento del lote dentro de la misma transacción.
+        """
+        resultados = []
+        for i, args in enumerate(argumentos):
+            try:
+                resultados.append(operacion(conexion, *args))
+            except HTTPException as e:
+                raise error_en_lote(i, e)
+        return resultados
+
+    @staticmethod
+    def _buscar_premio(conexion: sqlite3.Connection, year: int, category: str) -> int:
+        fila = conexion.execute(
+            "SELECT id FROM prizes WHERE year = ? AND category_norm = ? ORDER BY id LIMIT 1",
+            (year, normalizar_categoria(category))).fetchone()
+        if fila is None:
+            raise premio_no_encontrado()
+        return fila[0]
+
+    def _actualizar(self, conexion: sqlite3.Connection, year: int, category: str, prize_update: PrizeUpdate) -> int:
+        prize_id = self._buscar_premio(conexion, year, category)
+        self._diferencia.quitar(self._cargar_premio(conexion, prize_id))
+
+        if prize_update.overallMotivation is not None:
+            conexion.execute("UPDATE prizes SET overall_motivation = ? WHERE id = ?",
+                             (prize_update.overallMotivation, prize_id))
+
+        for laureate_update in prize_update.laureates or []:
+            atributos = laureate_update.model_dump(exclude_unset=True)
+            fila = conexion.execute("SELECT fila FROM laureates WHERE prize_id = ? AND id = ? ORDER BY posicion",
+                                    (prize_id, laureate_update.id)).fetchone()
+            if fila is None:
+                raise laureado_no_encontrado(laureate_update.id)
+            columnas = [columna for columna in COLUMNAS_LAUREADO if columna in atributos]
+            if columnas:
+                conexion.execute(
+                    f"UPDATE laureates SET {', '.join(c + ' = ?' for c in columnas)} WHERE fila = ?",
+                    [atributos[c] for c in columnas] + [fila[0]])
+        self._indexar_texto(conexion, prize_id)
+        nuevo = self._cargar_premio(conexion, prize_id)
+        self._diferencia.agregar(nuevo)
+        self._registros.append({"op": "put", "year": nuevo.year, "category": nuevo.category,
+                                "prize": premio_a_dict(nuevo)})
+        return prize_id
+
+    def _eliminar(self, conexion: sqlite3.Connection, year: int, category: str):
+        prize_id = self._buscar_premio(conexion, year, category)
+        premio = self._cargar_premio(conexion, prize_id)
+        self._diferencia.quitar(premio)
+        self._registros.append({"op": "delete", "year": premio.year, "category": premio.category})
+        conexion.execute("DELETE FROM prizes WHERE id = ?", (prize_id,))
+        conexion.execute("DELETE FROM busqueda WHERE rowid = ?", (prize_id,))
+
+    def _crear(self, conexion: sqlite3.Connection, prize: Prize) -> RegistroPremio:
+        nuevo_premio = premio_desde_modelo(prize)
+
+        # Asignamos IDs secuenciales a los nuevos laureados a partir del contador persistente
+        ultimo_id = conexion.execute("SELECT valor FROM meta WHERE clave = 'ultimo_id_laureado'").fetchone()[0]
+        for laureado in nuevo_premio.laureates:
+            ultimo_id += 1
+            laureado.id = ultimo_id
+        conexion.execute("UPDATE meta SET valor = ? WHERE clave = 'ultimo_id_laureado'", (ultimo_id,))
+
+        prize_id = self._insertar_premio(conexion, nuevo_premio)
+        self._indexar_texto(conexion, prize_id)
+        self._diferencia.agregar(nuevo_premio)
+        self._registros.append({"op": "create", "prize": premio_a_dict(nuevo_premio)})
+        return nuevo_premio
+
+    @staticmethod
+    def _cargar_premio(conexion: sqlite3.Connection, prize_id: int) -> RegistroPremio:
+        filas = conexion.execute("SELECT id, year, category, overall_motivation FROM prizes WHERE id = ?",
+                                 (prize_id,)).fetchall()
+        laureados = conexion.execute(
+            "SELECT prize_id, id, firstname, surname, motivation, share FROM laureates WHERE prize_id = ? "
+            "ORDER BY posicion", (prize_id,))
+        return _construir_premios(filas, laureados)[0]
+
+    @staticmethod
+    def _sumar_estadisticas(conexion: sqlite3.Connection, diferencia: EstadisticasPremios):
+        filas = diferencia.filas()
+        conexion.executemany(
+            "INSERT INTO estadisticas (grupo, clave, valor) VALUES (?, ?, ?) "
+            "ON CONFLICT (grupo, clave) DO UPDATE SET valor = valor + excluded.valor", filas)
+        conexion.executemany("DELETE FROM estadisticas WHERE grupo = ? AND clave = ? AND valor = 0",
+                             [(grupo, clave) for grupo, clave, _ in filas])
+
+    @staticmethod
+    def _indexar_texto(conexion: sqlite3.Connection, prize_id: int):
+        conexion.execute("DELETE FROM busqueda WHERE rowid = ?", (prize_id,))
+        conexion.execute(INDEXAR_TEXTO + "WHERE p.id = ?", (prize_id,))
+
+    @staticmethod
+    def _insertar_premio(conexion: sqlite3.Connection, premio: RegistroPremio) -> int:
+        prize_id = conexion.execute(
+            "INSERT INTO prizes (year, category, category_norm, overall_motivation) VALUES (?, ?, ?, ?)",
+            (premio.year, premio.category, normalizar_categoria(premio.category), premio.overallMotivation)
+        ).lastrowid
+        conexion.executemany(
+            "INSERT INTO laureates (prize_id, posicion, id, firstname, surname, motivation, share) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(prize_id, posicion, l.id, l.firstname, l.surname, l.motivation, l.share)
+             for posicion, l in enumerate(premio.laureates)])
+        return prize_id
+
+
+def _construir_premios(filas: list, laureados) -> List[RegistroPremio]:
+    por_premio: Dict[int, List[RegistroLaureado]] = defaultdict(list)
+    for prize_id, *campos in laureados:
+        por_premio[prize_id].append(RegistroLaureado(*campos))
+    return [RegistroPremio(year, category, por_premio.get(prize_id, []), overall_motivation)
+            for prize_id, year, category, overall_motivation in filas]
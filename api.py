@@ -1,47 +1,506 @@
+import asyncio
 import secrets
-from collections import deque
-from datetime import datetime, timedelta
-from typing import Dict, Deque
-
-import requests
-from fastapi import FastAPI, HTTPException, Request, Depends, status
+from contextlib import asynccontextmanager
+from os import getenv
+from time import perf_counter
+from typing import Dict, List, Literal, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from requests.auth import HTTPBasicAuth
+from httpx import BasicAuth as HTTPBasicAuth
+from starlette.background import BackgroundTask
+
+from almacenamiento.cache_respuestas import etag_coincide
+from almacenamiento.cambios import premios_de_cambio
+from almacenamiento.indices import normalizar_categoria
+from comun.balanceo import Backend, PoolUpstream
+from comun.cache_lru import CacheLRU
+from comun.coalescer import LecturasCompartidas
+from comun.compresion import (CODIFICACIONES, IDENTIDAD, MINIMO_BYTES, etag_codificado, etag_sin_codificar, negociar,
+                              transcodificar)
+from comun.limitador import (Limite, LimitadorTasa, cliente_de_peticion, limites_desde_entorno,
+                             respuesta_limite_excedido, rol_de_peticion)
+from comun.metricas import Medidor, MetricasHTTP, RegistroMetricas, plantilla_de_ruta
+from comun.perfilado import ORDENES, Perfilador
+from modelos.api_bd.modelos_bd import PrizeBatchUpdate, PrizeKey, PrizeUpdate, Prize
+
+# Instancias del servidor final: las escrituras van a BASE_URL (el primario) y las lecturas se
+# reparten entre las URLS_LECTURA (separadas por comas; si se omiten, solo el primario). Todas deben
+# servir los mismos datos, por ejemplo varios api_bd sobre la misma base SQLite.
+BASE_URL = getenv("API_BD_URL", "http://localhost:8001")
+URLS_LECTURA = [url.strip() for url in getenv("API_BD_URLS_LECTURA", "").split(",") if url.strip()]
+
+# Salud de las instancias: chequeo activo cada INTERVALO_CHEQUEO segundos (0 lo desactiva) y
+# expulsión durante TIEMPO_EXPULSION segundos tras FALLOS_EXPULSION fallos consecutivos
+INTERVALO_CHEQUEO = float(getenv("API_BD_INTERVALO_CHEQUEO", "5"))
+FALLOS_EXPULSION = int(getenv("API_BD_FALLOS_EXPULSION", "3"))
+TIEMPO_EXPULSION = float(getenv("API_BD_TIEMPO_EXPULSION", "10"))
+RUTA_CHEQUEO = "/health"
+
+# Configuración del pool de conexiones hacia cada instancia de api_bd
+MAX_CONEXIONES = int(getenv("API_BD_MAX_CONEXIONES", "100"))
+MAX_CONEXIONES_KEEPALIVE = int(getenv("API_BD_MAX_CONEXIONES_KEEPALIVE", "20"))
+TIEMPO_KEEPALIVE = float(getenv("API_BD_TIEMPO_KEEPALIVE", "30"))
+
+# Timeouts (en segundos) por llamada al servidor final
+TIMEOUT_CONEXION = float(getenv("API_BD_TIMEOUT_CONEXION", "2"))
+TIMEOUT_LECTURA = float(getenv("API_BD_TIMEOUT_LECTURA", "10"))
+
+# Caché de respuestas de lectura del gateway
+CACHE_TTL = float(getenv("GATEWAY_CACHE_TTL", "30"))
+CACHE_MAX_BYTES = int(getenv("GATEWAY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_MAX_BYTES_ENTRADA = int(getenv("GATEWAY_CACHE_MAX_BYTES_ENTRADA", str(8 * 1024 * 1024)))
+
+# Seguimiento del feed de cambios de api_bd para invalidar la caché también con las mutaciones que no
+# pasan por este gateway (otros gateways o clientes directos)
+SEGUIR_CAMBIOS = getenv("GATEWAY_SEGUIR_CAMBIOS", "1") != "0"
+TIMEOUT_CAMBIOS = float(getenv("GATEWAY_TIMEOUT_CAMBIOS", "10"))
+ESPERA_REINTENTO_CAMBIOS = 1.0
+
+# Métricas expuestas en /metrics; las de la caché y las lecturas compartidas se registran al iniciar
+metricas = RegistroMetricas()
+metricas_http = MetricasHTTP(metricas)
+duracion_upstream = metricas.histograma("upstream_duracion_segundos",
+                                        "Latencia de las llamadas al servidor final por método, ruta del gateway "
+                                        "y código (o `timeout`/`error`).", ("metodo", "ruta", "codigo"))
+
+
+def crear_cliente_http(base_url: str = BASE_URL) -> httpx.AsyncClient:
+    """
+    Crea el cliente HTTP asíncrono compartido hacia una instancia del servidor final.
+
+    El cliente mantiene un pool de conexiones keep-alive, de modo que las peticiones concurrentes
+    reutilizan conexiones TCP en lugar de abrir una nueva por cada solicitud.
+
+    Parámetros:
+        base_url (str): URL de la instancia.
+
+    Retorna:
+        httpx.AsyncClient: Cliente configurado con la URL base, límites del pool y timeouts.
+    """
+    return httpx.AsyncClient(
+        base_url=base_url,
+        limits=httpx.Limits(
+            max_connections=MAX_CONEXIONES,
+            max_keepalive_connections=MAX_CONEXIONES_KEEPALIVE,
+            keepalive_expiry=TIEMPO_KEEPALIVE,
+        ),
+        timeout=httpx.Timeout(TIMEOUT_LECTURA, connect=TIMEOUT_CONEXION),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    pool = PoolUpstream(BASE_URL, URLS_LECTURA, crear_cliente_http, FALLOS_EXPULSION, TIEMPO_EXPULSION)
+    app.state.upstreams = pool
+    app.state.cache_gateway = CacheLRU(CACHE_TTL, CACHE_MAX_BYTES, CACHE_MAX_BYTES_ENTRADA)
+    app.state.lecturas_en_curso = LecturasCompartidas()
+    metricas.registrar(*metricas_gateway(app.state.cache_gateway, app.state.lecturas_en_curso), *pool.metricas())
+    tareas = []
+    if INTERVALO_CHEQUEO > 0:
+        tareas.append(asyncio.create_task(pool.chequear_periodicamente(
+            INTERVALO_CHEQUEO, RUTA_CHEQUEO, HTTPBasicAuth("lector", "lector1234"), TIMEOUT_CONEXION)))
+    if SEGUIR_CAMBIOS:
+        # Las escrituras van al primario, así que su feed incluye todos los cambios
+        tareas.append(asyncio.create_task(seguir_cambios(pool.primario.cliente, app.state.cache_gateway)))
+    yield
+    for tarea in tareas:
+        tarea.cancel()
+    await pool.cerrar()
+    print("API finalizada.")
+
+
+def metricas_gateway(cache: CacheLRU, lecturas: LecturasCompartidas) -> List[Medidor]:
+    """
+    Métricas de la caché de lecturas y de las lecturas compartidas, calculadas al exponerlas.
+    """
+    return [
+        Medidor("gateway_cache", "Estadísticas de la caché de lecturas del gateway (ver /cache).", ("estadistica",),
+                funcion=lambda: {(nombre,): valor for nombre, valor in cache.estadisticas().items()}),
+        Medidor("gateway_lecturas_en_curso", "Lecturas al servidor final en curso.", funcion=lambda: len(lecturas)),
+        Medidor("gateway_lecturas_coalescidas", "Lecturas atendidas con la respuesta de otra lectura en curso.",
+                funcion=lambda: lecturas.coalescidas),
+    ]
 
-from modelos.api_bd.modelos_bd import PrizeUpdate, Prize
 
-# Define una variable global para la URL base
-BASE_URL = "http://localhost:8001"
+async def seguir_cambios(cliente: httpx.AsyncClient, cache: CacheLRU):
+    """
+    Sigue el feed de cambios de api_bd (long-poll de `/changes`) e invalida las entradas de la caché de
+    los premios que toca cada cambio.
 
-app = FastAPI()
+    Al empezar, si api_bd responde que los cambios pendientes ya no están en su historial (410) o si
+    se pierde la conexión, no se puede saber qué cambió mientras tanto: se vacía la caché y se sigue
+    desde la versión actual. Los errores se informan una vez hasta que el seguimiento se recupera.
+    """
+    auth = HTTPBasicAuth("lector", "lector1234")
+    timeout = httpx.Timeout(TIMEOUT_CAMBIOS + TIMEOUT_LECTURA, connect=TIMEOUT_CONEXION)
+    version = None
+    fallando = False
+    while True:
+        try:
+            if version is None:
+                respuesta = await cliente.get("/changes", auth=auth)
+                respuesta.raise_for_status()
+                version = respuesta.json()["version"]
+                cache.vaciar()
+                continue
+
+            respuesta = await cliente.get("/changes", params={"since": version, "timeout": TIMEOUT_CAMBIOS},
+                                          auth=auth, timeout=timeout)
+            if respuesta.status_code == 410:
+                version = None
+                continue
+            respuesta.raise_for_status()
+            cuerpo = respuesta.json()
+            premios = [par for cambio in cuerpo["changes"] for par in premios_de_cambio(cambio)]
+            if premios:
+                invalidar_premios(cache, premios)
+            version = cuerpo["version"]
+            fallando = False
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            if not fallando:
+                print(f"No se pudo seguir el feed de cambios de api_bd: {str(e) or type(e).__name__}")
+            fallando = True
+            version = None
+            await asyncio.sleep(ESPERA_REINTENTO_CAMBIOS)
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+async def peticion_upstream(
+        request: Request,
+        metodo: str,
+        ruta: str,
+        auth: Optional[HTTPBasicAuth] = None,
+        timeout: Optional[float] = None,
+        stream: bool = False,
+        **kwargs,
+) -> httpx.Response:
+    """
+    Envía una petición al servidor final, a la instancia que elige el pool de la aplicación.
+
+    Las escrituras van al primario y las lecturas a la instancia con menos peticiones en curso. Si no
+    se pudo conectar con la instancia elegida, la petición no llegó a enviarse, así que una lectura
+    se reintenta una vez en otra instancia.
+
+    Parámetros:
+        request (Request): Petición entrante, usada para acceder al pool en `app.state`.
+        metodo (str): Método HTTP a utilizar.
+        ruta (str): Ruta relativa a la URL de la instancia.
+        auth (HTTPBasicAuth): Credenciales a enviar al servidor final.
+        timeout (float): Timeout de lectura para esta llamada; si se omite se usa TIMEOUT_LECTURA.
+        stream (bool): Si es verdadero, no lee el cuerpo; quien llama debe consumirlo y cerrar la respuesta.
+
+    Retorna:
+        httpx.Response: Respuesta del servidor final.
+    """
+    pool: PoolUpstream = request.app.state.upstreams
+    escritura = metodo not in ("GET", "HEAD")
+    backend = pool.elegir(escritura)
+    if backend is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"},
+                            detail="El servidor final primario no está disponible.")
+    if timeout is not None:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=TIMEOUT_CONEXION)
+    try:
+        try:
+            return await enviar_a_backend(request, pool, backend, metodo, ruta, auth, stream, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            otro = None if escritura else pool.elegir(escritura, excluir=backend)
+            if otro is None:
+                raise
+            return await enviar_a_backend(request, pool, otro, metodo, ruta, auth, stream, **kwargs)
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                            detail="El servidor final no respondió a tiempo.")
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY,
+                            detail=f"No se pudo contactar al servidor final: {str(e)}")
+
+
+async def enviar_a_backend(request: Request, pool: PoolUpstream, backend: Backend, metodo: str, ruta: str,
+                           auth: Optional[HTTPBasicAuth], stream: bool, **kwargs) -> httpx.Response:
+    """
+    Envía una petición a una instancia y registra el resultado para la expulsión pasiva.
 
-VENTANA = timedelta(seconds=1)
-MAX_PETICIONES = 5
+    La petición cuenta como en curso en la instancia hasta recibir los encabezados de la respuesta.
+    """
+    inicio = perf_counter()
+    codigo = "error"
+    backend.en_curso += 1
+    try:
+        peticion = backend.cliente.build_request(metodo, ruta, **kwargs)
+        respuesta = await backend.cliente.send(peticion, auth=auth, stream=stream)
+        codigo = str(respuesta.status_code)
+    except httpx.RequestError as e:
+        if isinstance(e, httpx.TimeoutException):
+            codigo = "timeout"
+        pool.registrar(backend, exito=False)
+        raise
+    finally:
+        backend.en_curso -= 1
+        # Con stream=True se mide hasta recibir los encabezados
+        duracion_upstream.observar(perf_counter() - inicio, metodo, plantilla_de_ruta(request), codigo)
+    pool.registrar(backend, exito=respuesta.status_code < 500)
+    return respuesta
 
-cubos_ip: Dict[str, Deque[datetime]] = {}
 
+# Encabezados de la respuesta del servidor final que se copian a la respuesta del gateway
+ENCABEZADOS_REENVIADOS = ("content-type", "content-length", "content-encoding", "etag", "cache-control",
+                          "retry-after", "vary", "www-authenticate")
 
-@app.middleware("http")
-async def limitador(request: Request, call_next):
-    ip = request.client.host
-    ahora = datetime.utcnow()
 
-    cubo = cubos_ip.setdefault(ip, deque())
+async def reenviar_upstream(
+        request: Request,
+        metodo: str,
+        ruta: str,
+        auth: Optional[HTTPBasicAuth] = None,
+        etiquetas: Optional[Tuple[str, ...]] = None,
+        **kwargs,
+) -> Response:
+    """
+    Reenvía una petición al servidor final y transmite su respuesta al cliente sin decodificarla.
+
+    Se conservan el código de estado y los encabezados relevantes (tipo de contenido, ETag,
+    codificación). En las lecturas sin caché, el `If-None-Match` y el `Accept-Encoding` del cliente se
+    envían al servidor final, de modo que los 304 y los cuerpos comprimidos pasan tal cual.
+
+    Si se indican `etiquetas`, la lectura se sirve desde la caché del gateway cuando es posible. Si
+    no está cacheada, las lecturas concurrentes con la misma clave comparten una única llamada al
+    servidor final, cuya respuesta se guarda en la caché. La clave incluye la ruta, los parámetros y
+    la credencial usada ante el servidor final, pero no el `Accept-Encoding`: la lectura compartida
+    pide el cuerpo comprimido con la mejor codificación que soporta el gateway, y cada cliente recibe
+    la variante que negocia, que se calcula una vez y se guarda en la misma entrada de la caché.
+
+    Parámetros:
+        request (Request): Petición entrante.
+        metodo (str): Método HTTP a utilizar.
+        ruta (str): Ruta relativa a la URL de la instancia.
+        auth (HTTPBasicAuth): Credenciales a enviar al servidor final.
+        etiquetas (Tuple[str, ...]): Etiquetas de invalidación; si se omiten, la respuesta no se cachea.
+
+    Retorna:
+        Response: Respuesta con los bytes del servidor final.
+    """
+    if etiquetas is None or metodo != "GET":
+        return await transmitir_upstream(request, metodo, ruta, auth=auth, **kwargs)
+
+    cache: CacheLRU = request.app.state.cache_gateway
+    clave = (ruta, str(httpx.QueryParams(kwargs.get("params"))), encabezado_autorizacion(auth))
+    entrada = cache.obtener(clave)
+    if entrada is not None:
+        return await respuesta_negociada(request, clave, 200, entrada.cuerpo, entrada.encabezados)
+
+    lecturas: LecturasCompartidas = request.app.state.lecturas_en_curso
+    tarea, lider = lecturas.unirse(clave, lambda: leer_upstream(request, ruta, auth, clave, etiquetas, **kwargs))
+    try:
+        resultado = await asyncio.shield(tarea)
+    except asyncio.CancelledError:
+        if lider:
+            tarea.add_done_callback(cerrar_respuesta_sin_leer)
+        raise
+
+    if isinstance(resultado, httpx.Response):
+        # Cuerpo demasiado grande para compartirlo: el líder lo transmite y el resto hace su propia llamada
+        if lider:
+            codificacion = resultado.headers.get("content-encoding", IDENTIDAD)
+            aceptada = codificacion == IDENTIDAD or negociar(request.headers.get("accept-encoding", "")) == codificacion
+            return respuesta_transmitida(resultado, decodificar=not aceptada)
+        return await transmitir_upstream(request, metodo, ruta, auth=auth, **kwargs)
+
+    codigo, cuerpo, encabezados = resultado
+    return await respuesta_negociada(request, clave, codigo, cuerpo, encabezados)
+
+
+async def transmitir_upstream(request: Request, metodo: str, ruta: str, auth: Optional[HTTPBasicAuth] = None,
+                              **kwargs) -> StreamingResponse:
+    """
+    Reenvía una petición al servidor final y transmite su respuesta tal cual, sin caché.
+    """
+    encabezados = {"Accept-Encoding": request.headers.get("accept-encoding", "identity")}
+    if "if-none-match" in request.headers:
+        encabezados["If-None-Match"] = request.headers["if-none-match"]
 
-    while cubo and (ahora - cubo[0]) > VENTANA:
-        cubo.popleft()
+    respuesta = await peticion_upstream(request, metodo, ruta, auth=auth, headers=encabezados, stream=True, **kwargs)
+    return respuesta_transmitida(respuesta)
 
-    if len(cubo) >= MAX_PETICIONES:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Demasiadas solicitudes: límite 5 req/s",
-        )
 
-    cubo.append(ahora)
+async def leer_upstream(request: Request, ruta: str, auth: Optional[HTTPBasicAuth], clave: tuple,
+                        etiquetas: Tuple[str, ...], **kwargs):
+    """
+    Lee una respuesta del servidor final para compartirla entre las lecturas coalescidas.
+
+    Retorna la tupla (código, cuerpo, encabezados) y guarda en la caché las respuestas 200. Si el
+    cuerpo supera el tamaño máximo de una entrada, devuelve la respuesta de httpx sin leer.
+    """
+    cache: CacheLRU = request.app.state.cache_gateway
+    generacion = cache.generacion
+    encabezados = {"Accept-Encoding": ", ".join(CODIFICACIONES)}
+
+    respuesta = await peticion_upstream(request, "GET", ruta, auth=auth, headers=encabezados, stream=True, **kwargs)
+    tamanio = int(respuesta.headers.get("content-length", -1))
+    if not 0 <= tamanio <= cache.max_bytes_entrada:
+        return respuesta
+
+    try:
+        cuerpo = b"".join([bloque async for bloque in respuesta.aiter_raw()])
+    finally:
+        await respuesta.aclose()
+    encabezados_respuesta = {k: v for k, v in respuesta.headers.items() if k in ENCABEZADOS_REENVIADOS}
+    if respuesta.status_code == 200:
+        cache.guardar(clave, cuerpo, encabezados_respuesta, etiquetas, generacion)
+    return respuesta.status_code, cuerpo, encabezados_respuesta
+
+
+async def respuesta_negociada(request: Request, clave: tuple, codigo: int, cuerpo: bytes,
+                              encabezados: Dict[str, str]) -> Response:
+    """
+    Responde con el cuerpo leído del servidor final en la codificación que negocia el cliente.
+
+    Si la codificación del cuerpo no es la negociada, se transcodifica en un hilo aparte; en las
+    respuestas 200 la variante se guarda en la entrada de la caché para las peticiones siguientes.
+    Los cuerpos sin comprimir menores a `MINIMO_BYTES` se envían tal cual.
+    """
+    origen = encabezados.get("content-encoding", IDENTIDAD)
+    destino = negociar(request.headers.get("accept-encoding", ""))
+    if origen == IDENTIDAD and len(cuerpo) < MINIMO_BYTES:
+        destino = IDENTIDAD
+
+    if destino != origen:
+        cache: CacheLRU = request.app.state.cache_gateway
+        variante = cache.variante(clave, destino) if codigo == 200 else None
+        if variante is None:
+            generacion = cache.generacion
+            variante = await asyncio.to_thread(transcodificar, cuerpo, origen, destino)
+            if codigo == 200:
+                cache.guardar_variante(clave, destino, variante, generacion)
+        cuerpo = variante
+        encabezados = encabezados_codificados(encabezados, origen, destino)
+
+    if codigo == 200:
+        return respuesta_desde_cache(request, cuerpo, encabezados)
+    return Response(content=cuerpo, status_code=codigo, headers=encabezados)
+
+
+def encabezados_codificados(encabezados: Dict[str, str], origen: str, destino: str) -> Dict[str, str]:
+    """
+    Adapta los encabezados de una respuesta a otra codificación del mismo cuerpo (ETag y Content-Encoding).
+    """
+    encabezados = {k: v for k, v in encabezados.items() if k not in ("content-length", "content-encoding")}
+    if "etag" in encabezados:
+        encabezados["etag"] = etag_codificado(etag_sin_codificar(encabezados["etag"], origen), destino)
+    if destino != IDENTIDAD:
+        encabezados["content-encoding"] = destino
+    encabezados["vary"] = "Accept-Encoding"
+    return encabezados
+
+
+def respuesta_transmitida(respuesta: httpx.Response, decodificar: bool = False) -> StreamingResponse:
+    """
+    Transmite una respuesta de httpx sin leerla completa. Con `decodificar`, se envía descomprimida,
+    para clientes que no aceptan la codificación con la que llegó.
+    """
+    encabezados = {k: v for k, v in respuesta.headers.items() if k in ENCABEZADOS_REENVIADOS}
+    if decodificar:
+        encabezados = encabezados_codificados(encabezados, respuesta.headers["content-encoding"], IDENTIDAD)
+    return StreamingResponse(
+        respuesta.aiter_bytes() if decodificar else respuesta.aiter_raw(),
+        status_code=respuesta.status_code,
+        headers=encabezados,
+        background=BackgroundTask(respuesta.aclose),
+    )
+
+
+def cerrar_respuesta_sin_leer(tarea: asyncio.Task):
+    # Si el líder se canceló, nadie va a transmitir una respuesta sin leer: se cierra la conexión
+    if not tarea.cancelled() and tarea.exception() is None and isinstance(tarea.result(), httpx.Response):
+        asyncio.create_task(tarea.result().aclose())
+
+
+def respuesta_desde_cache(request: Request, cuerpo: bytes, encabezados: Dict[str, str]) -> Response:
+    """
+    Construye la respuesta para un cuerpo cacheado, respondiendo 304 si el cliente ya tiene ese ETag.
+    """
+    etag = encabezados.get("etag")
+    if_none_match = request.headers.get("if-none-match")
+    if etag and if_none_match and etag_coincide(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                        headers={k: v for k, v in encabezados.items() if k in ("etag", "vary")})
+    return Response(content=cuerpo, headers=encabezados)
+
+
+def encabezado_autorizacion(auth: Optional[HTTPBasicAuth]) -> str:
+    """
+    Devuelve el encabezado Authorization que se enviará al servidor final con las credenciales dadas.
+    """
+    if auth is None:
+        return ""
+    return next(auth.auth_flow(httpx.Request("GET", BASE_URL))).headers.get("Authorization", "")
+
+
+def etiquetas_premio(year: int, category: str) -> Tuple[str, ...]:
+    """
+    Etiquetas de las lecturas cacheadas que quedan desactualizadas al modificar un premio.
+    """
+    return ("/", "/prizes", f"/prizes/{year}", f"/prizes/{year}/{normalizar_categoria(category)}", "/laureates",
+            "/search", "/stats")
+
+
+def invalidar_cache(request: Request, year: int, category: str):
+    invalidar_cache_lote(request, [(year, category)])
+
+
+def invalidar_cache_lote(request: Request, premios: List[Tuple[int, str]]):
+    invalidar_premios(request.app.state.cache_gateway, premios)
+
+
+def invalidar_premios(cache: CacheLRU, premios: List[Tuple[int, str]]):
+    cache.invalidar({etiqueta for year, category in premios for etiqueta in etiquetas_premio(year, category)})
+
+
+# Límites de peticiones por IP: por defecto 5 req/s, configurables por rol y por prefijo de ruta
+# con un mapa JSON en LIMITES_POR_ROL y LIMITES_POR_RUTA (ver `limites_desde_entorno`)
+LIMITE_POR_DEFECTO = Limite(tasa=float(getenv("LIMITE_TASA", "5")), rafaga=int(getenv("LIMITE_RAFAGA", "5")))
+LIMITES_POR_ROL = limites_desde_entorno("LIMITES_POR_ROL", {})
+LIMITES_POR_RUTA = limites_desde_entorno("LIMITES_POR_RUTA", {
+    "/prize": Limite(tasa=2, rafaga=5),
+    "/prizes:batch": Limite(tasa=2, rafaga=5),
+})
+
+limitador_tasa = LimitadorTasa(LIMITE_POR_DEFECTO, LIMITES_POR_ROL, LIMITES_POR_RUTA,
+                               max_claves=int(getenv("LIMITE_MAX_CLAVES", "10000")))
+
+
+@app.middleware("http")
+async def limitador(request: Request, call_next):
+    with metricas_http.duracion_limitador.medir():
+        rol = rol_de_peticion(request, USUARIOS)
+        espera = limitador_tasa.consumir(cliente_de_peticion(request), request.url.path, rol)
+    if espera:
+        metricas_http.rechazos_limitador.incrementar(plantilla_de_ruta(request))
+        return respuesta_limite_excedido(espera)
+
     respuesta = await call_next(request)
     return respuesta
 
 
+# Perfilado opcional de peticiones (encabezado X-Perfilar de un admin o muestreo), ver /profiles
+perfilador = Perfilador()
+
+
+# Se declara después del limitador para ser el middleware externo y medir también los rechazos.
+# El perfilado corre dentro de este mismo middleware para no sumar otra capa a cada petición.
+@app.middleware("http")
+async def medir_peticiones(request: Request, call_next):
+    async def perfilar(request: Request) -> Response:
+        return await perfilador.perfilar_peticion(request, call_next, USUARIOS)
+
+    return await metricas_http.medir_peticion(request, perfilar)
+
+
 security = HTTPBasic()
 
 USUARIOS = {
@@ -54,14 +513,15 @@ USUARIOS = {
 def verificar_credenciales(
         credenciales: HTTPBasicCredentials = Depends(security)
 ) -> dict:
-    usuario = USUARIOS.get(credenciales.username)
-    if not usuario or not secrets.compare_digest(credenciales.password, usuario["password"]):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Credenciales incorrectas",
-            headers={"WWW-Authenticate": "Basic"},
-        )
-    return {"username": credenciales.username, "role": usuario["role"]}
+    with metricas_http.duracion_autenticacion.medir():
+        usuario = USUARIOS.get(credenciales.username)
+        if not usuario or not secrets.compare_digest(credenciales.password, usuario["password"]):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales incorrectas",
+                headers={"WWW-Authenticate": "Basic"},
+            )
+        return {"username": credenciales.username, "role": usuario["role"]}
 
 
 def verificar_permiso(*roles_requeridos: str):
@@ -86,15 +546,28 @@ def verificar_permiso(*roles_requeridos: str):
 
 
 @app.get("/")
-async def root(request: Request):
+async def root(
+        request: Request,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        formato: Literal["json", "ndjson"] = Query("json", alias="format"),
+):
     """
     Endpoint raíz de la API.
     - **Acceso:** Público, no requiere autenticación.
     - **Descripción:** Reenvía una solicitud al servidor final para obtener la respuesta de la raíz.
+    - **Parámetros:** `limit` y `cursor` paginan el listado, `fields` elige los campos de cada premio y `format=ndjson` transmite un premio por línea sin esperar al listado completo.
     """
     auth = HTTPBasicAuth("lector", "lector1234")
-    respuesta = requests.get(f"{BASE_URL}/", auth=auth)
-    return respuesta.json()
+    params = {"limit": limit, "cursor": cursor, "fields": fields}
+    params = {clave: valor for clave, valor in params.items() if valor is not None}
+
+    if formato == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""):
+        params["format"] = "ndjson"
+        return await reenviar_upstream(request, "GET", "/", auth=auth, params=params)
+
+    return await reenviar_upstream(request, "GET", "/", auth=auth, etiquetas=("/",), params=params)
 
 
 @app.get("/prizes/{year}/{category}")
@@ -112,8 +585,32 @@ async def get_prizes_by_year_and_category(
     if usuario["role"] == "user":
         auth = HTTPBasicAuth("lector", "lector1234")
 
-    respuesta = requests.get(f"{BASE_URL}/prizes/{year}/{category}/", auth=auth)
-    return respuesta.json()
+    return await reenviar_upstream(request, "GET", f"/prizes/{year}/{category}", auth=auth,
+                                   etiquetas=(f"/prizes/{year}/{normalizar_categoria(category)}",))
+
+
+@app.get("/prizes")
+async def get_prizes_by_range(
+        request: Request,
+        desde: Optional[int] = Query(None, alias="from"),
+        hasta: Optional[int] = Query(None, alias="to"),
+        category: Optional[str] = None,
+        has_laureates: Optional[bool] = None,
+        usuario: dict = Depends(verificar_permiso("user")),
+):
+    """
+    Obtiene premios por rango de años.
+    - **Acceso:** Permitido para todos los usuarios autenticados (`user` y `admin`).
+    - **Descripción:** Devuelve en una sola consulta los premios con año entre `from` y `to` (inclusive, ambos opcionales), filtrando opcionalmente por categoría y por si tienen laureados.
+    """
+    auth = None
+    if usuario["role"] == "admin":
+        auth = HTTPBasicAuth("admin", "admin1234")
+    if usuario["role"] == "user":
+        auth = HTTPBasicAuth("lector", "lector1234")
+    params = {"from": desde, "to": hasta, "category": category, "has_laureates": has_laureates}
+    params = {clave: valor for clave, valor in params.items() if valor is not None}
+    return await reenviar_upstream(request, "GET", "/prizes", auth=auth, etiquetas=("/prizes",), params=params)
 
 
 @app.get("/prizes/{year}")
@@ -130,8 +627,60 @@ async def get_prizes_by_year(
         auth = HTTPBasicAuth("admin", "admin1234")
     if usuario["role"] == "user":
         auth = HTTPBasicAuth("lector", "lector1234")
-    respuesta = requests.get(f"{BASE_URL}/prizes/{year}", auth=auth)
-    return respuesta.json()
+    return await reenviar_upstream(request, "GET", f"/prizes/{year}", auth=auth, etiquetas=(f"/prizes/{year}",))
+
+
+@app.get("/search")
+async def search_prizes(
+        request: Request,
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: Optional[int] = Query(None, ge=1),
+        usuario: dict = Depends(verificar_permiso("user")),
+):
+    """
+    Busca premios por texto.
+    - **Acceso:** Permitido para todos los usuarios autenticados (`user` y `admin`).
+    - **Descripción:** Busca en los nombres y apellidos de los laureados y en las motivaciones. Cada palabra de `q` debe aparecer en el premio, completa o como prefijo; los resultados se ordenan por relevancia, con un máximo de `limit`.
+    """
+    auth = None
+    if usuario["role"] == "admin":
+        auth = HTTPBasicAuth("admin", "admin1234")
+    if usuario["role"] == "user":
+        auth = HTTPBasicAuth("lector", "lector1234")
+    params = {"q": q} if limit is None else {"q": q, "limit": limit}
+    return await reenviar_upstream(request, "GET", "/search", auth=auth, etiquetas=("/search",), params=params)
+
+
+@app.get("/laureates/{laureate_id}")
+async def get_laureate(
+        laureate_id: int, request: Request, usuario: dict = Depends(verificar_permiso("user"))
+):
+    """
+    Obtiene un laureado por su ID.
+    - **Acceso:** Permitido para todos los usuarios autenticados (`user` y `admin`).
+    - **Descripción:** Este endpoint reenvía una solicitud al servidor final para obtener el laureado junto con todos sus premios.
+    """
+    auth = None
+    if usuario["role"] == "admin":
+        auth = HTTPBasicAuth("admin", "admin1234")
+    if usuario["role"] == "user":
+        auth = HTTPBasicAuth("lector", "lector1234")
+    return await reenviar_upstream(request, "GET", f"/laureates/{laureate_id}", auth=auth, etiquetas=("/laureates",))
+
+
+@app.get("/stats")
+async def get_stats(request: Request, usuario: dict = Depends(verificar_permiso("user"))):
+    """
+    Obtiene los agregados del dataset.
+    - **Acceso:** Permitido para todos los usuarios autenticados (`user` y `admin`).
+    - **Descripción:** Devuelve los premios por categoría, por década y por cantidad de laureados, los laureados por `share` y las proporciones de premios y laureados compartidos. El servidor final los mantiene en cada mutación, por lo que la respuesta no depende del tamaño del dataset.
+    """
+    auth = None
+    if usuario["role"] == "admin":
+        auth = HTTPBasicAuth("admin", "admin1234")
+    if usuario["role"] == "user":
+        auth = HTTPBasicAuth("lector", "lector1234")
+    return await reenviar_upstream(request, "GET", "/stats", auth=auth, etiquetas=("/stats",))
 
 
 @app.put("/prizes/{year}/{category}")
@@ -151,8 +700,9 @@ async def update_prize(
     if usuario["role"] == "admin":
         auth = HTTPBasicAuth("admin", "admin1234")
     body = prize_update.model_dump(exclude_none=True)
-    respuesta = requests.put(f"{BASE_URL}/prizes/{year}/{category}", json=body, auth=auth)
-    return respuesta.json()
+    respuesta = await reenviar_upstream(request, "PUT", f"/prizes/{year}/{category}", json=body, auth=auth)
+    invalidar_cache(request, year, category)
+    return respuesta
 
 
 @app.delete("/prizes/{year}/{category}")
@@ -170,10 +720,9 @@ async def delete_prize(
     auth = None
     if usuario["role"] == "admin":
         auth = HTTPBasicAuth("admin", "admin1234")
-    respuesta = requests.delete(f"{BASE_URL}/prizes/{year}/{category}", auth=auth)
-    if respuesta.status_code != 200:
-        raise HTTPException(status_code=respuesta.status_code, detail=respuesta.text)
-    return {"detail": "Premio eliminado exitosamente."}
+    respuesta = await reenviar_upstream(request, "DELETE", f"/prizes/{year}/{category}", auth=auth)
+    invalidar_cache(request, year, category)
+    return respuesta
 
 
 @app.post("/prize")
@@ -191,7 +740,129 @@ async def create_prize(
     if usuario["role"] == "admin":
         auth = HTTPBasicAuth("admin", "admin1234")
     body = prize.model_dump(exclude_none=True)
-    respuesta = requests.post(f"{BASE_URL}/prize", json=body, auth=auth)
-    if respuesta.status_code != 200:
-        raise HTTPException(status_code=respuesta.status_code, detail=respuesta.text)
-    return respuesta.json()
+    respuesta = await reenviar_upstream(request, "POST", "/prize", json=body, auth=auth)
+    invalidar_cache(request, prize.year, prize.category)
+    return respuesta
+
+
+@app.post("/prizes:batch")
+async def create_prizes_batch(
+        prizes: List[Prize],
+        request: Request,
+        usuario: dict = Depends(verificar_permiso()),  # Solo admin puede usar este endpoint
+):
+    """
+    Crea varios premios en una sola operación.
+    - **Acceso:** Solo permitido para usuarios con rol `admin`.
+    - **Descripción:** Crea todos los premios del lote o ninguno, con una única escritura en el servidor final. Pensado para importaciones masivas.
+    """
+    auth = None
+    if usuario["role"] == "admin":
+        auth = HTTPBasicAuth("admin", "admin1234")
+    body = [prize.model_dump(exclude_none=True) for prize in prizes]
+    respuesta = await reenviar_upstream(request, "POST", "/prizes:batch", json=body, auth=auth)
+    invalidar_cache_lote(request, [(prize.year, prize.category) for prize in prizes])
+    return respuesta
+
+
+@app.put("/prizes:batch")
+async def update_prizes_batch(
+        cambios: List[PrizeBatchUpdate],
+        request: Request,
+        usuario: dict = Depends(verificar_permiso()),  # Solo admin puede usar este endpoint
+):
+    """
+    Actualiza varios premios en una sola operación.
+    - **Acceso:** Solo permitido para usuarios con rol `admin`.
+    - **Descripción:** Cada elemento indica el año y la categoría del premio junto con los cambios. Si algún premio o laureado no existe, no se aplica ningún cambio.
+    """
+    auth = None
+    if usuario["role"] == "admin":
+        auth = HTTPBasicAuth("admin", "admin1234")
+    body = [cambio.model_dump(exclude_none=True) for cambio in cambios]
+    respuesta = await reenviar_upstream(request, "PUT", "/prizes:batch", json=body, auth=auth)
+    invalidar_cache_lote(request, [(cambio.year, cambio.category) for cambio in cambios])
+    return respuesta
+
+
+@app.delete("/prizes:batch")
+async def delete_prizes_batch(
+        claves: List[PrizeKey],
+        request: Request,
+        usuario: dict = Depends(verificar_permiso()),  # Solo admin puede usar este endpoint
+):
+    """
+    Elimina varios premios en una sola operación.
+    - **Acceso:** Solo permitido para usuarios con rol `admin`.
+    - **Descripción:** Cada elemento indica el año y la categoría del premio a eliminar. Si alguno no existe, no se elimina ninguno.
+    """
+    auth = None
+    if usuario["role"] == "admin":
+        auth = HTTPBasicAuth("admin", "admin1234")
+    body = [clave.model_dump() for clave in claves]
+    respuesta = await reenviar_upstream(request, "DELETE", "/prizes:batch", json=body, auth=auth)
+    invalidar_cache_lote(request, [(clave.year, clave.category) for clave in claves])
+    return respuesta
+
+
+@app.get("/cache")
+async def get_cache_stats(request: Request, usuario: dict = Depends(verificar_permiso())):
+    """
+    Estadísticas de la caché de lecturas del gateway.
+    - **Acceso:** Solo permitido para usuarios con rol `admin`.
+    - **Descripción:** Devuelve la cantidad de entradas, los bytes ocupados, los contadores de aciertos, fallos, invalidaciones y desalojos, y las lecturas coalescidas.
+    """
+    cache: CacheLRU = request.app.state.cache_gateway
+    lecturas: LecturasCompartidas = request.app.state.lecturas_en_curso
+    return {**cache.estadisticas(), "lecturas_en_curso": len(lecturas), "lecturas_coalescidas": lecturas.coalescidas}
+
+
+@app.get("/upstreams")
+async def get_upstreams(request: Request, usuario: dict = Depends(verificar_permiso())):
+    """
+    Estado de las instancias del servidor final.
+    - **Acceso:** Solo permitido para usuarios con rol `admin`.
+    - **Descripción:** Devuelve, por URL, si es el primario o recibe lecturas, si está sana o expulsada, y sus peticiones en curso, totales y con error.
+    """
+    pool: PoolUpstream = request.app.state.upstreams
+    return pool.estadisticas()
+
+
+@app.get("/metrics")
+async def get_metrics(usuario: dict = Depends(verificar_permiso())):
+    """
+    Métricas del gateway en el formato de texto de Prometheus.
+    - **Acceso:** Solo permitido para usuarios con rol `admin`.
+    - **Descripción:** Latencia por ruta, método y código, latencia y estado de cada instancia del servidor final, limitador de tasa, autenticación, caché y lecturas coalescidas.
+    """
+    return metricas.respuesta()
+
+
+@app.get("/profiles")
+async def get_profiles(usuario: dict = Depends(verificar_permiso())):
+    """
+    Perfiles de las últimas peticiones perfiladas.
+    - **Acceso:** Solo permitido para usuarios con rol `admin`.
+    - **Descripción:** Se perfilan las peticiones de un admin con el encabezado `X-Perfilar: 1` y, si `PERFILADO_TASA` es mayor que 0, una fracción de todas las peticiones. Devuelve el resumen de cada perfil, del más reciente al más viejo.
+    """
+    return perfilador.listar()
+
+
+@app.get("/profiles/{perfil_id}")
+async def get_profile(perfil_id: int,
+                      orden: Literal[ORDENES] = "cumulative",
+                      lineas: int = Query(60, ge=1, le=1000),
+                      formato: Literal["texto", "pstats"] = Query("texto", alias="format"),
+                      usuario: dict = Depends(verificar_permiso())):
+    """
+    Perfil de una petición.
+    - **Acceso:** Solo permitido para usuarios con rol `admin`.
+    - **Descripción:** Devuelve el informe de pstats ordenado por `orden`, o con `format=pstats` el archivo para abrir con pstats o snakeviz.
+    """
+    perfil = perfilador.obtener(perfil_id)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="No se encontró el perfil solicitado.")
+    if formato == "pstats":
+        return Response(content=perfil.pstats(), media_type="application/octet-stream",
+                        headers={"Content-Disposition": f'attachment; filename="perfil-{perfil_id}.pstats"'})
+    return Response(content=perfil.texto(orden, lineas), media_type="text/plain; charset=utf-8")
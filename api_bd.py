@@ -1,20 +1,71 @@
-import json
+import asyncio
+import gc
 import secrets
-from collections import deque
-from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
-from json import dump, load
-from os import path, makedirs
-from typing import Deque, Dict
+from contextlib import asynccontextmanager, contextmanager
+from json import dump, dumps, load
+from os import path, makedirs, getenv
+from time import perf_counter
+from typing import AsyncIterator, List, Literal, Optional, Tuple
 
 import requests
-from fastapi import FastAPI, HTTPException, Request, Depends, status
+from fastapi import FastAPI, HTTPException, Request, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
+from almacenamiento.base import AlmacenPremios
+from almacenamiento.busqueda import tokenizar
+from almacenamiento.cache_respuestas import CacheRespuestas, adaptador_premios, respuesta_cacheada
+from almacenamiento.indices import normalizar_categoria
+from almacenamiento.journal import Journal
+from almacenamiento.memoria import AlmacenMemoria
+from almacenamiento.paginacion import (decodificar_cursor, lineas_ndjson, parsear_campos, serializar_pagina,
+                                       serializar_premios)
+from almacenamiento.registros import DatosPremios, adaptador_datos, premio_a_dict, premio_a_modelo
+from almacenamiento.snapshot_binario import escribir_snapshot_binario, leer_snapshot_binario, serializar_binario
+from almacenamiento.sqlite import AlmacenSQLite
 from api import security
-from modelos.api_bd.modelos_bd import PrizesResponse, PrizeUpdate, Prize, Laureate
+from comun.limitador import (Limite, LimitadorTasa, cliente_de_peticion, limites_desde_entorno,
+                             respuesta_limite_excedido, rol_de_peticion)
+from comun.metricas import MetricasHTTP, RegistroMetricas, plantilla_de_ruta
+from comun.perfilado import ORDENES, Perfilador
+from modelos.api_bd.modelos_bd import PrizeBatchUpdate, PrizeKey, PrizeUpdate, Prize
 
 ARCHIVO_BD = "./datos/bd.json"
+ARCHIVO_SQLITE = "./datos/bd.sqlite"
+# Almacenamiento a usar: "json" (memoria + journal, un solo proceso) o "sqlite" (varios workers)
+ALMACENAMIENTO = getenv("BD_ALMACENAMIENTO", "json")
+ARCHIVO_JOURNAL = "./datos/bd.journal"
+# Cantidad de entradas del journal a partir de la cual se escribe un snapshot nuevo
+COMPACTAR_CADA = int(getenv("BD_COMPACTAR_CADA", "1000"))
+# Si es falso, las entradas del journal no esperan a fsync (más rápido, menos durable)
+SINCRONIZAR_JOURNAL = getenv("BD_SINCRONIZAR_JOURNAL", "1") != "0"
+# Ventana (en segundos) durante la cual se agrupan las mutaciones en una sola escritura
+VENTANA_GRUPO_ESCRITURA = float(getenv("BD_VENTANA_GRUPO_ESCRITURA", "0.005"))
+# Si es verdadero, cada mutación responde recién cuando su entrada está en disco
+ESPERAR_DURABILIDAD = getenv("BD_ESPERAR_DURABILIDAD", "1") != "0"
+# Copia binaria del snapshot (bd.bin) para arrancar sin parsear ni validar todo el JSON
+SNAPSHOT_BINARIO = getenv("BD_SNAPSHOT_BINARIO", "1") != "0"
+# Límites de la caché de respuestas codificadas, que se desalojan por LRU al superarlos
+CACHE_MAX_ENTRADAS = int(getenv("BD_CACHE_MAX_ENTRADAS", "10000"))
+CACHE_MAX_BYTES = int(getenv("BD_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Paginación del listado completo
+LIMITE_MAXIMO_PAGINA = 1000
+TAMANIO_LOTE_STREAMING = 500
+# Cantidad máxima de elementos en una mutación por lote
+TAMANIO_MAXIMO_LOTE = int(getenv("BD_TAMANIO_MAXIMO_LOTE", "10000"))
+# Resultados de la búsqueda de texto
+LIMITE_BUSQUEDA = 20
+LIMITE_MAXIMO_BUSQUEDA = 100
+# Feed de cambios: mutaciones que se conservan, cambios por respuesta y espera máxima del long-poll
+HISTORIAL_CAMBIOS = int(getenv("BD_HISTORIAL_CAMBIOS", "10000"))
+LIMITE_CAMBIOS = 1000
+TIMEOUT_MAXIMO_CAMBIOS = 30
+# Cada cuánto se envía un comentario por las conexiones SSE sin cambios, y cuánto dura como máximo
+# cada conexión: uvicorn espera a que terminen antes de apagarse, y el cliente se reconecta con
+# Last-Event-ID sin perder cambios
+INTERVALO_LATIDO_SSE = 15
+DURACION_MAXIMA_SSE = float(getenv("BD_DURACION_MAXIMA_SSE", str(TIMEOUT_MAXIMO_CAMBIOS)))
 URL_DATOS = "https://api.nobelprize.org/v1/prize.json"
 
 # Base de datos simulada de usuarios con roles
@@ -23,16 +74,21 @@ USUARIOS = {
     "admin": {"password": "admin1234", "role": "admin"},
 }
 
+# Métricas expuestas en /metrics; las del almacenamiento y la caché se registran al iniciar
+metricas = RegistroMetricas()
+metricas_http = MetricasHTTP(metricas)
+
 
 def verificar_credenciales(credenciales: HTTPBasicCredentials = Depends(security)) -> dict:
-    usuario = USUARIOS.get(credenciales.username)
-    if not usuario or not secrets.compare_digest(credenciales.password, usuario["password"]):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Credenciales incorrectas",
-            headers={"WWW-Authenticate": "Basic"},
-        )
-    return {"username": credenciales.username, "role": usuario["role"]}
+    with metricas_http.duracion_autenticacion.medir():
+        usuario = USUARIOS.get(credenciales.username)
+        if not usuario or not secrets.compare_digest(credenciales.password, usuario["password"]):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Credenciales incorrectas",
+                headers={"WWW-Authenticate": "Basic"},
+            )
+        return {"username": credenciales.username, "role": usuario["role"]}
 
 
 def verificar_permiso(*roles_requeridos: str):
@@ -84,82 +140,174 @@ def descargar_datos_si_no_existe(ruta_archivo: str):
         print(f"El archivo ya existe en {ruta_archivo}. Usando el archivo existente.")
 
 
-def cargar_datos_desde_archivo(ruta_archivo: str) -> PrizesResponse:
+def cargar_datos_desde_archivo(ruta_archivo: str) -> Tuple[DatosPremios, dict]:
     """
     Carga y valida los datos desde un archivo JSON en la ruta especificada.
 
-    Abre el archivo, carga su contenido y lo valida usando el modelo PrizesResponse.
+    Abre el archivo, carga su contenido y lo valida con el mismo esquema que PrizesResponse,
+    construyendo directamente los registros internos compactos.
     Si ocurre un error al leer o validar los datos, lanza una excepción HTTP.
 
     Parámetros:
         ruta_archivo (str): Ruta del archivo JSON a cargar.
 
     Retorna:
-        PrizesResponse: Objeto validado con los datos cargados.
+        Tuple[DatosPremios, dict]: Objeto validado con los datos cargados y los metadatos del
+        encabezado del snapshot (vacío si el archivo nunca fue compactado).
     """
     try:
         with open(ruta_archivo, "r", encoding="utf-8") as f:
-            return PrizesResponse.model_validate(load(f))
+            contenido = load(f)
+        metadatos = {clave: valor for clave, valor in contenido.items() if clave != "prizes"}
+        return adaptador_datos.validate_python(contenido), metadatos
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al cargar los datos desde {ruta_archivo}: {str(e)}")
 
 
-def guardar_datos_nobel_en_archivo(datos_nobel: PrizesResponse):
+def cargar_snapshot(ruta_archivo: str) -> Tuple[DatosPremios, dict, str]:
     """
-    Serializa y escribe los datos de Premios Nobel en disco en formato JSON.
+    Carga el snapshot desde su copia binaria si está habilitada y es válida, o desde el JSON.
 
-    Argumentos:
-        datos_nobel (PrizesResponse): Modelo Pydantic que contiene la lista de premios Nobel a guardar.
+    Si se carga desde el JSON, se escribe la copia binaria para que el próximo arranque la use.
+
+    Parámetros:
+        ruta_archivo (str): Ruta del snapshot JSON.
 
     Retorna:
-        None
+        Tuple[DatosPremios, dict, str]: Los datos, los metadatos del encabezado y el formato del
+        que se cargaron (`binario` o `json`).
+    """
+    if SNAPSHOT_BINARIO:
+        cargado = leer_snapshot_binario(ruta_archivo)
+        if cargado is not None:
+            return cargado[0], cargado[1], "binario"
+
+    datos_nobel, metadatos = cargar_datos_desde_archivo(ruta_archivo)
+    if SNAPSHOT_BINARIO:
+        try:
+            escribir_snapshot_binario(serializar_binario(datos_nobel, **metadatos), ruta_archivo)
+        except OSError as e:
+            print(f"No se pudo escribir el snapshot binario: {str(e)}")
+    return datos_nobel, metadatos, "json"
+
+
+@contextmanager
+def medir(informe: dict, etapa: str):
+    """
+    Registra en `informe` la duración en milisegundos del bloque, con la clave `etapa`.
     """
-    with open(ARCHIVO_BD, "w", encoding="utf-8") as f:
-        json.dump(datos_nobel.model_dump(), f, ensure_ascii=False, indent=2)
+    inicio = perf_counter()
+    try:
+        yield
+    finally:
+        informe[etapa] = round((perf_counter() - inicio) * 1000, 1)
 
 
-def get_max_laureate_id(laureates: list[Laureate]) -> int:
+def crear_almacen(informe: dict) -> AlmacenPremios:
     """
-    Devuelve el siguiente ID de laureado tomando el máximo existente + 1.
+    Crea el almacenamiento configurado en BD_ALMACENAMIENTO (`json` por defecto, o `sqlite`).
+
+    El almacenamiento `json` mantiene los datos en memoria de un solo proceso; para correr
+    `api_bd:app` con varios workers debe usarse `sqlite`, que comparte los datos entre procesos.
+    La duración de cada etapa del arranque se registra en `informe`; con `sqlite`, las etapas de
+    carga solo aparecen en el arranque que importa los datos a la base.
     """
-    return max((l.id for l in laureates), default=0)
+    if ALMACENAMIENTO == "sqlite":
+        def cargar_datos() -> Tuple[DatosPremios, int]:
+            # Se importa el mismo estado que vería el almacenamiento en memoria: el snapshot más las
+            # entradas del journal que todavía no se compactaron
+            with medir(informe, "descarga_ms"):
+                descargar_datos_si_no_existe(ARCHIVO_BD)
+            with medir(informe, "carga_ms"):
+                datos_nobel, metadatos, informe["formato_snapshot"] = cargar_snapshot(ARCHIVO_BD)
+            journal = Journal(ARCHIVO_JOURNAL)
+            with medir(informe, "journal_ms"):
+                aplicadas = journal.reproducir(datos_nobel, metadatos.get("journal_seq", 0))
+            print(f"Se reprodujeron {aplicadas} entradas de {ARCHIVO_JOURNAL}.")
+            return datos_nobel, max(metadatos.get("ultimo_id_laureado", 0), journal.ultimo_id_reproducido)
+
+        makedirs(path.dirname(ARCHIVO_SQLITE), exist_ok=True)
+        return AlmacenSQLite(ARCHIVO_SQLITE, cargar_datos, historial_cambios=HISTORIAL_CAMBIOS)
+
+    with medir(informe, "descarga_ms"):
+        descargar_datos_si_no_existe(ARCHIVO_BD)
+    with medir(informe, "carga_ms"):
+        datos_nobel, metadatos, informe["formato_snapshot"] = cargar_snapshot(ARCHIVO_BD)
+    with medir(informe, "journal_e_indices_ms"):
+        return AlmacenMemoria(datos_nobel, metadatos, ARCHIVO_BD, ARCHIVO_JOURNAL, SINCRONIZAR_JOURNAL,
+                              VENTANA_GRUPO_ESCRITURA, COMPACTAR_CADA, ESPERAR_DURABILIDAD, SNAPSHOT_BINARIO,
+                              HISTORIAL_CAMBIOS)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    descargar_datos_si_no_existe(ARCHIVO_BD)
-    app.state.datos_nobel = cargar_datos_desde_archivo(ARCHIVO_BD)
+    informe = {"almacenamiento": ALMACENAMIENTO}
+    # La carga crea cientos de miles de objetos que viven toda la ejecución: el recolector de ciclos
+    # los recorrería varias veces sin liberar nada, así que se pausa y al terminar se congelan
+    gc.disable()
+    try:
+        with medir(informe, "total_ms"):
+            app.state.almacen = crear_almacen(informe)
+            with medir(informe, "inicio_almacen_ms"):
+                await app.state.almacen.iniciar()
+            app.state.cache_respuestas = CacheRespuestas(CACHE_MAX_ENTRADAS, CACHE_MAX_BYTES)
+    finally:
+        gc.enable()
+        gc.freeze()
+    # Se cuenta al final, porque el journal puede haber agregado o quitado premios del snapshot
+    informe["premios"] = app.state.almacen.cantidad()
+    app.state.informe_inicio = informe
+    metricas.registrar(*app.state.almacen.metricas(), app.state.cache_respuestas.consultas,
+                       app.state.cache_respuestas.duracion_generacion, app.state.cache_respuestas.desalojos)
+    print(f"API lista en {informe['total_ms']} ms: {informe}")
     yield
+    await app.state.almacen.cerrar()
     print("API finalizada.")
 
 
 app = FastAPI(lifespan=lifespan)
 
-VENTANA = timedelta(seconds=1)
-MAX_PETICIONES = 5
+# Límites de peticiones por IP. Los roles autenticados corresponden al gateway (que ya limita a
+# sus clientes), por lo que tienen un límite mucho mayor que las peticiones anónimas. Como en el
+# gateway, LIMITES_POR_ROL y LIMITES_POR_RUTA aceptan un mapa JSON (ver `limites_desde_entorno`).
+LIMITE_POR_DEFECTO = Limite(tasa=float(getenv("LIMITE_TASA", "5")), rafaga=int(getenv("LIMITE_RAFAGA", "5")))
+LIMITE_GATEWAY = Limite(tasa=float(getenv("LIMITE_TASA_GATEWAY", "1000")),
+                        rafaga=int(getenv("LIMITE_RAFAGA_GATEWAY", "1000")))
+LIMITES_POR_ROL = limites_desde_entorno("LIMITES_POR_ROL", {
+    "lector": LIMITE_GATEWAY,
+    "admin": LIMITE_GATEWAY,
+})
+LIMITES_POR_RUTA = limites_desde_entorno("LIMITES_POR_RUTA", {})
 
-cubos_ip: Dict[str, Deque[datetime]] = {}
+limitador_tasa = LimitadorTasa(LIMITE_POR_DEFECTO, LIMITES_POR_ROL, LIMITES_POR_RUTA,
+                               max_claves=int(getenv("LIMITE_MAX_CLAVES", "10000")))
 
 
 @app.middleware("http")
 async def limitador(request: Request, call_next):
-    ip = request.client.host
-    ahora = datetime.utcnow()
+    with metricas_http.duracion_limitador.medir():
+        rol = rol_de_peticion(request, USUARIOS)
+        espera = limitador_tasa.consumir(cliente_de_peticion(request), request.url.path, rol)
+    if espera:
+        metricas_http.rechazos_limitador.incrementar(plantilla_de_ruta(request))
+        return respuesta_limite_excedido(espera)
 
-    cubo = cubos_ip.setdefault(ip, deque())
+    respuesta = await call_next(request)
+    return respuesta
 
-    while cubo and (ahora - cubo[0]) > VENTANA:
-        cubo.popleft()
 
-    if len(cubo) >= MAX_PETICIONES:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Demasiadas solicitudes: límite 5 req/s",
-        )
+# Perfilado opcional de peticiones (encabezado X-Perfilar de un admin o muestreo), ver /profiles
+perfilador = Perfilador()
 
-    cubo.append(ahora)
-    respuesta = await call_next(request)
-    return respuesta
+
+# Se declara después del limitador para ser el middleware externo y medir también los rechazos.
+# El perfilado corre dentro de este mismo middleware para no sumar otra capa a cada petición.
+@app.middleware("http")
+async def medir_peticiones(request: Request, call_next):
+    async def perfilar(request: Request) -> Response:
+        return await perfilador.perfilar_peticion(request, call_next, USUARIOS)
+
+    return await metricas_http.medir_peticion(request, perfilar)
 
 
 # Configuración de autenticación Basic
@@ -167,117 +315,355 @@ security = HTTPBasic()
 
 
 @app.get("/")
-async def root(request: Request, usuario: dict = Depends(verificar_permiso("lector"))):
-    datos_nobel: PrizesResponse = request.app.state.datos_nobel
+async def root(request: Request,
+               limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO_PAGINA),
+               cursor: Optional[str] = None,
+               fields: Optional[str] = None,
+               formato: Literal["json", "ndjson"] = Query("json", alias="format"),
+               usuario: dict = Depends(verificar_permiso("lector"))):
+    """
+    Devuelve los premios.
 
-    return datos_nobel.model_dump(exclude_none=True)
+    Sin parámetros devuelve el dataset completo. `limit` y `cursor` paginan el resultado (la respuesta
+    incluye `next_cursor`), `fields` limita los campos de cada premio y `format=ndjson` (o el
+    encabezado `Accept: application/x-ndjson`) devuelve un premio por línea a medida que se leen.
+    """
+    almacen: AlmacenPremios = request.app.state.almacen
+    cache: CacheRespuestas = request.app.state.cache_respuestas
+    campos = parsear_campos(fields)
+    desde = decodificar_cursor(cursor)
+
+    if formato == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(lineas_ndjson(almacen, desde, limit, campos, TAMANIO_LOTE_STREAMING),
+                                 media_type="application/x-ndjson")
+
+    if limit is not None or cursor:
+        premios, siguiente = almacen.pagina(desde, limit or LIMITE_MAXIMO_PAGINA)
+        return Response(content=serializar_pagina(premios, siguiente, campos), media_type="application/json")
+
+    if campos:
+        entrada = cache.obtener(("/", campos), almacen.version(),
+                                lambda: b'{"prizes":' + serializar_premios(almacen.todos().prizes, campos) + b"}")
+    else:
+        entrada = cache.obtener("/", almacen.version(),
+                                lambda: adaptador_datos.dump_json(almacen.todos(), exclude_none=True))
+    return await respuesta_cacheada(request, entrada)
+
+
+@app.get("/prizes")
+async def get_prizes_by_range(
+        request: Request,
+        desde: Optional[int] = Query(None, alias="from"),
+        hasta: Optional[int] = Query(None, alias="to"),
+        category: Optional[str] = None,
+        has_laureates: Optional[bool] = None,
+        usuario: dict = Depends(verificar_permiso("lector", "admin")),
+):
+    if desde is not None and hasta is not None and desde > hasta:
+        raise HTTPException(status_code=400, detail="El año inicial no puede ser mayor que el final.")
+    almacen: AlmacenPremios = request.app.state.almacen
+    cache: CacheRespuestas = request.app.state.cache_respuestas
+
+    def generar() -> bytes:
+        # Se resuelve con los índices ordenados por año, sin recorrer todo el dataset
+        premios_filtrados = almacen.por_rango(desde, hasta, category, has_laureates)
+        return adaptador_premios.dump_json(premios_filtrados, exclude_none=True)
+
+    categoria = normalizar_categoria(category) if category is not None else None
+    entrada = cache.obtener(("/prizes", desde, hasta, categoria, has_laureates), almacen.version(), generar)
+    return await respuesta_cacheada(request, entrada)
 
 
 @app.get("/prizes/{year}/{category}")
 async def get_prizes_by_year_and_category(year: int, category: str, request: Request,
                                           usuario: dict = Depends(verificar_permiso("lector", "admin"))):
-    datos_nobel: PrizesResponse = request.app.state.datos_nobel
+    almacen: AlmacenPremios = request.app.state.almacen
+    cache: CacheRespuestas = request.app.state.cache_respuestas
+
+    def generar() -> bytes:
+        # Buscar los premios por año y categoría en el almacenamiento
+        premios_filtrados = almacen.por_anio_y_categoria(year, category)
 
-    # Filtrar los premios por año y categoría
-    premios_filtrados = [premio for premio in datos_nobel.prizes if
-                         premio.year == year and premio.category.lower() == category.lower()]
+        if not premios_filtrados:
+            raise HTTPException(status_code=404,
+                                detail="No se encontraron premios para el año y la categoria especificada.")
 
-    if not premios_filtrados:
-        raise HTTPException(status_code=404,
-                            detail="No se encontraron premios para el año y la categoria especificada.")
+        return adaptador_premios.dump_json(premios_filtrados, exclude_none=True)
 
-    return [prize.model_dump(exclude_none=True) for prize in premios_filtrados]
+    entrada = cache.obtener(("/prizes", year, normalizar_categoria(category)), almacen.version(), generar)
+    return await respuesta_cacheada(request, entrada)
 
 
 @app.get("/prizes/{year}")
 async def get_prizes_by_year(year: int, request: Request,
                              usuario: dict = Depends(verificar_permiso("lector", "admin"))):
-    datos_nobel: PrizesResponse = request.app.state.datos_nobel
+    almacen: AlmacenPremios = request.app.state.almacen
+    cache: CacheRespuestas = request.app.state.cache_respuestas
 
-    # Filtrar los premios por año y categoría
-    premios_filtrados = [premio for premio in datos_nobel.prizes if premio.year == year]
+    def generar() -> bytes:
+        # Buscar los premios por año en el almacenamiento
+        premios_filtrados = almacen.por_anio(year)
 
-    if not premios_filtrados:
-        raise HTTPException(status_code=404, detail="No se encontraron premios para el año solicitado.")
+        if not premios_filtrados:
+            raise HTTPException(status_code=404, detail="No se encontraron premios para el año solicitado.")
 
-    return [prize.model_dump(exclude_none=True) for prize in premios_filtrados]
+        return adaptador_premios.dump_json(premios_filtrados, exclude_none=True)
 
+    entrada = cache.obtener(("/prizes", year), almacen.version(), generar)
+    return await respuesta_cacheada(request, entrada)
 
-@app.put("/prizes/{year}/{category}")
-async def update_prize(year: int, category: str, prize_update: PrizeUpdate, request: Request,
-                       usuario: dict = Depends(verificar_permiso("admin"))):
-    datos_nobel: PrizesResponse = request.app.state.datos_nobel
 
-    # Encuentro el primer premio que coincida con el año y la categoría
-    premio = next((p for p in datos_nobel.prizes if p.year == year and p.category.lower() == category), None)
+@app.get("/search")
+async def search_prizes(
+        request: Request,
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: int = Query(LIMITE_BUSQUEDA, ge=1, le=LIMITE_MAXIMO_BUSQUEDA),
+        usuario: dict = Depends(verificar_permiso("lector", "admin")),
+):
+    terminos = tokenizar(q)
+    if not terminos:
+        raise HTTPException(status_code=400, detail="La búsqueda no contiene términos válidos.")
+    almacen: AlmacenPremios = request.app.state.almacen
+    cache: CacheRespuestas = request.app.state.cache_respuestas
 
-    if not premio:
-        raise HTTPException(status_code=404,
-                            detail="No se encontró el premio para el año y la categoría especificados.")
+    def generar() -> bytes:
+        return adaptador_premios.dump_json(almacen.buscar(q, limit), exclude_none=True)
 
-    # Actualizar overallMotivation si se proporciona
-    if prize_update.overallMotivation is not None:
-        premio.overallMotivation = prize_update.overallMotivation
+    entrada = cache.obtener(("/search", tuple(terminos), limit), almacen.version(), generar)
+    return await respuesta_cacheada(request, entrada)
 
-    # Actualizar atributos del premio
-    if prize_update.laureates:
-        for laureate_update in prize_update.laureates:
-            laureate = next((l for l in premio.laureates if l.id == laureate_update.id), None)
-            if laureate:
-                # Actualizar atributos del laureado
-                for attr, value in laureate_update.model_dump(exclude_unset=True).items():
-                    setattr(laureate, attr, value)
-            else:
-                raise HTTPException(status_code=404,
-                                    detail=f"El laureado de ID: {laureate_update.id} no fue encontrado.")
 
-    guardar_datos_nobel_en_archivo(datos_nobel)
+@app.get("/laureates/{laureate_id}")
+async def get_laureate(laureate_id: int, request: Request,
+                       usuario: dict = Depends(verificar_permiso("lector", "admin"))):
+    almacen: AlmacenPremios = request.app.state.almacen
+    cache: CacheRespuestas = request.app.state.cache_respuestas
 
-    return premio
+    def generar() -> bytes:
+        laureado = almacen.laureado(laureate_id)
 
+        if not laureado:
+            raise HTTPException(status_code=404, detail=f"El laureado de ID: {laureate_id} no fue encontrado.")
 
-@app.delete("/prizes/{year}/{category}")
-async def delete_prize(year: int, category: str, request: Request, usuario: dict = Depends(verificar_permiso("admin"))):
-    datos_nobel: PrizesResponse = request.app.state.datos_nobel
+        return laureado.model_dump_json(exclude_none=True).encode()
+
+    entrada = cache.obtener(("/laureates", laureate_id), almacen.version(), generar)
+    return await respuesta_cacheada(request, entrada)
+
+
+@app.get("/stats")
+async def get_stats(request: Request, usuario: dict = Depends(verificar_permiso("lector", "admin"))):
+    """
+    Devuelve los agregados del dataset: premios por categoría, por década y por cantidad de laureados,
+    laureados por `share` y las proporciones de premios y laureados compartidos.
+
+    Los agregados se mantienen en cada mutación, así que la respuesta no recorre el dataset.
+    """
+    almacen: AlmacenPremios = request.app.state.almacen
+    cache: CacheRespuestas = request.app.state.cache_respuestas
+
+    entrada = cache.obtener("/stats", almacen.version(),
+                            lambda: dumps(almacen.estadisticas(), ensure_ascii=False).encode())
+    return await respuesta_cacheada(request, entrada)
+
+
+def historial_insuficiente(version: int) -> HTTPException:
+    return HTTPException(status_code=410, detail=f"Los cambios pedidos ya no están en el historial; la versión "
+                                                 f"actual es {version}: hay que releer los datos desde ella.")
+
+
+async def esperar_cambios(request: Request, almacen: AlmacenPremios, version: int, timeout: float):
+    """
+    Espera hasta que la versión supere `version` o pasen `timeout` segundos, de a un segundo por vez
+    para dejar de esperar si el cliente se desconecta.
+    """
+    loop = asyncio.get_running_loop()
+    fin = loop.time() + timeout
+    while (restante := fin - loop.time()) > 0:
+        if await almacen.esperar_cambios(version, min(restante, 1.0)) or await request.is_disconnected():
+            return
+
+
+@app.get("/changes")
+async def get_changes(
+        request: Request,
+        since: Optional[int] = Query(None, ge=0),
+        timeout: float = Query(0, ge=0, le=TIMEOUT_MAXIMO_CAMBIOS),
+        limit: int = Query(LIMITE_CAMBIOS, ge=1, le=LIMITE_CAMBIOS),
+        usuario: dict = Depends(verificar_permiso("lector", "admin")),
+):
+    """
+    Devuelve las mutaciones posteriores a la versión `since`, en orden, para que las cachés y réplicas
+    apliquen o invaliden exactamente lo que cambió.
 
-    # Encuentro el primer premio que coincida con el año y la categoría
-    premio = next((p for p in datos_nobel.prizes if p.year == year and p.category.lower() == category), None)
+    Cada cambio es la entrada de journal de una mutación (`put`, `delete`, `create` o `batch`) con la
+    `version` que produjo. La respuesta incluye en `version` desde dónde pedir la siguiente página. Con
+    `timeout`, si no hay cambios espera hasta ese tiempo a que los haya (long-poll). Sin `since`,
+    devuelve solo la versión actual, para empezar a seguir el feed desde ella.
+
+    Si los cambios pedidos ya no están en el historial responde 410 Gone: hay que releer los datos
+    y seguir desde la versión actual.
+    """
+    almacen: AlmacenPremios = request.app.state.almacen
+    if since is None:
+        return {"version": almacen.version(), "changes": []}
+    if timeout:
+        await esperar_cambios(request, almacen, since, timeout)
+
+    cambios = almacen.cambios_desde(since, limit)
+    if cambios is None:
+        raise historial_insuficiente(almacen.version())
+    cuerpo = {"version": cambios[-1]["version"] if cambios else since, "changes": cambios}
+    return Response(content=dumps(cuerpo, ensure_ascii=False).encode(), media_type="application/json")
+
+
+async def eventos_cambios(almacen: AlmacenPremios, desde: int) -> AsyncIterator[str]:
+    """
+    Genera los eventos SSE del feed de cambios a partir de la versión `desde`, durante DURACION_MAXIMA_SSE.
+
+    Cada cambio es un evento `change` cuyo `id` es su versión. Si los cambios pendientes salen del
+    historial, envía un evento `reset` con la versión actual y sigue desde ella.
+    """
+    loop = asyncio.get_running_loop()
+    fin = loop.time() + DURACION_MAXIMA_SSE
+    yield "retry: 1000\n\n"
+    while (restante := fin - loop.time()) > 0:
+        cambios = almacen.cambios_desde(desde, LIMITE_CAMBIOS)
+        if cambios is None:
+            desde = almacen.version()
+            yield f"id: {desde}\nevent: reset\ndata: {dumps({'version': desde})}\n\n"
+        elif cambios:
+            desde = cambios[-1]["version"]
+            yield "".join(f"id: {cambio['version']}\nevent: change\ndata: {dumps(cambio, ensure_ascii=False)}\n\n"
+                          for cambio in cambios)
+        elif not await almacen.esperar_cambios(desde, min(restante, INTERVALO_LATIDO_SSE)):
+            yield ": latido\n\n"
+
+
+@app.get("/changes/stream")
+async def stream_changes(request: Request, since: Optional[int] = Query(None, ge=0),
+                         usuario: dict = Depends(verificar_permiso("lector", "admin"))):
+    """
+    Transmite el feed de cambios como Server-Sent Events (ver `/changes`).
+
+    Empieza después de la versión del encabezado `Last-Event-ID` (el que envía el navegador al
+    reconectarse), o de `since`, o de la versión actual. La conexión se cierra después de
+    DURACION_MAXIMA_SSE segundos y el cliente se reconecta desde el último evento recibido.
+    """
+    almacen: AlmacenPremios = request.app.state.almacen
+    ultimo_evento = request.headers.get("last-event-id", "")
+    desde = int(ultimo_evento) if ultimo_evento.isdigit() else since
+    return StreamingResponse(eventos_cambios(almacen, almacen.version() if desde is None else desde),
+                             media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-    if not premio:
-        raise HTTPException(status_code=404,
-                            detail="No se encontró el premio para el año y la categoría especificados.")
 
-    # Eliminar el premio de la lista
-    datos_nobel.prizes.remove(premio)
+@app.put("/prizes/{year}/{category}")
+async def update_prize(year: int, category: str, prize_update: PrizeUpdate, request: Request,
+                       usuario: dict = Depends(verificar_permiso("admin"))):
+    almacen: AlmacenPremios = request.app.state.almacen
 
-    guardar_datos_nobel_en_archivo(datos_nobel)
+    return premio_a_modelo(await almacen.actualizar(year, category, prize_update))
+
+
+@app.delete("/prizes/{year}/{category}")
+async def delete_prize(year: int, category: str, request: Request, usuario: dict = Depends(verificar_permiso("admin"))):
+    almacen: AlmacenPremios = request.app.state.almacen
+
+    await almacen.eliminar(year, category)
 
     return {"detail": "Premio eliminado exitosamente."}
 
 
 @app.post("/prize")
 async def create_prize(prize: Prize, request: Request, usuario: dict = Depends(verificar_permiso("admin"))):
-    datos_nobel: PrizesResponse = request.app.state.datos_nobel
+    almacen: AlmacenPremios = request.app.state.almacen
+
+    nuevo_premio = await almacen.crear(prize)
+
+    return premio_a_dict(nuevo_premio)
+
 
-    # Calculamos el ID inicial basándonos en los laureados existentes en todos los premios
-    laureates = [l for p in datos_nobel.prizes for l in p.laureates]
-    max_id = get_max_laureate_id(laureates)
+def validar_tamanio_lote(lote: list):
+    if not lote:
+        raise HTTPException(status_code=400, detail="El lote está vacío.")
+    if len(lote) > TAMANIO_MAXIMO_LOTE:
+        raise HTTPException(status_code=413, detail=f"El lote supera el máximo de {TAMANIO_MAXIMO_LOTE} elementos.")
 
-    # Asignamos IDs secuenciales a los nuevos laureados
-    nuevos_laureados = []
 
-    for laureado in prize.laureates:
-        max_id += 1
-        laureado.id = max_id
-        nuevos_laureados.append(laureado)
+@app.post("/prizes:batch")
+async def create_prizes_batch(prizes: List[Prize], request: Request,
+                              usuario: dict = Depends(verificar_permiso("admin"))):
+    validar_tamanio_lote(prizes)
+    almacen: AlmacenPremios = request.app.state.almacen
 
-    # Crear un nuevo premio
-    nuevo_premio = Prize(year=prize.year, category=prize.category, laureates=nuevos_laureados,
-                         overallMotivation=prize.overallMotivation)
+    nuevos_premios = await almacen.crear_lote(prizes)
 
-    # Agregar el nuevo premio a la lista de premios
-    datos_nobel.prizes.append(nuevo_premio)
+    return [premio_a_dict(premio) for premio in nuevos_premios]
 
-    guardar_datos_nobel_en_archivo(datos_nobel)
 
-    return nuevo_premio.model_dump(exclude_none=True)
+@app.put("/prizes:batch")
+async def update_prizes_batch(cambios: List[PrizeBatchUpdate], request: Request,
+                              usuario: dict = Depends(verificar_permiso("admin"))):
+    validar_tamanio_lote(cambios)
+    almacen: AlmacenPremios = request.app.state.almacen
+
+    return [premio_a_modelo(premio) for premio in await almacen.actualizar_lote(cambios)]
+
+
+@app.delete("/prizes:batch")
+async def delete_prizes_batch(claves: List[PrizeKey], request: Request,
+                              usuario: dict = Depends(verificar_permiso("admin"))):
+    validar_tamanio_lote(claves)
+    almacen: AlmacenPremios = request.app.state.almacen
+
+    await almacen.eliminar_lote(claves)
+
+    return {"detail": f"Se eliminaron {len(claves)} premios."}
+
+
+@app.get("/health")
+async def get_health(request: Request, usuario: dict = Depends(verificar_permiso("lector", "admin"))):
+    """
+    Estado del servicio para los chequeos de salud del gateway. No recorre los datos: solo consulta
+    la versión del almacenamiento, que falla si este no responde.
+    """
+    almacen: AlmacenPremios = request.app.state.almacen
+    return {"status": "ok", "version": almacen.version()}
+
+
+@app.get("/metrics")
+async def get_metrics(usuario: dict = Depends(verificar_permiso("admin"))):
+    """
+    Devuelve las métricas del servicio en el formato de texto de Prometheus.
+    """
+    return metricas.respuesta()
+
+
+@app.get("/profiles")
+async def get_profiles(usuario: dict = Depends(verificar_permiso("admin"))):
+    """
+    Devuelve el resumen de las últimas peticiones perfiladas, de la más reciente a la más vieja.
+
+    Se perfilan las peticiones de un admin con el encabezado `X-Perfilar: 1` y, si `PERFILADO_TASA`
+    es mayor que 0, una fracción de todas las peticiones.
+    """
+    return perfilador.listar()
+
+
+@app.get("/profiles/{perfil_id}")
+async def get_profile(perfil_id: int,
+                      orden: Literal[ORDENES] = "cumulative",
+                      lineas: int = Query(60, ge=1, le=1000),
+                      formato: Literal["texto", "pstats"] = Query("texto", alias="format"),
+                      usuario: dict = Depends(verificar_permiso("admin"))):
+    """
+    Devuelve el informe de pstats de un perfil ordenado por `orden`, o con `format=pstats` el
+    archivo para abrir con pstats o snakeviz.
+    """
+    perfil = perfilador.obtener(perfil_id)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="No se encontró el perfil solicitado.")
+    if formato == "pstats":
+        return Response(content=perfil.pstats(), media_type="application/octet-stream",
+                        headers={"Content-Disposition": f'attachment; filename="perfil-{perfil_id}.pstats"'})
+    return Response(content=perfil.texto(orden, lineas), media_type="text/plain; charset=utf-8")
@@ -0,0 +1,175 @@
+"""
+Genera un dataset sintético de premios con el formato de bd.json, de cualquier tamaño.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.dataset_sintetico DESTINO --premios N [--origen ./datos/bd.json] [--semilla S]
+
+Con `--origen` replica los premios reales desplazando, en cada copia, los años y los IDs de
+laureados, de modo que los pares (año, categoría) y los IDs sigan siendo únicos. Sin `--origen`
+genera premios con la misma forma que los reales: seis categorías por año, de cero a tres laureados
+por premio y motivaciones con vocabulario variado. El archivo se escribe a medida que se genera,
+sin tener todo el dataset en memoria.
+"""
+import argparse
+import json
+import random
+import re
+from typing import Iterable, Iterator, List, Optional
+
+CATEGORIAS = ("physics", "chemistry", "medicine", "literature", "peace", "economics")
+PALABRAS = ("discovery", "theory", "work", "radiation", "quantum", "molecular", "cell", "structure", "peace",
+            "poetry", "novel", "economic", "analysis", "market", "genetic", "immune", "particle", "energy",
+            "chemical", "synthesis", "reactions", "human", "rights", "literary", "contributions", "development",
+            "methods", "research", "nuclear", "electron", "crystal", "protein", "climate", "international",
+            "cooperation", "prose", "drama", "welfare", "behaviour", "neutrino")
+# Cantidad de claves, laureados y términos de búsqueda que se conservan como muestra del dataset
+TAMANIO_MUESTRA = 10000
+TERMINOS_MUESTRA = 200
+
+
+class MuestraDataset:
+    """
+    Muestra uniforme (reservoir sampling) de las claves (año, categoría) y los IDs de laureados de un
+    dataset, más los términos de búsqueda y el rango de años, para elegir peticiones válidas en la carga.
+    """
+
+    def __init__(self, tamanio: int = TAMANIO_MUESTRA, semilla: int = 0):
+        self.tamanio = tamanio
+        self.premios = 0
+        self.claves: List[List] = []
+        self.laureados: List[int] = []
+        self.terminos: List[str] = []
+        self.anios = [None, None]
+        self._laureados_vistos = 0
+        self._azar = random.Random(semilla)
+
+    def agregar(self, premio: dict):
+        self.premios += 1
+        self._muestrear(self.claves, [premio["year"], premio["category"]], self.premios)
+        anio_min, anio_max = self.anios
+        self.anios = [premio["year"] if anio_min is None else min(anio_min, premio["year"]),
+                      premio["year"] if anio_max is None else max(anio_max, premio["year"])]
+        for laureado in premio.get("laureates") or ():
+            if laureado.get("id") is not None:
+                self._laureados_vistos += 1
+                self._muestrear(self.laureados, laureado["id"], self._laureados_vistos)
+            if len(self.terminos) < TERMINOS_MUESTRA:
+                for palabra in re.findall(r"[a-z]{5,}", (laureado.get("motivation") or "").lower()):
+                    if palabra not in self.terminos and len(self.terminos) < TERMINOS_MUESTRA:
+                        self.terminos.append(palabra)
+
+    def _muestrear(self, muestra: list, valor, vistos: int):
+        if len(muestra) < self.tamanio:
+            muestra.append(valor)
+            return
+        i = self._azar.randrange(vistos)
+        if i < self.tamanio:
+            muestra[i] = valor
+
+    def a_dict(self) -> dict:
+        return {"premios": self.premios, "claves": self.claves, "laureados": self.laureados,
+                "terminos": self.terminos, "anios": self.anios}
+
+
+def premios_sinteticos(cantidad: int, semilla: int = 0) -> Iterator[dict]:
+    azar = random.Random(semilla)
+    id_laureado = 0
+    for i in range(cantidad):
+        premio = {"year": 1901 + i // len(CATEGORIAS), "category": CATEGORIAS[i % len(CATEGORIAS)]}
+        if azar.random() < 0.1:
+            premio.update(laureates=[], overallMotivation="No Nobel Prize was awarded")
+            yield premio
+            continue
+        cantidad_laureados = azar.choice((1, 1, 2, 3))
+        laureados = []
+        for _ in range(cantidad_laureados):
+            id_laureado += 1
+            laureados.append({
+                "id": id_laureado,
+                "firstname": f"Nombre{id_laureado}",
+                "surname": f"Apellido{id_laureado}",
+                "motivation": '"for ' + " ".join(azar.sample(PALABRAS, 6)) + '"',
+                "share": str(cantidad_laureados),
+            })
+        premio["laureates"] = laureados
+        yield premio
+
+
+def replicar(premios_base: List[dict], cantidad: int) -> Iterator[dict]:
+    """
+    Repite los premios base hasta llegar a `cantidad`, desplazando años e IDs en cada copia.
+    """
+    if not premios_base:
+        raise ValueError("El dataset de origen no tiene premios.")
+    anios = [premio["year"] for premio in premios_base]
+    desplazamiento_anios = max(anios) - min(anios) + 1
+    desplazamiento_ids = max((laureado.get("id") or 0 for premio in premios_base
+                              for laureado in premio.get("laureates") or ()), default=0)
+    generados = 0
+    copia = 0
+    while generados < cantidad:
+        for premio in premios_base:
+            if generados == cantidad:
+                return
+            nuevo = dict(premio, year=premio["year"] + copia * desplazamiento_anios)
+            nuevo["laureates"] = [
+                dict(laureado, id=laureado["id"] + copia * desplazamiento_ids) if laureado.get("id") is not None
+                else dict(laureado)
+                for laureado in premio.get("laureates") or ()
+            ]
+            generados += 1
+            yield nuevo
+        copia += 1
+
+
+def escribir(destino: str, premios: Iterable[dict], muestra: Optional[MuestraDataset] = None) -> MuestraDataset:
+    """
+    Escribe los premios en `destino` con el formato de bd.json y devuelve la muestra del dataset.
+    """
+    muestra = muestra or MuestraDataset()
+    with open(destino, "w", encoding="utf-8") as archivo:
+        archivo.write('{"prizes": [')
+        for i, premio in enumerate(premios):
+            if i:
+                archivo.write(",\n")
+            archivo.write(json.dumps(premio, ensure_ascii=False))
+            muestra.agregar(premio)
+        archivo.write("]}\n")
+    return muestra
+
+
+def generar(destino: str, cantidad: int, origen: Optional[str] = None, semilla: int = 0) -> MuestraDataset:
+    if origen:
+        with open(origen, "r", encoding="utf-8") as f:
+            premios = replicar(json.load(f)["prizes"], cantidad)
+    else:
+        premios = premios_sinteticos(cantidad, semilla)
+    return escribir(destino, premios, MuestraDataset(semilla=semilla))
+
+
+def muestra_de_archivo(ruta: str, semilla: int = 0) -> MuestraDataset:
+    """
+    Construye la muestra de un bd.json existente.
+    """
+    with open(ruta, "r", encoding="utf-8") as f:
+        premios = json.load(f)["prizes"]
+    muestra = MuestraDataset(semilla=semilla)
+    for premio in premios:
+        muestra.agregar(premio)
+    return muestra
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("destino")
+    parser.add_argument("--premios", type=int, required=True)
+    parser.add_argument("--origen", help="bd.json real a replicar; si se omite, los premios se generan.")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    muestra = generar(args.destino, args.premios, args.origen, args.semilla)
+    print(json.dumps({"premios": muestra.premios, "anios": muestra.anios}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Generador de carga asíncrono para el gateway (api.py) o el servidor final (api_bd.py).
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.generador_carga URL --dataset ./datos/bd.json [--objetivo gateway|api_bd]
+        [--duracion 10] [--concurrencia 32] [--escrituras 0.1]
+
+Cada worker envía una petición a la vez durante `--duracion` segundos (carga cerrada): con
+probabilidad `--escrituras` actualiza un premio, y si no hace una lectura elegida según
+PESOS_LECTURAS. Las claves, laureados y términos de búsqueda salen de una muestra del dataset,
+por lo que todas las peticiones son válidas. Imprime como JSON el throughput y los percentiles de
+latencia por operación y en total.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.dataset_sintetico import MuestraDataset, muestra_de_archivo
+
+# Usuarios de lectura y de escritura de cada servicio
+CREDENCIALES = {
+    "gateway": {"lectura": ("user", "user123"), "escritura": ("admin", "admin123")},
+    "api_bd": {"lectura": ("lector", "lector1234"), "escritura": ("admin", "admin1234")},
+}
+# Proporción relativa de cada tipo de lectura
+PESOS_LECTURAS = {"premio": 40, "anio": 20, "laureado": 15, "busqueda": 10, "rango": 10, "pagina": 5}
+TIMEOUT = 30.0
+
+
+def elegir_peticion(operacion: str, muestra: MuestraDataset, azar: random.Random,
+                    numero: int) -> Tuple[str, str, Optional[dict], Optional[dict]]:
+    """
+    Devuelve el método, la ruta, los parámetros y el cuerpo JSON de una petición de la operación dada.
+    """
+    if operacion == "actualizacion":
+        anio, categoria = azar.choice(muestra.claves)
+        return "PUT", f"/prizes/{anio}/{categoria}", None, {"overallMotivation": f"benchmark {numero}"}
+    if operacion == "premio":
+        anio, categoria = azar.choice(muestra.claves)
+        return "GET", f"/prizes/{anio}/{categoria}", None, None
+    if operacion == "anio":
+        return "GET", f"/prizes/{azar.choice(muestra.claves)[0]}", None, None
+    if operacion == "laureado":
+        return "GET", f"/laureates/{azar.choice(muestra.laureados)}", None, None
+    if operacion == "busqueda":
+        return "GET", "/search", {"q": azar.choice(muestra.terminos)}, None
+    if operacion == "rango":
+        desde = azar.choice(muestra.claves)[0]
+        return "GET", "/prizes", {"from": desde, "to": desde + 4}, None
+    if operacion == "pagina":
+        return "GET", "/", {"limit": 100}, None
+    raise ValueError(f"Operación desconocida: {operacion}")
+
+
+def percentil(ordenadas: List[float], p: float) -> float:
+    """
+    Percentil `p` (0-100) por rango más cercano de una lista ya ordenada.
+    """
+    if not ordenadas:
+        return 0.0
+    indice = max(0, min(len(ordenadas) - 1, round(p / 100 * len(ordenadas)) - 1))
+    return ordenadas[indice]
+
+
+def resumir(latencias: List[float], errores: int, duracion: float) -> dict:
+    ordenadas = sorted(latencias)
+    return {
+        "peticiones": len(ordenadas),
+        "errores": errores,
+        "rps": round(len(ordenadas) / duracion, 1) if duracion else 0.0,
+        "p50_ms": round(percentil(ordenadas, 50) * 1000, 2),
+        "p95_ms": round(percentil(ordenadas, 95) * 1000, 2),
+        "p99_ms": round(percentil(ordenadas, 99) * 1000, 2),
+        "max_ms": round(ordenadas[-1] * 1000, 2) if ordenadas else 0.0,
+    }
+
+
+async def ejecutar(url: str, muestra: MuestraDataset, objetivo: str = "gateway", duracion: float = 10.0,
+                   concurrencia: int = 32, fraccion_escritura: float = 0.0, semilla: int = 0) -> dict:
+    """
+    Ejecuta la carga contra `url` y devuelve el resumen total y por operación.
+
+    Las latencias incluyen la lectura completa del cuerpo. Las respuestas con código 4xx o 5xx y los
+    errores de conexión cuentan como errores y no entran en los percentiles.
+    """
+    lectura = httpx.BasicAuth(*CREDENCIALES[objetivo]["lectura"])
+    escritura = httpx.BasicAuth(*CREDENCIALES[objetivo]["escritura"])
+    operaciones, pesos = zip(*PESOS_LECTURAS.items())
+    latencias: Dict[str, List[float]] = defaultdict(list)
+    errores: Dict[str, int] = defaultdict(int)
+    contador = 0
+
+    async def worker(cliente: httpx.AsyncClient, azar: random.Random, fin: float):
+        nonlocal contador
+        while time.perf_counter() < fin:
+            escribe = azar.random() < fraccion_escritura
+            operacion = "actualizacion" if escribe else azar.choices(operaciones, pesos)[0]
+            contador += 1
+            metodo, ruta, params, cuerpo = elegir_peticion(operacion, muestra, azar, contador)
+            inicio = time.perf_counter()
+            try:
+                respuesta = await cliente.request(metodo, ruta, params=params, json=cuerpo,
+                                                  auth=escritura if escribe else lectura)
+            except httpx.HTTPError:
+                errores[operacion] += 1
+                continue
+            if respuesta.status_code >= 400:
+                errores[operacion] += 1
+            else:
+                latencias[operacion].append(time.perf_counter() - inicio)
+
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=TIMEOUT) as cliente:
+        inicio = time.perf_counter()
+        fin = inicio + duracion
+        await asyncio.gather(*(worker(cliente, random.Random(semilla * 1000 + i), fin) for i in range(concurrencia)))
+        transcurrido = time.perf_counter() - inicio
+
+    todas = [latencia for valores in latencias.values() for latencia in valores]
+    return {
+        "objetivo": objetivo,
+        "concurrencia": concurrencia,
+        "fraccion_escritura": fraccion_escritura,
+        "duracion_s": round(transcurrido, 2),
+        "total": resumir(todas, sum(errores.values()), transcurrido),
+        "operaciones": {operacion: resumir(latencias[operacion], errores[operacion], transcurrido)
+                        for operacion in sorted(set(latencias) | set(errores))},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url")
+    parser.add_argument("--dataset", default="./datos/bd.json", help="bd.json del que se toman claves válidas.")
+    parser.add_argument("--objetivo", choices=tuple(CREDENCIALES), default="gateway")
+    parser.add_argument("--duracion", type=float, default=10.0)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--escrituras", type=float, default=0.0, help="Fracción de peticiones que son escrituras.")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    muestra = muestra_de_archivo(args.dataset, args.semilla)
+    resultado = asyncio.run(ejecutar(args.url, muestra, args.objetivo, args.duracion, args.concurrencia,
+                                     args.escrituras, args.semilla))
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == "__main__":
+    main()
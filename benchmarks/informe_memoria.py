@@ -0,0 +1,64 @@
+"""
+Compara la memoria ocupada por el dataset con modelos de Pydantic y con los registros compactos.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.informe_memoria [ruta_json] [--repetir N]
+
+Carga el archivo (por defecto ./datos/bd.json) de las dos formas, mide con tracemalloc la memoria que
+queda retenida y el tiempo de carga y de serialización, e imprime el resultado como JSON.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from almacenamiento.registros import adaptador_datos
+from modelos.api_bd.modelos_bd import PrizesResponse
+
+
+def medir(cargar, serializar, contenido: dict) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    datos = cargar(contenido)
+    carga_ms = (time.perf_counter() - inicio) * 1000
+    gc.collect()
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    inicio = time.perf_counter()
+    tamanio_json = len(serializar(datos))
+    serializacion_ms = (time.perf_counter() - inicio) * 1000
+
+    premios = len(datos.prizes)
+    return {"premios": premios, "bytes": memoria, "bytes_por_premio": round(memoria / max(premios, 1)),
+            "carga_ms": round(carga_ms, 1), "serializacion_ms": round(serializacion_ms, 1),
+            "bytes_json": tamanio_json}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("ruta", nargs="?", default="./datos/bd.json")
+    parser.add_argument("--repetir", type=int, default=1,
+                        help="Repite los premios N veces para simular un dataset más grande.")
+    args = parser.parse_args()
+
+    with open(args.ruta, "r", encoding="utf-8") as f:
+        contenido = json.load(f)
+    contenido = {"prizes": contenido["prizes"] * args.repetir}
+
+    pydantic = medir(PrizesResponse.model_validate,
+                     lambda datos: datos.model_dump_json(exclude_none=True), contenido)
+    compacto = medir(adaptador_datos.validate_python,
+                     lambda datos: adaptador_datos.dump_json(datos, exclude_none=True), contenido)
+    informe = {
+        "pydantic": pydantic,
+        "compacto": compacto,
+        "ahorro_memoria": round(1 - compacto["bytes"] / pydantic["bytes"], 3),
+    }
+    print(json.dumps(informe, indent=2))
+
+
+if __name__ == "__main__":
+    main()
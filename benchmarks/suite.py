@@ -0,0 +1,288 @@
+"""
+Suite de benchmarks de la cadena gateway -> servidor final.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.suite [--tamanios 1000,100000] [--escenarios lectura,mixta] [--duracion 10]
+        [--concurrencia 32] [--origen ./datos/bd.json] [--almacenamiento json|sqlite]
+        [--salida resultados.json] [--base resultados_anteriores.json]
+
+Por cada tamaño genera un dataset sintético (ver benchmarks.dataset_sintetico) en un directorio
+temporal y levanta api_bd.py dos veces para medir el arranque: el primero parsea el JSON y el
+segundo puede usar el snapshot binario. Después levanta api.py y corre cada escenario con el
+generador de carga (ver benchmarks.generador_carga), midiendo además el costo de persistencia
+por mutación a partir de /metrics del servidor final.
+
+El resultado es un JSON con el commit, los parámetros y, por tamaño, el arranque, la memoria y
+el throughput y los percentiles de cada escenario. Con `--base` se agrega la comparación contra
+un resultado anterior (cociente nuevo/base del throughput y del p99).
+
+Los servidores y el generador de carga corren en la misma máquina y, con pocos núcleos, compiten
+por la CPU: solo tiene sentido comparar resultados obtenidos en la misma máquina.
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import platform
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.dataset_sintetico import generar
+from benchmarks.generador_carga import CREDENCIALES, ejecutar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Escenarios: servicio al que se envía la carga y fracción de escrituras
+ESCENARIOS = {
+    "lectura": ("gateway", 0.0),
+    "mixta": ("gateway", 0.1),
+    "escritura": ("gateway", 1.0),
+    "lectura_directa": ("api_bd", 0.0),
+}
+# Los límites de tasa se desactivan en la práctica: la carga sale toda de la misma IP
+ENTORNO_SIN_LIMITES = {
+    "LIMITE_TASA": "1000000", "LIMITE_RAFAGA": "1000000",
+    "LIMITE_TASA_GATEWAY": "1000000", "LIMITE_RAFAGA_GATEWAY": "1000000",
+    "LIMITES_POR_RUTA": "{}",
+}
+TIEMPO_MAXIMO_ARRANQUE = float(os.getenv("BENCHMARK_TIEMPO_MAXIMO_ARRANQUE", "900"))
+
+
+class Servidor:
+    """
+    Proceso de uvicorn con una de las aplicaciones, con su salida en un archivo de log.
+    """
+
+    def __init__(self, aplicacion: str, directorio: str, entorno: Dict[str, str]):
+        self.aplicacion = aplicacion
+        self.directorio = directorio
+        self.puerto = puerto_libre()
+        self.url = f"http://127.0.0.1:{self.puerto}"
+        self.log = os.path.join(directorio, f"{aplicacion.split(':')[0]}.log")
+        self.entorno = {**os.environ, **ENTORNO_SIN_LIMITES, **entorno, "PYTHONPATH": RAIZ, "PYTHONUNBUFFERED": "1"}
+        self.proceso: Optional[subprocess.Popen] = None
+
+    def iniciar(self, ruta_lista: str, auth: httpx.BasicAuth) -> float:
+        """
+        Inicia el proceso y espera a que responda `ruta_lista`.
+
+        Retorna:
+            float: Milisegundos desde que se lanzó el proceso hasta la primera respuesta exitosa.
+        """
+        inicio = time.perf_counter()
+        with open(self.log, "a", encoding="utf-8") as log:
+            comando = [sys.executable, "-m", "uvicorn", self.aplicacion, "--port", str(self.puerto),
+                       "--log-level", "warning"]
+            self.proceso = subprocess.Popen(comando, cwd=self.directorio, env=self.entorno, stdout=log,
+                                            stderr=subprocess.STDOUT)
+        while time.perf_counter() - inicio < TIEMPO_MAXIMO_ARRANQUE:
+            if self.proceso.poll() is not None:
+                raise RuntimeError(f"{self.aplicacion} terminó al iniciar; ver {self.log}")
+            try:
+                if httpx.get(self.url + ruta_lista, auth=auth, timeout=5).status_code == 200:
+                    return round((time.perf_counter() - inicio) * 1000, 1)
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.05)
+        self.detener()
+        raise RuntimeError(f"{self.aplicacion} no respondió en {TIEMPO_MAXIMO_ARRANQUE} s; ver {self.log}")
+
+    def detener(self):
+        if self.proceso is None or self.proceso.poll() is not None:
+            return
+        # SIGINT permite que la aplicación cierre el almacenamiento (vaciar el journal) antes de salir
+        self.proceso.send_signal(signal.SIGINT)
+        try:
+            self.proceso.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            self.proceso.kill()
+            self.proceso.wait()
+
+    def memoria_rss_mb(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.proceso.pid}/status", "r") as f:
+                linea = next(linea for linea in f if linea.startswith("VmRSS:"))
+        except (OSError, StopIteration):
+            return None
+        return round(int(linea.split()[1]) / 1024, 1)
+
+    def informe_inicio(self) -> Optional[dict]:
+        """
+        Devuelve el último informe de arranque que api_bd imprime ("API lista en ... ms: {...}").
+        """
+        with open(self.log, "r", encoding="utf-8") as f:
+            informes = re.findall(r"API lista en [\d.]+ ms: (\{.*\})", f.read())
+        return ast.literal_eval(informes[-1]) if informes else None
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def metricas_persistencia(url: str) -> Dict[str, Dict[str, float]]:
+    """
+    Lee de /metrics del servidor final la suma y la cantidad de escrituras y bytes por operación.
+    """
+    texto = httpx.get(url + "/metrics", auth=httpx.BasicAuth(*CREDENCIALES["api_bd"]["escritura"]), timeout=30).text
+    valores: Dict[str, Dict[str, float]] = {}
+    for metrica, sufijo, operacion, valor in re.findall(
+            r'^persistencia_(duracion_segundos|bytes)_(sum|count)\{operacion="(\w+)"\} (\S+)$', texto, re.MULTILINE):
+        valores.setdefault(operacion, {})[f"{metrica}_{sufijo}"] = float(valor)
+    return valores
+
+
+def costo_persistencia(antes: dict, despues: dict, mutaciones: int) -> dict:
+    """
+    Calcula, entre dos lecturas de `metricas_persistencia`, las escrituras a disco de cada operación
+    y el costo promedio por mutación.
+    """
+    resultado = {"mutaciones": mutaciones}
+    total_segundos = total_bytes = 0.0
+    for operacion, valores in despues.items():
+        previos = antes.get(operacion, {})
+        escrituras = valores.get("duracion_segundos_count", 0) - previos.get("duracion_segundos_count", 0)
+        segundos = valores.get("duracion_segundos_sum", 0) - previos.get("duracion_segundos_sum", 0)
+        bytes_escritos = valores.get("bytes_sum", 0) - previos.get("bytes_sum", 0)
+        if not escrituras:
+            continue
+        total_segundos += segundos
+        total_bytes += bytes_escritos
+        resultado[operacion] = {
+            "escrituras": int(escrituras),
+            "ms_por_escritura": round(segundos / escrituras * 1000, 3),
+            "bytes": int(bytes_escritos),
+        }
+    if mutaciones:
+        resultado["ms_por_mutacion"] = round(total_segundos / mutaciones * 1000, 3)
+        resultado["bytes_por_mutacion"] = round(total_bytes / mutaciones, 1)
+    return resultado
+
+
+def medir_tamanio(premios: int, escenarios: List[str], args: argparse.Namespace) -> dict:
+    directorio = tempfile.mkdtemp(prefix=f"benchmark-{premios}-")
+    try:
+        os.makedirs(os.path.join(directorio, "datos"))
+        ruta_json = os.path.join(directorio, "datos", "bd.json")
+        inicio = time.perf_counter()
+        muestra = generar(ruta_json, premios, args.origen)
+        resultado = {
+            "premios": premios,
+            "almacenamiento": args.almacenamiento,
+            "bytes_json": os.path.getsize(ruta_json),
+            "generacion_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "arranque": {},
+            "escenarios": {},
+        }
+
+        api_bd = Servidor("api_bd:app", directorio, {"BD_ALMACENAMIENTO": args.almacenamiento})
+        admin_bd = httpx.BasicAuth(*CREDENCIALES["api_bd"]["escritura"])
+        for arranque in ("inicial", "rearranque"):
+            hasta_listo_ms = api_bd.iniciar("/metrics", admin_bd)
+            resultado["arranque"][arranque] = {"hasta_listo_ms": hasta_listo_ms, "informe": api_bd.informe_inicio()}
+            if arranque == "inicial":
+                api_bd.detener()
+        resultado["memoria_rss_mb"] = api_bd.memoria_rss_mb()
+
+        gateway = Servidor("api:app", directorio, {"API_BD_URL": api_bd.url})
+        try:
+            gateway.iniciar("/metrics", httpx.BasicAuth(*CREDENCIALES["gateway"]["escritura"]))
+            for nombre in escenarios:
+                objetivo, fraccion_escritura = ESCENARIOS[nombre]
+                url = gateway.url if objetivo == "gateway" else api_bd.url
+                antes = metricas_persistencia(api_bd.url)
+                carga = asyncio.run(ejecutar(url, muestra, objetivo, args.duracion, args.concurrencia,
+                                             fraccion_escritura))
+                mutaciones = carga["operaciones"].get("actualizacion", {}).get("peticiones", 0)
+                carga["persistencia"] = costo_persistencia(antes, metricas_persistencia(api_bd.url), mutaciones)
+                resultado["escenarios"][nombre] = carga
+                print(f"{premios} premios, {nombre}: {carga['total']}", file=sys.stderr)
+        finally:
+            gateway.detener()
+            api_bd.detener()
+        return resultado
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def comparar(resultado: dict, base: dict) -> dict:
+    """
+    Compara el throughput y el p99 de cada escenario con el de un resultado anterior (nuevo / base).
+    """
+    anteriores = {(t["premios"], t["almacenamiento"]): t for t in base.get("tamanios", [])}
+    comparacion = {}
+    for tamanio in resultado["tamanios"]:
+        anterior = anteriores.get((tamanio["premios"], tamanio["almacenamiento"]))
+        if anterior is None:
+            continue
+        for nombre, escenario in tamanio["escenarios"].items():
+            previo = anterior["escenarios"].get(nombre)
+            if previo is None or not previo["total"]["rps"] or not previo["total"]["p99_ms"]:
+                continue
+            comparacion[f"{tamanio['premios']}/{nombre}"] = {
+                "rps": round(escenario["total"]["rps"] / previo["total"]["rps"], 3),
+                "p99_ms": round(escenario["total"]["p99_ms"] / previo["total"]["p99_ms"], 3),
+            }
+    return comparacion
+
+
+def commit_actual() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=RAIZ, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanios", default="1000,100000",
+                        help="Cantidades de premios separadas por coma (hasta 1000000).")
+    parser.add_argument("--escenarios", default=",".join(ESCENARIOS),
+                        help=f"Escenarios separados por coma, entre: {', '.join(ESCENARIOS)}.")
+    parser.add_argument("--duracion", type=float, default=10.0, help="Segundos de carga por escenario.")
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--origen", help="bd.json real a replicar; si se omite, los premios se generan.")
+    parser.add_argument("--almacenamiento", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--salida", help="Archivo donde escribir el resultado; por defecto, la salida estándar.")
+    parser.add_argument("--base", help="Resultado anterior con el que comparar.")
+    args = parser.parse_args()
+
+    escenarios = [nombre.strip() for nombre in args.escenarios.split(",") if nombre.strip()]
+    desconocidos = [nombre for nombre in escenarios if nombre not in ESCENARIOS]
+    if desconocidos:
+        parser.error(f"Escenarios desconocidos: {', '.join(desconocidos)}")
+
+    resultado = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "parametros": {"duracion_s": args.duracion, "concurrencia": args.concurrencia, "origen": args.origen,
+                       "escenarios": escenarios},
+        "tamanios": [medir_tamanio(int(premios), escenarios, args) for premios in args.tamanios.split(",")],
+    }
+    if args.base:
+        with open(args.base, "r", encoding="utf-8") as f:
+            resultado["comparacion"] = comparar(resultado, json.load(f))
+
+    salida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            f.write(salida + "\n")
+    else:
+        print(salida)
+
+
+if __name__ == "__main__":
+    main()
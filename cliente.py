@@ -1,3 +1,5 @@
+import json
+
 import requests
 from requests.auth import HTTPBasicAuth
 
@@ -10,12 +12,16 @@ AUTH = HTTPBasicAuth("admin", "admin123")
 
 # Función para mostrar todos los premios
 def get_mostrar_todos():
-    r = requests.get(f"{BASE_URL}/")  # Endpoint raíz
-    if r.ok:
-        for p in r.json()['prizes']:
-            print(f"{p['year']} - {p['category']}")  # Muestra año y categoría
-    else:
-        print("Error:", r.status_code, r.text)
+    # Solo se piden año y categoría, y se reciben de a un premio por línea (NDJSON)
+    params = {"fields": "year,category", "format": "ndjson"}
+    with requests.get(f"{BASE_URL}/", params=params, stream=True) as r:  # Endpoint raíz
+        if r.ok:
+            for linea in r.iter_lines():
+                if linea:
+                    p = json.loads(linea)
+                    print(f"{p['year']} - {p['category']}")  # Muestra año y categoría
+        else:
+            print("Error:", r.status_code, r.text)
 
 
 # Función para buscar premios por año
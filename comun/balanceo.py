@@ -0,0 +1,166 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from comun.metricas import Medidor, Metrica
+
+
+class Backend:
+    """
+    Instancia del servidor final dentro del pool, con su cliente HTTP y su estado de salud.
+
+    `sano` lo decide el chequeo activo; `expulsado_hasta`, el pasivo. Una instancia recibe tráfico
+    solo si está sana y no está expulsada.
+    """
+    __slots__ = ("url", "cliente", "en_curso", "sano", "fallos_consecutivos", "expulsado_hasta",
+                 "peticiones", "errores", "expulsiones")
+
+    def __init__(self, url: str, cliente: httpx.AsyncClient):
+        self.url = url
+        self.cliente = cliente
+        self.en_curso = 0
+        self.sano = True
+        self.fallos_consecutivos = 0
+        self.expulsado_hasta = 0.0
+        self.peticiones = 0
+        self.errores = 0
+        self.expulsiones = 0
+
+    def disponible(self, ahora: float) -> bool:
+        return self.sano and self.expulsado_hasta <= ahora
+
+
+class PoolUpstream:
+    """
+    Instancias del servidor final detrás del gateway: un primario para las escrituras y una o más
+    instancias para las lecturas.
+
+    Cada lectura va a la instancia disponible con menos peticiones en curso (least outstanding
+    requests), rotando entre las empatadas para no cargar siempre la primera. Si ninguna está
+    disponible se reparten entre todas, ya que intentar es mejor que rechazar todas las lecturas. Las
+    escrituras van siempre al primario; si no está disponible, `elegir` devuelve None y quien llama
+    responde sin intentar.
+
+    La salud se controla de dos formas:
+    - Pasiva: cada error de conexión, timeout o respuesta 5xx cuenta como fallo. Tras `fallos_expulsion`
+      fallos consecutivos la instancia queda expulsada durante `tiempo_expulsion` segundos; después
+      vuelve a recibir tráfico, y un fallo más la expulsa de nuevo hasta que responda bien.
+    - Activa: `chequear_periodicamente` pide una ruta liviana a cada instancia; si no responde 200
+      queda fuera de la rotación hasta el siguiente chequeo exitoso.
+
+    Parámetros:
+        primario (str): URL de la instancia que recibe las escrituras.
+        lectura (List[str]): URLs de las instancias que reciben las lecturas; si está vacía, solo el primario.
+        crear_cliente (Callable): Crea el cliente HTTP de una instancia a partir de su URL.
+    """
+
+    def __init__(self, primario: str, lectura: List[str], crear_cliente: Callable[[str], httpx.AsyncClient],
+                 fallos_expulsion: int = 3, tiempo_expulsion: float = 10.0,
+                 reloj: Callable[[], float] = time.monotonic):
+        lectura = list(dict.fromkeys(lectura)) or [primario]
+        self.backends: Dict[str, Backend] = {url: Backend(url, crear_cliente(url))
+                                             for url in dict.fromkeys([primario, *lectura])}
+        self.primario = self.backends[primario]
+        self.lectura = [self.backends[url] for url in lectura]
+        self.fallos_expulsion = fallos_expulsion
+        self.tiempo_expulsion = tiempo_expulsion
+        self.reloj = reloj
+        self._turno = 0
+
+    def elegir(self, escritura: bool, excluir: Optional[Backend] = None) -> Optional[Backend]:
+        """
+        Elige la instancia para una petición, o None si no hay ninguna a la que enviarla.
+
+        Parámetros:
+            escritura (bool): Si la petición modifica datos y debe ir al primario.
+            excluir (Backend): Instancia a evitar, por ejemplo la que acaba de fallar en un reintento.
+        """
+        ahora = self.reloj()
+        if escritura:
+            return self.primario if self.primario.disponible(ahora) else None
+
+        candidatos = [backend for backend in self.lectura if backend is not excluir]
+        candidatos = [backend for backend in candidatos if backend.disponible(ahora)] or candidatos
+        if not candidatos:
+            return None
+        self._turno = (self._turno + 1) % len(candidatos)
+        rotados = candidatos[self._turno:] + candidatos[:self._turno]
+        return min(rotados, key=lambda backend: backend.en_curso)
+
+    def registrar(self, backend: Backend, exito: bool):
+        """
+        Registra el resultado de una petición para la expulsión pasiva.
+        """
+        backend.peticiones += 1
+        if exito:
+            backend.fallos_consecutivos = 0
+            return
+        backend.errores += 1
+        backend.fallos_consecutivos += 1
+        ahora = self.reloj()
+        if backend.fallos_consecutivos >= self.fallos_expulsion and backend.expulsado_hasta <= ahora:
+            backend.expulsado_hasta = ahora + self.tiempo_expulsion
+            backend.expulsiones += 1
+            print(f"Servidor final {backend.url} expulsado por {self.tiempo_expulsion} s "
+                  f"tras {backend.fallos_consecutivos} fallos consecutivos.")
+
+    async def chequear(self, ruta: str, auth: Optional[httpx.BasicAuth], timeout: float):
+        """
+        Chequea la salud de todas las instancias en paralelo.
+        """
+        await asyncio.gather(*(self._chequear(backend, ruta, auth, timeout) for backend in self.backends.values()))
+
+    async def _chequear(self, backend: Backend, ruta: str, auth: Optional[httpx.BasicAuth], timeout: float):
+        try:
+            respuesta = await backend.cliente.get(ruta, auth=auth, timeout=timeout)
+            sano = respuesta.status_code == 200
+        except httpx.HTTPError:
+            sano = False
+        if sano != backend.sano:
+            print(f"Servidor final {backend.url} {'disponible' if sano else 'no disponible'} según el chequeo activo.")
+        backend.sano = sano
+
+    async def chequear_periodicamente(self, intervalo: float, ruta: str, auth: Optional[httpx.BasicAuth],
+                                      timeout: float):
+        while True:
+            await self.chequear(ruta, auth, timeout)
+            await asyncio.sleep(intervalo)
+
+    async def cerrar(self):
+        await asyncio.gather(*(backend.cliente.aclose() for backend in self.backends.values()))
+
+    def estadisticas(self) -> Dict[str, dict]:
+        ahora = self.reloj()
+        return {
+            url: {
+                "primario": backend is self.primario,
+                "lectura": backend in self.lectura,
+                "sano": backend.sano,
+                "expulsado_s": round(max(0.0, backend.expulsado_hasta - ahora), 1),
+                "en_curso": backend.en_curso,
+                "peticiones": backend.peticiones,
+                "errores": backend.errores,
+                "expulsiones": backend.expulsiones,
+            }
+            for url, backend in self.backends.items()
+        }
+
+    def metricas(self) -> List[Metrica]:
+        """
+        Métricas por instancia, calculadas al exponerlas.
+        """
+        def por_instancia(valor: Callable[[Backend], float]) -> Callable[[], Dict[tuple, float]]:
+            return lambda: {(url,): valor(backend) for url, backend in self.backends.items()}
+
+        return [
+            Medidor("upstream_disponible", "Si la instancia del servidor final recibe tráfico (sana y no expulsada).",
+                    ("backend",), funcion=por_instancia(lambda backend: int(backend.disponible(self.reloj())))),
+            Medidor("upstream_en_curso", "Peticiones en curso por instancia del servidor final.", ("backend",),
+                    funcion=por_instancia(lambda backend: backend.en_curso)),
+            Medidor("upstream_errores", "Errores de conexión, timeouts y respuestas 5xx por instancia.", ("backend",),
+                    funcion=por_instancia(lambda backend: backend.errores)),
+            Medidor("upstream_expulsiones", "Veces que cada instancia fue expulsada por fallos consecutivos.",
+                    ("backend",), funcion=por_instancia(lambda backend: backend.expulsiones)),
+        ]
@@ -0,0 +1,140 @@
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Set
+
+
+class EntradaLRU(NamedTuple):
+    cuerpo: bytes
+    encabezados: Dict[str, str]
+    etiquetas: frozenset
+    vence: float
+    # Otras representaciones del mismo cuerpo (por ejemplo, con otra codificación), por nombre
+    variantes: Dict[str, bytes]
+
+
+class CacheLRU:
+    """
+    Caché LRU de respuestas con vencimiento (TTL) y límite de tamaño en bytes.
+
+    Cada entrada tiene etiquetas (por ejemplo el año o el año y la categoría) que permiten invalidar
+    todas las entradas afectadas por una mutación. Cada invalidación incrementa `generacion`; una
+    respuesta pedida antes de la invalidación no se guarda, para no volver a cachear datos viejos.
+
+    Una entrada puede guardar además variantes de su cuerpo, que cuentan para el límite de bytes y se
+    eliminan junto con ella.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, max_bytes_entrada: int,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_bytes_entrada = max_bytes_entrada
+        self.reloj = reloj
+        self.generacion = 0
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.desalojos = 0
+        self._entradas: "OrderedDict[Hashable, EntradaLRU]" = OrderedDict()
+        self._por_etiqueta: Dict[Hashable, Set[Hashable]] = defaultdict(set)
+
+    def obtener(self, clave: Hashable) -> Optional[EntradaLRU]:
+        entrada = self._entradas.get(clave)
+        if entrada is not None and entrada.vence <= self.reloj():
+            self._quitar(clave)
+            entrada = None
+        if entrada is None:
+            self.fallos += 1
+            return None
+        self._entradas.move_to_end(clave)
+        self.aciertos += 1
+        return entrada
+
+    def guardar(self, clave: Hashable, cuerpo: bytes, encabezados: Dict[str, str], etiquetas: Iterable[Hashable],
+                generacion: int) -> bool:
+        """
+        Guarda una respuesta si entra en el límite por entrada y no hubo invalidaciones desde `generacion`.
+
+        Retorna:
+            bool: Verdadero si la respuesta quedó guardada.
+        """
+        if generacion != self.generacion or len(cuerpo) > self.max_bytes_entrada:
+            return False
+
+        if clave in self._entradas:
+            self._quitar(clave)
+        entrada = EntradaLRU(cuerpo, encabezados, frozenset(etiquetas), self.reloj() + self.ttl, {})
+        self._entradas[clave] = entrada
+        self.bytes += len(cuerpo)
+        for etiqueta in entrada.etiquetas:
+            self._por_etiqueta[etiqueta].add(clave)
+
+        self._desalojar()
+        return True
+
+    def variante(self, clave: Hashable, nombre: str) -> Optional[bytes]:
+        entrada = self._entradas.get(clave)
+        return entrada.variantes.get(nombre) if entrada is not None else None
+
+    def guardar_variante(self, clave: Hashable, nombre: str, cuerpo: bytes, generacion: int) -> bool:
+        """
+        Agrega una variante a una entrada existente, con las mismas condiciones que `guardar`.
+
+        Retorna:
+            bool: Verdadero si la variante quedó guardada.
+        """
+        entrada = self._entradas.get(clave)
+        if entrada is None or generacion != self.generacion or len(cuerpo) > self.max_bytes_entrada:
+            return False
+
+        anterior = entrada.variantes.get(nombre)
+        entrada.variantes[nombre] = cuerpo
+        self.bytes += len(cuerpo) - (len(anterior) if anterior is not None else 0)
+        self._desalojar()
+        return True
+
+    def invalidar(self, etiquetas: Iterable[Hashable]):
+        """
+        Elimina todas las entradas que tengan alguna de las etiquetas dadas.
+        """
+        self.generacion += 1
+        for etiqueta in etiquetas:
+            for clave in list(self._por_etiqueta.get(etiqueta, ())):
+                self._quitar(clave)
+                self.invalidaciones += 1
+
+    def vaciar(self):
+        """
+        Elimina todas las entradas, para cuando no se puede saber cuáles quedaron desactualizadas.
+        """
+        self.generacion += 1
+        self.invalidaciones += len(self._entradas)
+        self._entradas.clear()
+        self._por_etiqueta.clear()
+        self.bytes = 0
+
+    def _desalojar(self):
+        while self.bytes > self.max_bytes:
+            self._quitar(next(iter(self._entradas)))
+            self.desalojos += 1
+
+    def _quitar(self, clave: Hashable):
+        entrada = self._entradas.pop(clave)
+        self.bytes -= len(entrada.cuerpo) + sum(len(variante) for variante in entrada.variantes.values())
+        for etiqueta in entrada.etiquetas:
+            claves = self._por_etiqueta.get(etiqueta)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._por_etiqueta[etiqueta]
+
+    def estadisticas(self) -> dict:
+        return {
+            "entradas": len(self._entradas),
+            "bytes": self.bytes,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "invalidaciones": self.invalidaciones,
+            "desalojos": self.desalojos,
+        }
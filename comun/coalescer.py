@@ -0,0 +1,43 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class LecturasCompartidas:
+    """
+    Agrupa lecturas concurrentes idénticas en una sola (single-flight).
+
+    La primera petición para una clave crea una tarea independiente; las que llegan mientras esa
+    tarea está en curso reciben la misma tarea en lugar de repetir la llamada. Como la tarea no
+    pertenece a ninguna petición, si el cliente que la inició se desconecta las demás no se cancelan.
+    """
+
+    def __init__(self):
+        self.coalescidas = 0
+        self._tareas: Dict[Hashable, asyncio.Task] = {}
+
+    def unirse(self, clave: Hashable, crear: Callable[[], Awaitable]) -> Tuple[asyncio.Task, bool]:
+        """
+        Devuelve la tarea en curso para la clave, creándola con `crear` si no existe.
+
+        Retorna:
+            Tuple[asyncio.Task, bool]: La tarea compartida y si esta petición fue la que la creó.
+        """
+        tarea = self._tareas.get(clave)
+        if tarea is not None:
+            self.coalescidas += 1
+            return tarea, False
+
+        tarea = asyncio.create_task(crear())
+        self._tareas[clave] = tarea
+        tarea.add_done_callback(lambda t: self._terminar(clave, t))
+        return tarea, True
+
+    def _terminar(self, clave: Hashable, tarea: asyncio.Task):
+        if self._tareas.get(clave) is tarea:
+            del self._tareas[clave]
+        # Marca la excepción como leída aunque todas las peticiones que esperaban se hayan cancelado
+        if not tarea.cancelled():
+            tarea.exception()
+
+    def __len__(self):
+        return len(self._tareas)
@@ -0,0 +1,89 @@
+import gzip
+from os import getenv
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional: sin el paquete solo se ofrece gzip
+    zstandard = None
+
+IDENTIDAD = "identity"
+# Codificaciones soportadas, de la preferida a la menos preferida
+CODIFICACIONES = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+# Los cuerpos más chicos se envían sin comprimir: el ahorro no compensa el costo ni los encabezados
+MINIMO_BYTES = int(getenv("COMPRESION_MINIMO_BYTES", "1024"))
+NIVEL_GZIP = int(getenv("COMPRESION_NIVEL_GZIP", "6"))
+NIVEL_ZSTD = int(getenv("COMPRESION_NIVEL_ZSTD", "3"))
+
+
+def negociar(accept_encoding: str) -> str:
+    """
+    Elige la codificación de una respuesta según el encabezado `Accept-Encoding` del cliente.
+
+    Gana la codificación soportada con mayor valor `q`; a igual valor, la preferida por el servidor.
+    Una codificación con `q=0` queda excluida, y `*` se aplica a las que no se nombran.
+
+    Retorna:
+        str: Una de `CODIFICACIONES`, o `IDENTIDAD` si el cliente no acepta ninguna.
+    """
+    calidades = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.partition(";")
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        clave, _, valor = parametros.partition("=")
+        if clave.strip().lower() == "q":
+            try:
+                calidad = float(valor)
+            except ValueError:
+                calidad = 0.0
+        calidades[nombre] = calidad
+
+    elegida, mejor_calidad = IDENTIDAD, 0.0
+    for codificacion in CODIFICACIONES:
+        calidad = calidades.get(codificacion, calidades.get("*", 0.0))
+        if calidad > mejor_calidad:
+            elegida, mejor_calidad = codificacion, calidad
+    return elegida
+
+
+def comprimir(cuerpo: bytes, codificacion: str) -> bytes:
+    if codificacion == "gzip":
+        # mtime fijo para que el mismo cuerpo produzca siempre los mismos bytes
+        return gzip.compress(cuerpo, compresslevel=NIVEL_GZIP, mtime=0)
+    if codificacion == "zstd":
+        return zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(cuerpo)
+    return cuerpo
+
+
+def descomprimir(cuerpo: bytes, codificacion: str) -> bytes:
+    if codificacion == "gzip":
+        return gzip.decompress(cuerpo)
+    if codificacion == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(cuerpo)
+    return cuerpo
+
+
+def transcodificar(cuerpo: bytes, origen: str, destino: str) -> bytes:
+    return comprimir(descomprimir(cuerpo, origen), destino)
+
+
+def etag_codificado(etag: str, codificacion: str) -> str:
+    """
+    Devuelve el ETag de una variante codificada: cada codificación es una representación distinta
+    y necesita su propio ETag fuerte, derivado del ETag del cuerpo sin comprimir.
+    """
+    if codificacion == IDENTIDAD or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{codificacion}"'
+
+
+def etag_sin_codificar(etag: str, codificacion: str) -> str:
+    """
+    Inversa de `etag_codificado`: recupera el ETag del cuerpo sin comprimir.
+    """
+    sufijo = f'-{codificacion}"'
+    if codificacion == IDENTIDAD or not etag.endswith(sufijo):
+        return etag
+    return etag[:-len(sufijo)] + '"'
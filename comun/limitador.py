@@ -0,0 +1,159 @@
+import json
+import secrets
+import time
+from base64 import b64decode
+from binascii import Error as ErrorBase64
+from collections import OrderedDict
+from dataclasses import dataclass
+from math import ceil
+from os import getenv
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+
+
+@dataclass(frozen=True)
+class Limite:
+    """
+    Límite de peticiones: `tasa` peticiones por segundo sostenidas, con ráfagas de hasta `rafaga`.
+    """
+    tasa: float
+    rafaga: int = 1
+
+
+def limites_desde_entorno(variable: str, por_defecto: Dict[str, Limite]) -> Dict[str, Limite]:
+    """
+    Lee de una variable de entorno un mapa JSON de límites, por ejemplo
+    `{"/prize": {"tasa": 2, "rafaga": 5}}`. Si la variable no está definida se usan los de `por_defecto`;
+    si está definida los reemplaza por completo, de modo que `{}` quita todos los límites del mapa.
+
+    Parámetros:
+        variable (str): Nombre de la variable de entorno.
+        por_defecto (Dict[str, Limite]): Límites que se usan si la variable no está definida.
+
+    Retorna:
+        Dict[str, Limite]: Límite por rol o por prefijo de ruta.
+    """
+    valor = getenv(variable)
+    if valor is None:
+        return dict(por_defecto)
+    try:
+        return {clave: Limite(tasa=float(limite["tasa"]), rafaga=int(limite.get("rafaga", 1)))
+                for clave, limite in json.loads(valor).items()}
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f"{variable} debe ser un objeto JSON de la forma "
+                         f'{{"clave": {{"tasa": 2, "rafaga": 5}}}}: {e!r}') from e
+
+
+class LimitadorTasa:
+    """
+    Limitador de tasa basado en GCRA (generic cell rate algorithm), equivalente a un token bucket.
+
+    Por cada clave solo se guarda un número: el instante teórico de llegada (TAT) de la próxima
+    petición, medido con `time.monotonic()`. Una clave cuyo TAT ya pasó está en el mismo estado que
+    una clave nueva, por lo que puede descartarse sin cambiar el comportamiento; así se desalojan
+    las claves inactivas, y además la cantidad de claves nunca supera `max_claves`.
+
+    El límite aplicado es el del rol (o el límite por defecto), y además el de la ruta si la ruta
+    tiene uno configurado. Las rutas se configuran por prefijo y gana el prefijo más largo.
+    """
+
+    def __init__(self, limite_por_defecto: Limite, limites_por_rol: Optional[Dict[str, Limite]] = None,
+                 limites_por_ruta: Optional[Dict[str, Limite]] = None, max_claves: int = 10000,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.limite_por_defecto = limite_por_defecto
+        self.limites_por_rol = limites_por_rol or {}
+        self.limites_por_ruta = sorted((limites_por_ruta or {}).items(), key=lambda r: len(r[0]), reverse=True)
+        self.max_claves = max_claves
+        self.reloj = reloj
+        self.rechazos = 0
+        self._tat: "OrderedDict[Tuple, float]" = OrderedDict()
+
+    def reglas(self, ruta: str, rol: Optional[str]) -> List[Tuple[str, Limite]]:
+        """
+        Devuelve las reglas (nombre, límite) que aplican a una petición.
+        """
+        nombre_rol = rol if rol in self.limites_por_rol else "*"
+        reglas = [("rol:" + nombre_rol, self.limites_por_rol.get(rol, self.limite_por_defecto))]
+        for prefijo, limite in self.limites_por_ruta:
+            if ruta == prefijo or ruta.startswith(prefijo.rstrip("/") + "/"):
+                reglas.append(("ruta:" + prefijo, limite))
+                break
+        return reglas
+
+    def consumir(self, cliente: str, ruta: str, rol: Optional[str] = None) -> float:
+        """
+        Registra una petición del cliente si todas las reglas la permiten.
+
+        Parámetros:
+            cliente (str): Identificador del cliente (normalmente la IP).
+            ruta (str): Ruta de la petición.
+            rol (str): Rol autenticado del cliente, si se conoce.
+
+        Retorna:
+            float: 0 si la petición se permite, o los segundos que el cliente debe esperar.
+        """
+        ahora = self.reloj()
+        self._desalojar(ahora)
+
+        nuevos = []
+        espera = 0.0
+        for nombre, limite in self.reglas(ruta, rol):
+            clave = (cliente, nombre)
+            intervalo = 1.0 / limite.tasa
+            tolerancia = intervalo * (limite.rafaga - 1)
+            tat = max(self._tat.get(clave, ahora), ahora)
+            if tat - ahora > tolerancia:
+                espera = max(espera, tat - ahora - tolerancia)
+            nuevos.append((clave, tat + intervalo))
+
+        if espera:
+            self.rechazos += 1
+            return espera
+
+        for clave, tat in nuevos:
+            self._tat[clave] = tat
+            self._tat.move_to_end(clave)
+        return 0.0
+
+    def _desalojar(self, ahora: float):
+        # Las claves están ordenadas por último uso; se descartan las inactivas y, si hace falta, las más viejas.
+        while self._tat:
+            clave, tat = next(iter(self._tat.items()))
+            if tat > ahora and len(self._tat) < self.max_claves:
+                break
+            del self._tat[clave]
+
+    def __len__(self):
+        return len(self._tat)
+
+
+def rol_de_peticion(request: Request, usuarios: dict) -> Optional[str]:
+    """
+    Obtiene el rol de la petición a partir de su encabezado de autenticación Basic, si las credenciales son válidas.
+    """
+    encabezado = request.headers.get("authorization", "")
+    esquema, _, credenciales = encabezado.partition(" ")
+    if esquema.lower() != "basic" or not credenciales:
+        return None
+    try:
+        nombre, _, password = b64decode(credenciales).decode("utf-8").partition(":")
+    except (ErrorBase64, UnicodeDecodeError):
+        return None
+    usuario = usuarios.get(nombre)
+    if not usuario or not secrets.compare_digest(password.encode(), usuario["password"].encode()):
+        return None
+    return usuario["role"]
+
+
+def cliente_de_peticion(request: Request) -> str:
+    return request.client.host if request.client else "desconocido"
+
+
+def respuesta_limite_excedido(espera: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Demasiadas solicitudes. Intente nuevamente más tarde."},
+        headers={"Retry-After": str(ceil(espera))},
+    )
@@ -0,0 +1,242 @@
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from fastapi import Request, Response
+from starlette.routing import Match
+
+# Límites (en segundos) de los histogramas de latencia
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Límites (en bytes) de los histogramas de tamaño
+LIMITES_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metrica:
+    """
+    Métrica con nombre, descripción y etiquetas, expuesta en el formato de texto de Prometheus.
+
+    Los valores se guardan por combinación de valores de etiquetas, en el orden de `etiquetas`.
+    Las observaciones pueden llegar desde hilos (dependencias sincrónicas, escrituras a disco), por
+    lo que se protegen con un lock.
+    """
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def exponer(self) -> List[str]:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}", *self._muestras()]
+
+    def _muestras(self) -> List[str]:
+        raise NotImplementedError
+
+    def _etiquetas(self, valores: Tuple[str, ...], le: Optional[str] = None) -> str:
+        pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(self.etiquetas, valores)]
+        if le is not None:
+            pares.append(f'le="{le}"')
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def incrementar(self, *valores_etiquetas: str, cantidad: float = 1):
+        with self._lock:
+            self._valores[valores_etiquetas] = self._valores.get(valores_etiquetas, 0) + cantidad
+
+    def _muestras(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{self._etiquetas(clave)} {_numero(valor)}" for clave, valor in valores]
+
+
+class Medidor(Metrica):
+    """
+    Valor que sube y baja. Con `funcion`, el valor se calcula al exponer las métricas: la función
+    devuelve un número, o un diccionario de valores de etiquetas a número si la métrica tiene etiquetas.
+    """
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 funcion: Optional[Callable[[], Union[float, Dict[Tuple[str, ...], float]]]] = None):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def sumar(self, *valores_etiquetas: str, cantidad: float = 1):
+        with self._lock:
+            self._valores[valores_etiquetas] = self._valores.get(valores_etiquetas, 0) + cantidad
+
+    def fijar(self, valor: float, *valores_etiquetas: str):
+        with self._lock:
+            self._valores[valores_etiquetas] = valor
+
+    def _muestras(self) -> List[str]:
+        if self.funcion is not None:
+            resultado = self.funcion()
+            valores = list(resultado.items()) if isinstance(resultado, dict) else [((), resultado)]
+        else:
+            with self._lock:
+                valores = list(self._valores.items())
+        return [f"{self.nombre}{self._etiquetas(clave)} {_numero(valor)}" for clave, valor in valores]
+
+
+class Histograma(Metrica):
+    """
+    Distribución de observaciones en intervalos acumulados (`_bucket`), con su suma y cantidad.
+    """
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 limites: Sequence[float] = LIMITES_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(limites)
+        # Por cada combinación de etiquetas: cantidades por intervalo (sin acumular, el último es +Inf) y suma
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observar(self, valor: float, *valores_etiquetas: str):
+        with self._lock:
+            serie = self._series.get(valores_etiquetas)
+            if serie is None:
+                serie = self._series[valores_etiquetas] = ([0] * (len(self.limites) + 1), [0.0])
+            serie[0][bisect_left(self.limites, valor)] += 1
+            serie[1][0] += valor
+
+    @contextmanager
+    def medir(self, *valores_etiquetas: str) -> Iterator[None]:
+        """
+        Observa la duración en segundos del bloque, aunque termine con una excepción.
+        """
+        inicio = perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(perf_counter() - inicio, *valores_etiquetas)
+
+    def _muestras(self) -> List[str]:
+        with self._lock:
+            series = [(clave, list(cantidades), suma[0]) for clave, (cantidades, suma) in self._series.items()]
+
+        muestras = []
+        for clave, cantidades, suma in series:
+            acumulado = 0
+            for limite, cantidad in zip(self.limites + (float("inf"),), cantidades):
+                acumulado += cantidad
+                le = "+Inf" if limite == float("inf") else _numero(limite)
+                muestras.append(f"{self.nombre}_bucket{self._etiquetas(clave, le)} {acumulado}")
+            muestras.append(f"{self.nombre}_sum{self._etiquetas(clave)} {_numero(suma)}")
+            muestras.append(f"{self.nombre}_count{self._etiquetas(clave)} {acumulado}")
+        return muestras
+
+
+class RegistroMetricas:
+    """
+    Conjunto de métricas de un servicio, expuesto en `/metrics`.
+
+    Las métricas que pertenecen a otros componentes (por ejemplo, el almacenamiento) se agregan con
+    `registrar`; registrar otra métrica con el mismo nombre reemplaza la anterior, de modo que volver
+    a iniciar la aplicación no las duplica.
+    """
+
+    def __init__(self):
+        self._metricas: Dict[str, Metrica] = {}
+
+    def registrar(self, *metricas: Metrica):
+        for metrica in metricas:
+            self._metricas[metrica.nombre] = metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        metrica = Contador(nombre, ayuda, etiquetas)
+        self.registrar(metrica)
+        return metrica
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                funcion: Optional[Callable] = None) -> Medidor:
+        metrica = Medidor(nombre, ayuda, etiquetas, funcion)
+        self.registrar(metrica)
+        return metrica
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                   limites: Sequence[float] = LIMITES_LATENCIA) -> Histograma:
+        metrica = Histograma(nombre, ayuda, etiquetas, limites)
+        self.registrar(metrica)
+        return metrica
+
+    def exponer(self) -> str:
+        return "\n".join(linea for metrica in self._metricas.values() for linea in metrica.exponer()) + "\n"
+
+    def respuesta(self) -> Response:
+        return Response(content=self.exponer(), media_type=TIPO_CONTENIDO)
+
+
+def plantilla_de_ruta(request: Request) -> str:
+    """
+    Devuelve la ruta declarada que atiende la petición (por ejemplo `/prizes/{year}`), para que las
+    métricas no tengan una serie por cada año o ID. Si la petición no llegó al router (por ejemplo,
+    la rechazó el limitador), se busca la ruta que coincide; "desconocida" si no hay ninguna.
+    """
+    ruta = request.scope.get("route")
+    if ruta is not None:
+        return ruta.path
+    for ruta in request.app.router.routes:
+        coincidencia, _ = ruta.matches(request.scope)
+        if coincidencia == Match.FULL:
+            return ruta.path
+    return "desconocida"
+
+
+class MetricasHTTP:
+    """
+    Métricas comunes a los dos servicios: latencia por método, ruta y código, peticiones en curso,
+    duración y rechazos del limitador de tasa, y duración de la verificación de credenciales.
+    """
+
+    def __init__(self, registro: RegistroMetricas):
+        self.duracion = registro.histograma("http_peticion_duracion_segundos",
+                                            "Latencia de las peticiones por método, ruta y código.",
+                                            ("metodo", "ruta", "codigo"))
+        self.en_curso = registro.medidor("http_peticiones_en_curso", "Peticiones que se están atendiendo.")
+        self.duracion_limitador = registro.histograma("limitador_duracion_segundos",
+                                                      "Duración de la verificación del limitador de tasa.")
+        self.rechazos_limitador = registro.contador("limitador_rechazos_total",
+                                                    "Peticiones rechazadas por el limitador de tasa, por ruta.",
+                                                    ("ruta",))
+        self.duracion_autenticacion = registro.histograma("autenticacion_duracion_segundos",
+                                                          "Duración de la verificación de credenciales.")
+
+    async def medir_peticion(self, request: Request, call_next) -> Response:
+        """
+        Atiende la petición registrando su latencia y las peticiones en curso.
+
+        La latencia se mide hasta que la respuesta está lista para enviarse; en las respuestas
+        transmitidas (streaming) no incluye el envío del cuerpo.
+        """
+        self.en_curso.sumar()
+        inicio = perf_counter()
+        codigo = "500"
+        try:
+            respuesta = await call_next(request)
+            codigo = str(respuesta.status_code)
+            return respuesta
+        finally:
+            self.en_curso.sumar(cantidad=-1)
+            self.duracion.observar(perf_counter() - inicio, request.method, plantilla_de_ruta(request), codigo)
+
+
+def _numero(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
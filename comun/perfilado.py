@@ -0,0 +1,126 @@
+import cProfile
+import io
+import marshal
+import pstats
+from collections import deque
+from datetime import datetime, timezone
+from os import getenv
+from random import random
+from time import perf_counter
+from typing import Deque, List, Optional
+
+from fastapi import Request, Response
+
+from comun.limitador import rol_de_peticion
+
+# Encabezado con el que un admin pide perfilar su petición
+ENCABEZADO = "x-perfilar"
+# Encabezado de la respuesta con el ID del perfil capturado
+ENCABEZADO_ID = "X-Perfil-Id"
+# Fracción de las peticiones que se perfilan al azar (0 desactiva el muestreo)
+TASA_MUESTREO = float(getenv("PERFILADO_TASA", "0"))
+# Cantidad de perfiles que se conservan; al superarla se descartan los más viejos
+MAXIMO_PERFILES = int(getenv("PERFILADO_MAXIMO", "20"))
+ORDENES = ("cumulative", "tottime", "calls")
+
+
+class Perfil:
+    """
+    Perfil de cProfile de una petición, con los datos necesarios para identificarla.
+    """
+    __slots__ = ("id", "fecha", "metodo", "ruta", "codigo", "motivo", "duracion_ms", "_estadisticas")
+
+    def __init__(self, id: int, request: Request, codigo: int, motivo: str, duracion: float,
+                 perfilador: cProfile.Profile):
+        self.id = id
+        self.fecha = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.metodo = request.method
+        self.ruta = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+        self.codigo = codigo
+        self.motivo = motivo
+        self.duracion_ms = round(duracion * 1000, 2)
+        perfilador.create_stats()
+        self._estadisticas = perfilador.stats
+
+    def resumen(self) -> dict:
+        return {clave: getattr(self, clave) for clave in self.__slots__ if not clave.startswith("_")}
+
+    def texto(self, orden: str = "cumulative", lineas: int = 60) -> str:
+        """
+        Devuelve el informe de pstats con las `lineas` funciones de mayor `orden`.
+        """
+        salida = io.StringIO()
+        estadisticas = pstats.Stats(stream=salida)
+        estadisticas.stats = dict(self._estadisticas)
+        estadisticas.get_top_level_stats()
+        estadisticas.sort_stats(orden).print_stats(lineas)
+        return salida.getvalue()
+
+    def pstats(self) -> bytes:
+        """
+        Devuelve el perfil en el formato de `pstats.Stats.dump_stats`, para abrirlo con pstats o snakeviz.
+        """
+        return marshal.dumps(self._estadisticas)
+
+
+class Perfilador:
+    """
+    Perfila con cProfile las peticiones elegidas y conserva los últimos `maximo` perfiles.
+
+    Se perfila una petición si un admin la envía con el encabezado `X-Perfilar: 1`, o al azar con
+    probabilidad `tasa`. La respuesta perfilada incluye el encabezado `X-Perfil-Id`.
+
+    cProfile mide el hilo del event loop mientras la petición está en curso, por lo que el perfil
+    también incluye el trabajo de otras peticiones concurrentes; para que un perfil no pise a otro
+    se perfila una sola petición a la vez, y las demás se atienden normalmente. El tiempo que el
+    loop pasa esperando (servidor final, disco, threadpool) aparece en `select.epoll.poll`; lo que
+    corre en el threadpool (dependencias sincrónicas, escrituras a disco) no aparece desglosado,
+    y en las respuestas transmitidas solo se mide hasta enviar los encabezados.
+    """
+
+    def __init__(self, tasa: float = TASA_MUESTREO, maximo: int = MAXIMO_PERFILES):
+        self.tasa = tasa
+        self._perfiles: Deque[Perfil] = deque(maxlen=maximo)
+        self._ultimo_id = 0
+        self._en_curso = False
+
+    def motivo(self, request: Request, usuarios: dict) -> Optional[str]:
+        """
+        Indica por qué se debe perfilar la petición (`encabezado` o `muestreo`), o None si no se perfila.
+        """
+        if request.headers.get(ENCABEZADO, "").strip().lower() in ("1", "true", "si"):
+            if rol_de_peticion(request, usuarios) == "admin":
+                return "encabezado"
+        if self.tasa and random() < self.tasa:
+            return "muestreo"
+        return None
+
+    async def perfilar_peticion(self, request: Request, call_next, usuarios: dict) -> Response:
+        if self._en_curso:
+            return await call_next(request)
+        motivo = self.motivo(request, usuarios)
+        if motivo is None:
+            return await call_next(request)
+
+        self._en_curso = True
+        perfilador = cProfile.Profile()
+        inicio = perf_counter()
+        codigo = 500
+        try:
+            perfilador.enable()
+            respuesta = await call_next(request)
+            codigo = respuesta.status_code
+        finally:
+            perfilador.disable()
+            self._en_curso = False
+            self._ultimo_id += 1
+            self._perfiles.append(Perfil(self._ultimo_id, request, codigo, motivo, perf_counter() - inicio,
+                                         perfilador))
+        respuesta.headers[ENCABEZADO_ID] = str(self._ultimo_id)
+        return respuesta
+
+    def listar(self) -> List[dict]:
+        return [perfil.resumen() for perfil in reversed(self._perfiles)]
+
+    def obtener(self, perfil_id: int) -> Optional[Perfil]:
+        return next((perfil for perfil in self._perfiles if perfil.id == perfil_id), None)
@@ -21,6 +21,20 @@ class PrizesResponse(BaseModel):
     prizes: List[Prize] = []
 
 
+class LaureatePrize(BaseModel):
+    year: int
+    category: str
+    motivation: Optional[str] = None
+    share: Optional[str] = None
+
+
+class LaureateResponse(BaseModel):
+    id: int
+    firstname: Optional[str] = None
+    surname: Optional[str] = None
+    prizes: List[LaureatePrize] = []
+
+
 class LaureateUpdate(BaseModel):
     id: Optional[int] = None
     firstname: Optional[str] = None
@@ -31,4 +45,14 @@ class LaureateUpdate(BaseModel):
 
 class PrizeUpdate(BaseModel):
     laureates: Optional[List[LaureateUpdate]] = None
-    overallMotivation: Optional[str] = None
\ No newline at end of file
+    overallMotivation: Optional[str] = None
+
+
+class PrizeKey(BaseModel):
+    year: int
+    category: str
+
+
+class PrizeBatchUpdate(PrizeUpdate):
+    year: int
+    category: str
\ No newline at end of file
@@ -0,0 +1,166 @@
+import json
+import os
+import tempfile
+import unittest
+
+from almacenamiento.journal import Journal
+from almacenamiento.memoria import AlmacenMemoria
+from almacenamiento.registros import DatosPremios, premio_a_dict
+from api_bd import cargar_datos_desde_archivo
+from modelos.api_bd.modelos_bd import Prize, PrizeBatchUpdate, PrizeKey, PrizeUpdate
+
+PREMIOS = [
+    {"year": 1901, "category": "physics", "overallMotivation": "original",
+     "laureates": [{"id": 1, "firstname": "Wilhelm", "surname": "Röntgen", "share": "1"}]},
+    {"year": 1901, "category": "peace", "overallMotivation": "original", "laureates": []},
+    {"year": 1902, "category": "chemistry", "overallMotivation": "original", "laureates": []},
+]
+
+
+def premio(year: int, category: str, motivacion: str) -> dict:
+    return {"year": year, "category": category, "overallMotivation": motivacion, "laureates": []}
+
+
+class TestJournal(unittest.IsolatedAsyncioTestCase):
+    """
+    Reproducción del journal sobre el snapshot, descarte de entradas incompletas y compactación.
+    """
+
+    async def asyncSetUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta_snapshot = os.path.join(self.directorio.name, "bd.json")
+        self.ruta_journal = os.path.join(self.directorio.name, "bd.journal")
+        with open(self.ruta_snapshot, "w", encoding="utf-8") as f:
+            json.dump({"prizes": PREMIOS}, f)
+
+    async def asyncTearDown(self):
+        self.directorio.cleanup()
+
+    def reproducir(self) -> tuple:
+        """
+        Carga el snapshot y le aplica el journal, como al arrancar. Retorna los datos, las entradas
+        aplicadas y el journal listo para seguir escribiendo.
+        """
+        datos_nobel, metadatos = cargar_datos_desde_archivo(self.ruta_snapshot)
+        journal = Journal(self.ruta_journal, sincronizar=False)
+        aplicadas = journal.reproducir(datos_nobel, metadatos.get("journal_seq", 0))
+        self.addCleanup(journal.cerrar)
+        return datos_nobel, aplicadas, journal
+
+    def escribir_journal(self, contenido: bytes):
+        with open(self.ruta_journal, "wb") as f:
+            f.write(contenido)
+
+    @staticmethod
+    def claves(datos_nobel: DatosPremios) -> list:
+        return [(p.year, p.category, p.overallMotivation) for p in datos_nobel.prizes]
+
+    async def test_reproduce_altas_modificaciones_y_bajas(self):
+        _, _, journal = self.reproducir()
+        journal.escribir([journal.preparar("create", prize=premio(1903, "peace", "nuevo")),
+                          journal.preparar("put", year=1901, category="Physics ",
+                                           prize=premio(1901, "physics", "modificado")),
+                          journal.preparar("delete", year=1901, category="peace"),
+                          journal.preparar("batch", ops=[
+                              {"op": "delete", "year": 1902, "category": "chemistry"},
+                              {"op": "create", "prize": premio(1902, "chemistry", "otro")},
+                          ])])
+
+        datos_nobel, aplicadas, journal = self.reproducir()
+        self.assertEqual(aplicadas, 4)
+        self.assertEqual(journal.seq, 4)
+        self.assertEqual(self.claves(datos_nobel), [(1901, "physics", "modificado"), (1903, "peace", "nuevo"),
+                                                    (1902, "chemistry", "otro")])
+
+    async def test_ignora_entradas_incluidas_en_el_snapshot(self):
+        _, _, journal = self.reproducir()
+        journal.escribir([journal.preparar("delete", year=1901, category="peace"),
+                          journal.preparar("delete", year=1902, category="chemistry")])
+        with open(self.ruta_snapshot, "w", encoding="utf-8") as f:
+            json.dump({"journal_seq": 1, "prizes": PREMIOS[:1] + PREMIOS[2:]}, f)
+
+        datos_nobel, aplicadas, journal = self.reproducir()
+        self.assertEqual(aplicadas, 1)
+        self.assertEqual(journal.seq, 2)
+        self.assertEqual(self.claves(datos_nobel), [(1901, "physics", "original")])
+
+    async def test_descarta_linea_final_incompleta(self):
+        _, _, journal = self.reproducir()
+        linea = journal.preparar("delete", year=1901, category="peace").encode()
+        self.escribir_journal(linea + linea[:10])
+
+        datos_nobel, aplicadas, _ = self.reproducir()
+        self.assertEqual(aplicadas, 1)
+        self.assertEqual(len(datos_nobel.prizes), 2)
+        with open(self.ruta_journal, "rb") as f:
+            self.assertEqual(f.read(), linea)
+
+    async def test_descarta_linea_final_sin_salto_de_linea(self):
+        _, _, journal = self.reproducir()
+        primera = journal.preparar("delete", year=1901, category="peace").encode()
+        sin_confirmar = journal.preparar("delete", year=1902, category="chemistry").encode()[:-1]
+        self.escribir_journal(primera + sin_confirmar)
+
+        datos_nobel, aplicadas, journal = self.reproducir()
+        self.assertEqual(aplicadas, 1)
+        self.assertEqual(journal.seq, 1)
+        self.assertEqual(len(datos_nobel.prizes), 2)
+
+        # La entrada siguiente no queda pegada a la descartada
+        journal.escribir([journal.preparar("create", prize=premio(1903, "peace", "nuevo"))])
+        journal.cerrar()
+        datos_nobel, aplicadas, _ = self.reproducir()
+        self.assertEqual(aplicadas, 2)
+        self.assertEqual(self.claves(datos_nobel), [(1901, "physics", "original"), (1902, "chemistry", "original"),
+                                                    (1903, "peace", "nuevo")])
+
+    async def test_entrada_corrupta_en_el_medio(self):
+        _, _, journal = self.reproducir()
+        linea = journal.preparar("delete", year=1901, category="peace").encode()
+        self.escribir_journal(b"{corrupta\n" + linea)
+        with self.assertRaises(ValueError):
+            self.reproducir()
+
+    async def test_compactar(self):
+        datos_nobel, _, journal = self.reproducir()
+        journal.escribir([journal.preparar("delete", year=1901, category="peace")])
+        datos_nobel, _, journal = self.reproducir()
+        journal.compactar(datos_nobel, self.ruta_snapshot, ultimo_id_laureado=7)
+        self.assertEqual(journal.registros_pendientes, 0)
+        self.assertEqual(os.path.getsize(self.ruta_journal), 0)
+
+        datos_compactados, metadatos = cargar_datos_desde_archivo(self.ruta_snapshot)
+        self.assertEqual(metadatos, {"journal_seq": 1, "ultimo_id_laureado": 7})
+        self.assertEqual(self.claves(datos_compactados), self.claves(datos_nobel))
+
+        # La secuencia continúa después de la del snapshot
+        datos_nobel, aplicadas, journal = self.reproducir()
+        self.assertEqual(aplicadas, 0)
+        self.assertEqual(journal.seq, 1)
+        self.assertIn('"seq":2', journal.preparar("delete", year=1901, category="physics"))
+
+    async def test_reproduccion_igual_a_las_mutaciones_en_vivo(self):
+        datos_nobel, metadatos = cargar_datos_desde_archivo(self.ruta_snapshot)
+        almacen = AlmacenMemoria(datos_nobel, metadatos, self.ruta_snapshot, self.ruta_journal, sincronizar=False,
+                                 ventana=0, compactar_cada=1000, esperar_durabilidad=True)
+        await almacen.iniciar()
+        await almacen.crear(Prize(year=1903, category="peace", overallMotivation="nuevo",
+                                  laureates=[{"firstname": "Ana", "surname": "Pérez", "share": "1"}]))
+        await almacen.actualizar(1901, "Physics", PrizeUpdate(overallMotivation="modificado"))
+        await almacen.eliminar(1901, "peace")
+        await almacen.crear_lote([Prize(year=1901, category="peace", overallMotivation="de nuevo"),
+                                  Prize(year=1904, category="physics")])
+        await almacen.actualizar_lote([PrizeBatchUpdate(year=1903, category="peace", overallMotivation="otra"),
+                                       PrizeBatchUpdate(year=1902, category="chemistry", overallMotivation="x")])
+        await almacen.eliminar_lote([PrizeKey(year=1902, category="chemistry"),
+                                     PrizeKey(year=1904, category="physics")])
+        en_vivo = [premio_a_dict(p) for p in almacen.todos().prizes]
+
+        reproducidos, aplicadas, _ = self.reproducir()
+        self.assertEqual(aplicadas, 6)
+        self.assertEqual([premio_a_dict(p) for p in reproducidos.prizes], en_vivo)
+        almacen.journal.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()
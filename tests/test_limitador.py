@@ -0,0 +1,138 @@
+import os
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+import api_bd
+from comun.limitador import Limite, LimitadorTasa, limites_desde_entorno
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self) -> float:
+        return self.ahora
+
+
+class TestLimitadorTasa(unittest.TestCase):
+    """
+    Límites por defecto, por rol y por ruta, y desalojo de claves del limitador de tasa.
+    """
+
+    def setUp(self):
+        self.reloj = Reloj()
+
+    def crear(self, **kwargs) -> LimitadorTasa:
+        return LimitadorTasa(Limite(tasa=1, rafaga=2), reloj=self.reloj, **kwargs)
+
+    def test_rafaga_y_espera(self):
+        limitador = self.crear()
+        self.assertEqual(limitador.consumir("a", "/"), 0)
+        self.assertEqual(limitador.consumir("a", "/"), 0)
+        self.assertAlmostEqual(limitador.consumir("a", "/"), 1.0)
+        self.assertEqual(limitador.rechazos, 1)
+        # Otro cliente tiene su propio límite
+        self.assertEqual(limitador.consumir("b", "/"), 0)
+
+        self.reloj.ahora += 1
+        self.assertEqual(limitador.consumir("a", "/"), 0)
+        self.assertGreater(limitador.consumir("a", "/"), 0)
+
+    def test_limite_por_rol_reemplaza_al_por_defecto(self):
+        limitador = self.crear(limites_por_rol={"admin": Limite(tasa=100, rafaga=100)})
+        for _ in range(50):
+            self.assertEqual(limitador.consumir("a", "/", "admin"), 0)
+        # Un rol sin límite propio, o una petición anónima, usan el límite por defecto
+        self.assertEqual(limitador.consumir("a", "/", "user"), 0)
+        self.assertEqual(limitador.consumir("a", "/", None), 0)
+        self.assertGreater(limitador.consumir("a", "/", "user"), 0)
+
+    def test_limite_por_ruta_se_suma_al_del_rol(self):
+        limitador = self.crear(limites_por_rol={"admin": Limite(tasa=100, rafaga=100)},
+                               limites_por_ruta={"/prize": Limite(tasa=1, rafaga=1)})
+        self.assertEqual(limitador.consumir("a", "/prize/1901/physics", "admin"), 0)
+        self.assertGreater(limitador.consumir("a", "/prize", "admin"), 0)
+        # `/prizes` no está bajo el prefijo `/prize`
+        self.assertEqual(limitador.consumir("a", "/prizes", "admin"), 0)
+
+    def test_gana_el_prefijo_mas_largo(self):
+        limitador = self.crear(limites_por_rol={"admin": Limite(tasa=100, rafaga=100)},
+                               limites_por_ruta={"/prize": Limite(tasa=1, rafaga=3),
+                                                 "/prize/1901": Limite(tasa=1, rafaga=1)})
+        self.assertEqual(limitador.reglas("/prize/1901/physics", "admin"),
+                         [("rol:admin", Limite(tasa=100, rafaga=100)), ("ruta:/prize/1901", Limite(tasa=1, rafaga=1))])
+        self.assertEqual(limitador.consumir("a", "/prize/1901/physics", "admin"), 0)
+        self.assertGreater(limitador.consumir("a", "/prize/1901/physics", "admin"), 0)
+        for _ in range(3):
+            self.assertEqual(limitador.consumir("a", "/prize/1902/physics", "admin"), 0)
+        self.assertGreater(limitador.consumir("a", "/prize/1902/physics", "admin"), 0)
+
+    def test_desaloja_claves_inactivas(self):
+        limitador = self.crear()
+        limitador.consumir("a", "/")
+        limitador.consumir("b", "/")
+        self.assertEqual(len(limitador), 2)
+
+        self.reloj.ahora += 1
+        limitador.consumir("c", "/")
+        self.assertEqual(len(limitador), 1)
+
+    def test_desaloja_la_clave_mas_vieja_al_llegar_al_maximo(self):
+        limitador = self.crear(max_claves=2)
+        for _ in range(2):
+            limitador.consumir("a", "/")
+        self.assertGreater(limitador.consumir("a", "/"), 0)
+        limitador.consumir("b", "/")
+        limitador.consumir("c", "/")
+        self.assertEqual(len(limitador), 2)
+        # Al desalojarse, `a` vuelve a empezar como una clave nueva
+        self.assertEqual(limitador.consumir("a", "/"), 0)
+        self.assertEqual(len(limitador), 2)
+
+
+class TestLimitesDesdeEntorno(unittest.TestCase):
+
+    def test_sin_variable_usa_los_por_defecto(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(limites_desde_entorno("LIMITES_POR_RUTA", {"/prize": Limite(2, 5)}),
+                             {"/prize": Limite(2, 5)})
+
+    def test_variable_reemplaza_los_por_defecto(self):
+        with mock.patch.dict(os.environ, {"LIMITES_POR_RUTA": '{"/prizes:batch": {"tasa": 0.5, "rafaga": 3}, '
+                                                              '"/stats": {"tasa": 10}}'}):
+            self.assertEqual(limites_desde_entorno("LIMITES_POR_RUTA", {"/prize": Limite(2, 5)}),
+                             {"/prizes:batch": Limite(0.5, 3), "/stats": Limite(10, 1)})
+        with mock.patch.dict(os.environ, {"LIMITES_POR_RUTA": "{}"}):
+            self.assertEqual(limites_desde_entorno("LIMITES_POR_RUTA", {"/prize": Limite(2, 5)}), {})
+
+    def test_variable_invalida(self):
+        for valor in ("no es json", '{"/prize": 2}', '{"/prize": {"rafaga": 5}}', "[1, 2]"):
+            with self.subTest(valor=valor), mock.patch.dict(os.environ, {"LIMITES_POR_RUTA": valor}):
+                with self.assertRaises(ValueError):
+                    limites_desde_entorno("LIMITES_POR_RUTA", {})
+
+
+class TestRespuestaLimiteExcedido(unittest.TestCase):
+    """
+    Al superar el límite, el servicio responde 429 con `Retry-After` antes de autenticar la petición.
+    """
+
+    def test_429_con_retry_after(self):
+        reloj = Reloj()
+        limitador = LimitadorTasa(Limite(tasa=0.5, rafaga=2), reloj=reloj)
+        with mock.patch.object(api_bd, "limitador_tasa", limitador):
+            cliente = TestClient(api_bd.app)
+            self.assertEqual(cliente.get("/").status_code, 401)
+            self.assertEqual(cliente.get("/").status_code, 401)
+            respuesta = cliente.get("/")
+            self.assertEqual(respuesta.status_code, 429)
+            self.assertEqual(respuesta.headers["Retry-After"], "2")
+
+            reloj.ahora += 2
+            self.assertEqual(cliente.get("/").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from fastapi import HTTPException
+
+from almacenamiento.memoria import AlmacenMemoria
+from api_bd import cargar_datos_desde_archivo
+from modelos.api_bd.modelos_bd import PrizeUpdate
+
+PREMIOS = [
+    {"year": 1901, "category": "physics", "overallMotivation": "original",
+     "laureates": [{"id": 1, "firstname": "Wilhelm", "surname": "Röntgen", "share": "1"}]},
+    {"year": 1901, "category": "peace", "overallMotivation": "original", "laureates": []},
+]
+
+
+def fallar_escritura(lineas):
+    raise OSError("disco lleno")
+
+
+class TestErrorJournal(unittest.IsolatedAsyncioTestCase):
+    """
+    Un error al escribir el journal revierte las mutaciones no durables y deja el almacenamiento en solo lectura.
+    """
+
+    async def asyncSetUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta_snapshot = os.path.join(self.directorio.name, "bd.json")
+        self.ruta_journal = os.path.join(self.directorio.name, "bd.journal")
+        with open(self.ruta_snapshot, "w", encoding="utf-8") as f:
+            json.dump({"prizes": PREMIOS}, f)
+        self.almacen = self.crear_almacen()
+        await self.almacen.iniciar()
+
+    async def asyncTearDown(self):
+        self.directorio.cleanup()
+
+    def crear_almacen(self) -> AlmacenMemoria:
+        datos_nobel, metadatos = cargar_datos_desde_archivo(self.ruta_snapshot)
+        return AlmacenMemoria(datos_nobel, metadatos, self.ruta_snapshot, self.ruta_journal, sincronizar=False,
+                              ventana=0, compactar_cada=1000, esperar_durabilidad=True)
+
+    def motivacion(self, almacen: AlmacenMemoria, category: str) -> str:
+        return almacen.por_anio_y_categoria(1901, category)[0].overallMotivation
+
+    async def test_error_revierte_y_pasa_a_solo_lectura(self):
+        await self.almacen.actualizar(1901, "physics", PrizeUpdate(overallMotivation="durable"))
+        version_durable = self.almacen.version()
+
+        self.almacen.journal.escribir = fallar_escritura
+        with self.assertRaises(HTTPException) as error:
+            await self.almacen.actualizar(1901, "peace", PrizeUpdate(overallMotivation="perdida"))
+        self.assertEqual(error.exception.status_code, 500)
+
+        self.assertEqual(self.motivacion(self.almacen, "peace"), "original")
+        self.assertEqual(self.motivacion(self.almacen, "physics"), "durable")
+        self.assertEqual(self.almacen.estadisticas()["premios"], 2)
+        # La versión no vuelve atrás, y el feed pide releer los datos en lugar de mostrar la mutación perdida
+        self.assertGreater(self.almacen.version(), version_durable + 1)
+        self.assertIsNone(self.almacen.cambios_desde(version_durable, 100))
+        self.assertEqual(self.almacen.cambios_desde(self.almacen.version(), 100), [])
+
+        with self.assertRaises(HTTPException) as error:
+            await self.almacen.eliminar(1901, "physics")
+        self.assertEqual(error.exception.status_code, 503)
+        self.assertEqual(len(self.almacen.por_anio(1901)), 2)
+
+        # Al reiniciar se recupera el mismo estado durable
+        del self.almacen.journal.escribir
+        await self.almacen.cerrar()
+        reiniciado = self.crear_almacen()
+        self.assertEqual(self.motivacion(reiniciado, "peace"), "original")
+        self.assertEqual(self.motivacion(reiniciado, "physics"), "durable")
+        reiniciado.journal.cerrar()
+
+    async def test_error_sin_esperar_durabilidad(self):
+        self.almacen.escritor.esperar_durabilidad = False
+        self.almacen.journal.escribir = fallar_escritura
+        await self.almacen.eliminar(1901, "peace")
+        self.assertEqual(len(self.almacen.por_anio(1901)), 1)
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(self.almacen.por_anio(1901)), 2)
+        self.assertEqual([p.category for p in self.almacen.pagina(0, 10)[0]], ["physics", "peace"])
+        del self.almacen.journal.escribir
+        await self.almacen.cerrar()
+
+
+if __name__ == "__main__":
+    unittest.main()